@@ -0,0 +1,114 @@
+"""
+Benchmark of `dcos.marathondiff` on a large group tree.
+
+Builds a desired tree of 20 groups of 100 Docker apps each, and the live
+tree Marathon would return for it, then times canonicalizing and diffing
+them when nothing changed and when a single app was scaled.
+
+Usage: python benchmarks/bench_marathondiff.py [--groups N] [--apps N]
+"""
+
+import argparse
+import copy
+import json
+import timeit
+
+from dcos import marathondiff
+
+
+def desired_app(group, index):
+    return {
+        'id': 'app-{}'.format(index),
+        'instances': 2,
+        'cpus': 0.5,
+        'mem': 256,
+        'container': {
+            'type': 'DOCKER',
+            'docker': {'image': 'nginx:1.13'},
+            'portMappings': [{'containerPort': 80, 'name': 'http'}],
+        },
+        'networks': [{'mode': 'container/bridge'}],
+        'healthChecks': [{'protocol': 'MESOS_HTTP', 'path': '/health'}],
+        'fetch': [{'uri': 'https://example.com/{}.conf'.format(index)}],
+        'env': {'GROUP': group, 'INDEX': str(index)},
+        'labels': {'team': group},
+    }
+
+
+def live_app(app, group_id, service_port):
+    live = copy.deepcopy(app)
+    live['id'] = '{}/{}'.format(group_id, app['id'])
+    live['container']['docker'].update(
+        forcePullImage=False, privileged=False, parameters=[])
+    live['container']['volumes'] = []
+    live['container']['portMappings'][0].update(
+        hostPort=0, labels={}, protocol='tcp', servicePort=service_port)
+    live['healthChecks'][0].update(
+        gracePeriodSeconds=300, intervalSeconds=60, maxConsecutiveFailures=3,
+        portIndex=0, timeoutSeconds=20, delaySeconds=15, ipProtocol='IPv4')
+    live['fetch'][0].update(extract=True, executable=False, cache=False)
+    live.update({
+        'acceptedResourceRoles': None, 'backoffFactor': 1.15,
+        'backoffSeconds': 1, 'cmd': None, 'constraints': [], 'disk': 0,
+        'executor': '', 'maxLaunchDelaySeconds': 3600, 'gpus': 0,
+        'requirePorts': False, 'killSelection': 'YOUNGEST_FIRST',
+        'upgradeStrategy': {'maximumOverCapacity': 1,
+                            'minimumHealthCapacity': 1},
+        'unreachableStrategy': {'inactiveAfterSeconds': 0,
+                                'expungeAfterSeconds': 0},
+        'version': '2017-11-02T10:12:01.346Z',
+        'versionInfo': {'lastScalingAt': '2017-11-02T10:12:01.346Z',
+                        'lastConfigChangeAt': '2017-11-02T10:12:01.346Z'},
+        'role': 'slave_public', 'secrets': {}, 'tasksStaged': 0,
+        'tasksRunning': 2, 'tasksHealthy': 2, 'tasksUnhealthy': 0,
+        'deployments': [],
+    })
+    return live
+
+
+def trees(groups, apps):
+    desired = {'id': '/bench', 'groups': []}
+    live = {'id': '/bench', 'apps': [], 'pods': [], 'groups': [],
+            'dependencies': [], 'version': '2017-11-02T10:12:01.346Z'}
+    for group_index in range(groups):
+        name = 'group-{}'.format(group_index)
+        group_apps = [desired_app(name, index) for index in range(apps)]
+        desired['groups'].append({'id': name, 'apps': group_apps})
+
+        group_id = '/bench/' + name
+        live['groups'].append({
+            'id': group_id, 'apps': [
+                live_app(app, group_id, 10000 + group_index * apps + index)
+                for index, app in enumerate(group_apps)],
+            'pods': [], 'groups': [], 'dependencies': [],
+            'version': '2017-11-02T10:12:01.346Z'})
+    return desired, live
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--apps', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    desired, live = trees(args.groups, args.apps)
+    print('{} apps: {} KB desired, {} KB live'.format(
+        args.groups * args.apps, len(json.dumps(desired)) // 1024,
+        len(json.dumps(live)) // 1024))
+
+    scaled = copy.deepcopy(desired)
+    scaled['groups'][0]['apps'][0]['instances'] = 3
+
+    for name, tree in [('unchanged tree', desired),
+                       ('one app scaled', scaled)]:
+        changes = marathondiff.diff(tree, live, 'group')
+        best = min(timeit.repeat(
+            lambda: marathondiff.diff(tree, live, 'group'),
+            number=1, repeat=args.repeat))
+        print('{}: {:.0f} ms, {} change(s)'.format(
+            name, best * 1000, len(changes)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark of `dcos.recordio.Decoder` on multi-megabyte streams.
+
+Encodes a stream of records of each size, then times decoding it fed in
+fixed-size chunks, as it arrives from the agent's HTTP API, with the
+current decoder and with the byte-by-byte decoder it replaced.
+
+Usage: python benchmarks/bench_recordio.py [--megabytes N] [--chunk KIB]
+"""
+
+import argparse
+import timeit
+
+from six import BytesIO
+
+from dcos import recordio
+from dcos.errors import DCOSException
+
+
+class PreviousDecoder(object):
+    """The decoder as it was before it buffered whole chunks: it reads its
+    input one byte at a time through BytesIO."""
+
+    HEADER = 0
+    RECORD = 1
+
+    def __init__(self, deserialize):
+        self.deserialize = deserialize
+        self.state = self.HEADER
+        self.buffer = BytesIO()
+        self.buffer_length = 0
+        self.length = 0
+
+    def decode(self, data):
+        records = []
+        in_buffer = BytesIO(data)
+
+        for i in range(len(data)):
+            c = in_buffer.read(1)
+            if self.state == self.HEADER:
+                if c != b'\n':
+                    self.buffer.write(c)
+                    continue
+
+                self.buffer.seek(0)
+                num = self.buffer.read()
+                try:
+                    self.length = int(num)
+                except ValueError as e:
+                    raise DCOSException(
+                        "Failed to decode length '{}': {}".format(num, e))
+
+                self._reset_buffer()
+                self.state = self.RECORD
+
+                if self.length <= 0:
+                    self.buffer.seek(0)
+                    records.append(self.deserialize(self.buffer.read()))
+                    self.state = self.HEADER
+
+            elif self.state == self.RECORD:
+                self.buffer.write(c)
+                self.buffer_length += 1
+
+                if self.buffer_length == self.length:
+                    self.buffer.seek(0)
+                    records.append(self.deserialize(self.buffer.read()))
+                    self._reset_buffer()
+                    self.state = self.HEADER
+
+        return records
+
+    def _reset_buffer(self):
+        self.buffer = BytesIO()
+        self.buffer_length = 0
+
+
+def stream(record_size, megabytes):
+    encoder = recordio.Encoder(lambda record: record)
+    frame = encoder.encode(b'x' * record_size)
+    count = megabytes * 1024 * 1024 // len(frame)
+    return frame * count, count
+
+
+def decode(decoder_class, data, chunk_size):
+    decoder = decoder_class(lambda record: record)
+    count = 0
+    for offset in range(0, len(data), chunk_size):
+        count += len(decoder.decode(data[offset:offset + chunk_size]))
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--megabytes', type=int, default=8)
+    parser.add_argument('--chunk', type=int, default=64,
+                        help='size of the chunks fed to the decoder, in KiB')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    chunk_size = args.chunk * 1024
+    for record_size in [100, 4096]:
+        data, count = stream(record_size, args.megabytes)
+        print('{} records of {} B, {:.1f} MB in {} KiB chunks'.format(
+            count, record_size, len(data) / 1e6, args.chunk))
+
+        for name, decoder_class in [('previous', PreviousDecoder),
+                                    ('current', recordio.Decoder)]:
+            assert decode(decoder_class, data, chunk_size) == count
+            best = min(timeit.repeat(
+                lambda: decode(decoder_class, data, chunk_size),
+                number=1, repeat=args.repeat))
+            print('  {}: {:.0f} ms, {:.1f} MB/s'.format(
+                name, best * 1000, len(data) / 1e6 / best))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1125 @@
+"""
+Asynchronous counterpart of `dcos.http` for asyncio event loops.
+
+Requests are prepared the way `dcos.http` prepares them, with the same
+authentication, SSL verification, timeouts and mapping of unsuccessful
+responses to `DCOSHTTPException` and its subclasses, but they are sent over
+keep-alive connections owned by the event loop, so that thousands of
+requests can be in flight on a single thread. The request functions return
+`asyncio.Future`s of `requests.Response` objects whose content has already
+been read.
+
+The event loop is driven with futures and callbacks rather than coroutines
+so that this module can still be imported on Python 2, where it is
+unavailable. Streamed bodies and interactive login on HTTP 401 are not
+supported. Proxies aren't either: requests to URLs that the HTTP(S)_PROXY
+and NO_PROXY environment variables route through a proxy fail with a
+DCOSException rather than bypassing it.
+"""
+
+import collections
+import datetime
+import os
+import ssl
+import threading
+import time
+import zlib
+
+from functools import partial
+
+import requests
+import six
+
+from requests.structures import CaseInsensitiveDict
+from six.moves import urllib
+
+from dcos import config, http, util
+from dcos.errors import DCOSConnectionError, DCOSException
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+logger = util.get_logger(__name__)
+
+MAX_REDIRECTS = 30
+"""The maximum number of redirects followed for a request, as in requests."""
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+MAX_HEADER_SIZE = 64 * 1024
+"""The maximum size of a response's status line and headers."""
+
+_REQUEST_ARGS = {'params', 'data', 'json', 'headers', 'files', 'cookies',
+                 'allow_redirects'}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def request(method,
+            url,
+            is_success=http._default_is_success,
+            timeout=True,
+            verify=None,
+            toml_config=None,
+            loop=None,
+            **kwargs):
+    """Sends an HTTP request on an event loop.
+
+    :param method: method for the new Request object
+    :type method: str
+    :param url: URL for the new Request object
+    :type url: str
+    :param is_success: Defines successful status codes for the request
+    :type is_success: Function from int to bool
+    :param timeout: How many seconds to wait for the server to send data
+                    before aborting and raising an exception, see
+                    `dcos.http.request`
+    :type timeout: int | float | None | bool |
+                   (int | float | None, int | float | None)
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :param loop: the event loop to send the request on, by default the
+                 current one
+    :type loop: asyncio.AbstractEventLoop
+    :param kwargs: params, data, json, headers, files, cookies or
+                   allow_redirects, as for requests.request
+    :type kwargs: dict
+    :returns: future of the response
+    :rtype: asyncio.Future
+    """
+
+    if asyncio is None:
+        raise DCOSException('dcos.asynchttp requires Python 3')
+
+    unsupported = set(kwargs) - _REQUEST_ARGS
+    if unsupported:
+        raise DCOSException('Unsupported request arguments: {}'.format(
+            ', '.join(sorted(unsupported))))
+
+    if loop is None:
+        loop = asyncio.get_event_loop()
+    if toml_config is None:
+        toml_config = config.get_config()
+
+    if 'headers' not in kwargs:
+        kwargs['headers'] = {'Accept': 'application/json'}
+    redirects = MAX_REDIRECTS if kwargs.pop('allow_redirects', True) else 0
+
+    auth, auth_token = http._auth(url, toml_config)
+    timeout = http._timeout(timeout, toml_config)
+    verify = http._verify_ssl(url, verify, toml_config)
+    settings = (http._pool_size(toml_config), http._keep_alive(toml_config))
+
+    logger.info(
+        'Sending HTTP [%r] to [%r]: %r',
+        method,
+        url,
+        kwargs.get('headers'))
+
+    prepared = _prepare(method, url, auth, kwargs)
+
+    def check(response):
+        logger.info('Received HTTP response [%r]: %r',
+                    response.status_code,
+                    response.headers)
+
+        if is_success(response.status_code):
+            return response
+        http._raise_for_status(response, auth_token)
+
+    sent = _send(loop, prepared, timeout, verify, settings, redirects)
+    return then(sent, check)
+
+
+def head(url, **kwargs):
+    """Sends a HEAD request.
+
+    :param url: URL for the new Request object
+    :type url: str
+    :param kwargs: Additional arguments (see py:func:`request`)
+    :type kwargs: dict
+    :returns: future of the response
+    :rtype: asyncio.Future
+    """
+
+    return request('head', url, **kwargs)
+
+
+def get(url, **kwargs):
+    """Sends a GET request.
+
+    :param url: URL for the new Request object
+    :type url: str
+    :param kwargs: Additional arguments (see py:func:`request`)
+    :type kwargs: dict
+    :returns: future of the response
+    :rtype: asyncio.Future
+    """
+
+    return request('get', url, **kwargs)
+
+
+def post(url, data=None, json=None, **kwargs):
+    """Sends a POST request.
+
+    :param url: URL for the new Request object
+    :type url: str
+    :param data: Request body
+    :type data: dict, bytes, or file-like object
+    :param json: JSON request body
+    :type data: dict
+    :param kwargs: Additional arguments (see py:func:`request`)
+    :type kwargs: dict
+    :returns: future of the response
+    :rtype: asyncio.Future
+    """
+
+    return request('post', url, data=data, json=json, **kwargs)
+
+
+def put(url, data=None, **kwargs):
+    """Sends a PUT request.
+
+    :param url: URL for the new Request object
+    :type url: str
+    :param data: Request body
+    :type data: dict, bytes, or file-like object
+    :param kwargs: Additional arguments (see py:func:`request`)
+    :type kwargs: dict
+    :returns: future of the response
+    :rtype: asyncio.Future
+    """
+
+    return request('put', url, data=data, **kwargs)
+
+
+def patch(url, data=None, **kwargs):
+    """Sends a PATCH request.
+
+    :param url: URL for the new Request object
+    :type url: str
+    :param data: Request body
+    :type data: dict, bytes, or file-like object
+    :param kwargs: Additional arguments (see py:func:`request`)
+    :type kwargs: dict
+    :returns: future of the response
+    :rtype: asyncio.Future
+    """
+
+    return request('patch', url, data=data, **kwargs)
+
+
+def delete(url, **kwargs):
+    """Sends a DELETE request.
+
+    :param url: URL for the new Request object
+    :type url: str
+    :param kwargs: Additional arguments (see py:func:`request`)
+    :type kwargs: dict
+    :returns: future of the response
+    :rtype: asyncio.Future
+    """
+
+    return request('delete', url, **kwargs)
+
+
+def then(future, fn=None, on_error=None):
+    """Chains a function to a future.
+
+    :param future: the future
+    :type future: asyncio.Future
+    :param fn: called with the future's result when it succeeds; it can
+               return a value or another future
+    :type fn: function | None
+    :param on_error: called with the future's exception when it fails; it
+                     can return a value or another future, or raise
+    :type on_error: function | None
+    :returns: future of what `fn` or `on_error` returns, or of the original
+              result or exception when they are None
+    :rtype: asyncio.Future
+    """
+
+    result = _loop_of(future).create_future()
+
+    def copy(source):
+        if result.done():
+            return
+        if source.cancelled():
+            result.cancel()
+        elif source.exception() is not None:
+            result.set_exception(source.exception())
+        else:
+            result.set_result(source.result())
+
+    def resolve(source):
+        if result.done() or source.cancelled():
+            copy(source)
+            return
+
+        try:
+            error = source.exception()
+            if error is None:
+                value = source.result()
+                if fn is not None:
+                    value = fn(value)
+            elif on_error is not None:
+                value = on_error(error)
+            else:
+                value = source
+        except Exception as e:
+            result.set_exception(e)
+            return
+
+        if isinstance(value, asyncio.Future):
+            value.add_done_callback(copy)
+        else:
+            result.set_result(value)
+
+    def cancel(result):
+        if result.cancelled():
+            future.cancel()
+
+    future.add_done_callback(resolve)
+    result.add_done_callback(cancel)
+    return result
+
+
+def close_connections(loop=None):
+    """Closes the connections kept open for an event loop. Subsequent
+    requests will open new connections.
+
+    :param loop: the event loop, or None for all of them
+    :type loop: asyncio.AbstractEventLoop | None
+    :rtype: None
+    """
+
+    with _pools_lock:
+        keys = [key for key in _pools if loop is None or key[0] is loop]
+        pools = [_pools.pop(key) for key in keys]
+
+    for pool in pools:
+        pool.close()
+
+
+def _loop_of(future):
+    """
+    :param future: a future
+    :type future: asyncio.Future
+    :returns: the event loop the future belongs to
+    :rtype: asyncio.AbstractEventLoop
+    """
+
+    get_loop = getattr(future, 'get_loop', None)
+    if get_loop is not None:
+        return get_loop()
+    return future._loop
+
+
+def _prepare(method, url, auth, kwargs):
+    """Prepares a request the way requests does for a session.
+
+    :param method: the HTTP method
+    :type method: str
+    :param url: the URL
+    :type url: str
+    :param auth: authentication
+    :type auth: AuthBase | None
+    :param kwargs: params, data, json, headers, files or cookies
+    :type kwargs: dict
+    :returns: the prepared request
+    :rtype: requests.PreparedRequest
+    """
+
+    headers = requests.utils.default_headers()
+    headers['Accept-Encoding'] = 'gzip, deflate'
+    headers.update(kwargs.pop('headers') or {})
+    return requests.Request(
+        method.upper(), url, headers=headers, auth=auth, **kwargs).prepare()
+
+
+def _send(loop, prepared, timeout, verify, settings, redirects):
+    """Sends a prepared request, following redirects.
+
+    :param loop: the event loop
+    :type loop: asyncio.AbstractEventLoop
+    :param prepared: the request
+    :type prepared: requests.PreparedRequest
+    :param timeout: the (connect, read) timeouts, or None
+    :type timeout: (float | None, float | None) | None
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str | None
+    :param settings: the pool size and whether to keep connections alive
+    :type settings: (int, bool)
+    :param redirects: the number of redirects left to follow
+    :type redirects: int
+    :returns: future of the response
+    :rtype: asyncio.Future
+    """
+
+    _check_proxy(prepared.url)
+    pool = _get_pool(loop, prepared.url, verify, settings)
+
+    def follow(response):
+        if (response.status_code not in REDIRECT_CODES or
+                'location' not in response.headers or
+                not redirects):
+            return response
+
+        redirect = _redirect(prepared, response)
+        logger.info('Following redirect to [%r]', redirect.url)
+        sent = _send(loop, redirect, timeout, verify, settings, redirects - 1)
+        return then(sent, partial(_add_history, response))
+
+    return then(pool.send(prepared, timeout), follow)
+
+
+def _check_proxy(url):
+    """Makes sure that a request can be sent without a proxy.
+
+    :param url: the URL of the request
+    :type url: str
+    :rtype: None
+    """
+
+    proxies = requests.utils.get_environ_proxies(url)
+    scheme = urllib.parse.urlparse(url).scheme
+    proxy = proxies.get(scheme) or proxies.get('all')
+    if proxy:
+        raise DCOSException(
+            'Unable to send request to [{}]: asynchronous requests do not '
+            'support proxies, but [{}] is configured for it'.format(
+                url, proxy))
+
+
+def _add_history(redirect_response, response):
+    """Records a redirect in the history of the response it led to, as
+    requests does.
+
+    :param redirect_response: the redirect response
+    :type redirect_response: requests.Response
+    :param response: the response to the redirected request
+    :type response: requests.Response
+    :returns: `response`
+    :rtype: requests.Response
+    """
+
+    response.history = [redirect_response] + response.history
+    return response
+
+
+def _redirect(prepared, response):
+    """
+    :param prepared: the request that was redirected
+    :type prepared: requests.PreparedRequest
+    :param response: the redirect response
+    :type response: requests.Response
+    :returns: the request to send to the new location
+    :rtype: requests.PreparedRequest
+    """
+
+    redirect = prepared.copy()
+    redirect.url = requests.utils.requote_uri(urllib.parse.urljoin(
+        prepared.url, response.headers['location']))
+
+    if ((response.status_code == 303 and prepared.method != 'HEAD') or
+            (response.status_code in (301, 302) and
+             prepared.method == 'POST')):
+        redirect.method = 'GET'
+        redirect.body = None
+        for name in ('Content-Length', 'Content-Type', 'Transfer-Encoding'):
+            redirect.headers.pop(name, None)
+
+    if urllib.parse.urlparse(redirect.url).netloc != \
+            urllib.parse.urlparse(prepared.url).netloc:
+        redirect.headers.pop('Authorization', None)
+
+    return redirect
+
+
+def _get_pool(loop, url, verify, settings):
+    """Returns the connection pool for requests to `url` from `loop`.
+
+    :param loop: the event loop
+    :type loop: asyncio.AbstractEventLoop
+    :param url: the target URL
+    :type url: str
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str | None
+    :param settings: the pool size and whether to keep connections alive
+    :type settings: (int, bool)
+    :returns: the pool
+    :rtype: _ConnectionPool
+    """
+
+    parsed_url = urllib.parse.urlparse(url)
+    key = (loop, parsed_url.scheme, parsed_url.netloc, verify, settings)
+
+    with _pools_lock:
+        for stale_key in [k for k in _pools if k[0].is_closed()]:
+            del _pools[stale_key]
+
+        pool = _pools.get(key)
+        if pool is None:
+            if parsed_url.scheme == 'https':
+                ssl_context = _ssl_context(verify)
+            elif parsed_url.scheme == 'http':
+                ssl_context = None
+            else:
+                raise DCOSException(
+                    'Unsupported URL scheme: [{}]'.format(url))
+
+            pool = _ConnectionPool(loop, parsed_url, ssl_context, *settings)
+            _pools[key] = pool
+
+        return pool
+
+
+def _ssl_context(verify):
+    """
+    :param verify: whether to verify SSL certs or path to cert(s); None
+                   verifies them, as in requests
+    :type verify: bool | str | None
+    :returns: the SSL context for connections
+    :rtype: ssl.SSLContext
+    """
+
+    if verify is False:
+        http.silence_requests_warnings()
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif verify is None or verify is True:
+        cafile = (os.environ.get('REQUESTS_CA_BUNDLE') or
+                  os.environ.get('CURL_CA_BUNDLE') or
+                  requests.certs.where())
+        context = ssl.create_default_context(cafile=cafile)
+    elif os.path.isdir(verify):
+        context = ssl.create_default_context(capath=verify)
+    else:
+        context = ssl.create_default_context(cafile=verify)
+    return context
+
+
+def _error(error, url):
+    """Translates a connection error to the exception `dcos.http` raises.
+
+    :param error: the error
+    :type error: Exception
+    :param url: the URL of the request
+    :type url: str
+    :returns: the exception to raise
+    :rtype: DCOSException
+    """
+
+    if isinstance(error, DCOSException):
+        return error
+    elif isinstance(error, _Timeout):
+        return DCOSException('Request to URL [{0}] timed out.'.format(url))
+    elif isinstance(error, (ssl.SSLError, ssl.CertificateError)):
+        logger.error('HTTP SSL Error: %s', error)
+        msg = ("An SSL error occurred. To configure your SSL settings, "
+               "please run: `dcos config set core.ssl_verify <value>`")
+        description = config.get_property_description("core", "ssl_verify")
+        if description is not None:
+            msg += "\n<value>: {}".format(description)
+        return DCOSException(msg)
+    elif isinstance(error, (OSError, EOFError)):
+        logger.error('HTTP Connection Error: %s', error)
+        return DCOSConnectionError(url)
+    else:
+        logger.error('HTTP Exception: %s', error)
+        return DCOSException('HTTP Exception: {}'.format(error))
+
+
+def _serialize(prepared, host, keep_alive):
+    """
+    :param prepared: the request
+    :type prepared: requests.PreparedRequest
+    :param host: the value of the Host header
+    :type host: str
+    :param keep_alive: whether to keep the connection open
+    :type keep_alive: bool
+    :returns: the request as sent on the connection
+    :rtype: bytes
+    """
+
+    body = prepared.body
+    if body is None:
+        body = b''
+    elif not isinstance(body, bytes):
+        if not isinstance(body, six.string_types):
+            raise DCOSException('Streamed request bodies are not supported')
+        body = body.encode('utf-8')
+
+    headers = CaseInsensitiveDict(prepared.headers)
+    headers.pop('Host', None)
+    if body or prepared.method in ('POST', 'PUT', 'PATCH'):
+        headers['Content-Length'] = str(len(body))
+    if not keep_alive:
+        headers['Connection'] = 'close'
+
+    lines = ['{} {} HTTP/1.1'.format(prepared.method, prepared.path_url),
+             'Host: {}'.format(host)]
+    lines.extend('{}: {}'.format(name, value)
+                 for name, value in headers.items())
+    head = '\r\n'.join(lines) + '\r\n\r\n'
+    return head.encode('latin-1') + body
+
+
+def _response(prepared, parser, elapsed):
+    """
+    :param prepared: the request
+    :type prepared: requests.PreparedRequest
+    :param parser: the parsed response
+    :type parser: _ResponseParser
+    :param elapsed: the number of seconds the request took
+    :type elapsed: float
+    :returns: the response
+    :rtype: requests.Response
+    """
+
+    response = requests.Response()
+    response.status_code = parser.status
+    response.reason = parser.reason
+    response.headers = parser.headers
+    response.url = prepared.url
+    response.request = prepared
+    response.encoding = requests.utils.get_encoding_from_headers(
+        parser.headers)
+    response.elapsed = datetime.timedelta(seconds=elapsed)
+    response._content = _decode(
+        bytes(parser.body), parser.headers.get('Content-Encoding', ''))
+    response._content_consumed = True
+    return response
+
+
+def _decode(body, content_encoding):
+    """
+    :param body: the response body
+    :type body: bytes
+    :param content_encoding: the Content-Encoding header
+    :type content_encoding: str
+    :returns: the decoded body
+    :rtype: bytes
+    """
+
+    encoding = content_encoding.strip().lower()
+    if not body or encoding not in ('gzip', 'deflate'):
+        return body
+
+    try:
+        if encoding == 'gzip':
+            return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    except zlib.error as e:
+        raise DCOSException(
+            'Unable to decode {} response body: {}'.format(encoding, e))
+
+
+class _Timeout(Exception):
+    """The server didn't respond in time."""
+
+
+class _ConnectionPool(object):
+    """Keep-alive connections to a host, used by one event loop. Requests
+    wait for a free connection once `size` connections are open.
+
+    :param loop: the event loop
+    :type loop: asyncio.AbstractEventLoop
+    :param parsed_url: the URL of the host
+    :type parsed_url: ParseResult
+    :param ssl_context: the SSL context for https, or None
+    :type ssl_context: ssl.SSLContext | None
+    :param size: maximum number of connections
+    :type size: int
+    :param keep_alive: whether to reuse connections
+    :type keep_alive: bool
+    """
+
+    def __init__(self, loop, parsed_url, ssl_context, size, keep_alive):
+        self._loop = loop
+        self._host = parsed_url.hostname
+        self._port = parsed_url.port or (443 if ssl_context else 80)
+        self._host_header = parsed_url.netloc.rpartition('@')[2]
+        self._ssl_context = ssl_context
+        self._size = size
+        self._keep_alive = keep_alive
+        self._connections = 0
+        self._idle = []
+        self._waiters = collections.deque()
+
+    def send(self, prepared, timeout):
+        """Sends a request on a free connection. If the connection turns out
+        to have been closed by the server while it was idle, the request is
+        sent again on another one.
+
+        :param prepared: the request
+        :type prepared: requests.PreparedRequest
+        :param timeout: the (connect, read) timeouts, or None
+        :type timeout: (float | None, float | None) | None
+        :returns: future of the response
+        :rtype: asyncio.Future
+        """
+
+        connect_timeout, read_timeout = timeout or (None, None)
+        data = _serialize(prepared, self._host_header, self._keep_alive)
+        result = self._loop.create_future()
+        started = time.time()
+        current = []
+
+        def attempt():
+            acquired = self._acquire(connect_timeout)
+            acquired.add_done_callback(on_acquired)
+
+        def on_acquired(acquired):
+            if acquired.exception() is not None:
+                if not result.done():
+                    result.set_exception(
+                        _error(acquired.exception(), prepared.url))
+                return
+
+            connection, reused = acquired.result()
+            if result.done():
+                self._release(connection, True)
+                return
+
+            current[:] = [connection]
+            response = connection.request(
+                data, prepared.method, read_timeout)
+            response.add_done_callback(
+                lambda response: on_response(connection, reused, response))
+
+        def on_response(connection, reused, response):
+            del current[:]
+            error = response.exception()
+            if error is not None:
+                self._release(connection, False)
+                if result.done():
+                    return
+                if reused and not connection.received:
+                    attempt()
+                else:
+                    result.set_exception(_error(error, prepared.url))
+                return
+
+            parser = response.result()
+            self._release(connection, parser.keep_alive)
+            if not result.done():
+                result.set_result(
+                    _response(prepared, parser, time.time() - started))
+
+        def on_done(result):
+            # a cancelled request leaves its connection in an unknown state
+            if result.cancelled() and current:
+                current[0].abort()
+
+        result.add_done_callback(on_done)
+        attempt()
+        return result
+
+    def close(self):
+        """Closes the idle connections, and the others once released.
+
+        :rtype: None
+        """
+
+        self._keep_alive = False
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _acquire(self, connect_timeout):
+        """
+        :param connect_timeout: seconds to wait for a new connection
+        :type connect_timeout: float | None
+        :returns: future of a free connection, and whether it was used
+                  before
+        :rtype: asyncio.Future
+        """
+
+        waiter = self._loop.create_future()
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.is_open():
+                waiter.set_result((connection, True))
+                return waiter
+            self._connections -= 1
+
+        if self._connections < self._size:
+            self._connect(waiter, connect_timeout)
+        else:
+            self._waiters.append((waiter, connect_timeout))
+        return waiter
+
+    def _connect(self, waiter, connect_timeout):
+        """Opens a new connection for a waiting request.
+
+        :param waiter: future of the connection
+        :type waiter: asyncio.Future
+        :param connect_timeout: seconds to wait for the connection
+        :type connect_timeout: float | None
+        :rtype: None
+        """
+
+        self._connections += 1
+        kwargs = {}
+        if self._ssl_context is not None:
+            kwargs = {'ssl': self._ssl_context,
+                      'server_hostname': self._host}
+        connecting = asyncio.ensure_future(self._loop.create_connection(
+            lambda: _HTTPConnection(self._loop),
+            self._host, self._port, **kwargs), loop=self._loop)
+
+        timer = None
+        if connect_timeout is not None:
+            timer = self._loop.call_later(connect_timeout, connecting.cancel)
+
+        def connected(connecting):
+            if timer is not None:
+                timer.cancel()
+
+            if connecting.cancelled():
+                error = _Timeout()
+            else:
+                error = connecting.exception()
+
+            if error is not None:
+                self._connections -= 1
+                if not waiter.done():
+                    waiter.set_exception(error)
+                self._wake()
+            elif waiter.done():
+                self._release(connecting.result()[1], True)
+            else:
+                waiter.set_result((connecting.result()[1], False))
+
+        connecting.add_done_callback(connected)
+
+    def _release(self, connection, reusable):
+        """Hands a connection that is done with a request to the next
+        waiting request, or keeps it for later, or closes it.
+
+        :param connection: the connection
+        :type connection: _HTTPConnection
+        :param reusable: whether the connection can be used again
+        :type reusable: bool
+        :rtype: None
+        """
+
+        if reusable and self._keep_alive and connection.is_open():
+            while self._waiters:
+                waiter, _ = self._waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result((connection, True))
+                    return
+            self._idle.append(connection)
+            return
+
+        connection.close()
+        self._connections -= 1
+        self._wake()
+
+    def _wake(self):
+        """Opens connections for waiting requests, up to the pool size.
+
+        :rtype: None
+        """
+
+        while self._waiters and self._connections < self._size:
+            waiter, connect_timeout = self._waiters.popleft()
+            if not waiter.done():
+                self._connect(waiter, connect_timeout)
+
+
+class _HTTPConnection(object):
+    """asyncio protocol for an HTTP/1.1 connection, which sends one request
+    at a time.
+
+    :param loop: the event loop
+    :type loop: asyncio.AbstractEventLoop
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._transport = None
+        self._closed = False
+        self._response = None
+        self._parser = None
+        self._read_timeout = None
+        self._timer = None
+        self.received = False
+
+    def request(self, data, method, read_timeout):
+        """Sends a request.
+
+        :param data: the serialized request
+        :type data: bytes
+        :param method: the request's method
+        :type method: str
+        :param read_timeout: seconds to wait for data from the server
+        :type read_timeout: float | None
+        :returns: future of the parsed response
+        :rtype: asyncio.Future
+        """
+
+        self._response = self._loop.create_future()
+        self._parser = _ResponseParser(method)
+        self._read_timeout = read_timeout
+        self.received = False
+        self._transport.write(data)
+        self._reset_timer()
+        return self._response
+
+    def is_open(self):
+        """
+        :returns: whether the connection can send requests
+        :rtype: bool
+        """
+
+        return not self._closed and not self._transport.is_closing()
+
+    def close(self):
+        """
+        :rtype: None
+        """
+
+        if self._transport is not None:
+            self._transport.close()
+
+    def abort(self):
+        """Closes the connection without waiting to send buffered data.
+
+        :rtype: None
+        """
+
+        if self._transport is not None:
+            self._transport.abort()
+
+    def connection_made(self, transport):
+        self._transport = transport
+
+    def data_received(self, data):
+        if self._response is None or self._response.done():
+            # the server shouldn't send anything between responses
+            self.abort()
+            return
+
+        self.received = True
+        self._reset_timer()
+        try:
+            self._parser.feed(data)
+        except DCOSException as e:
+            self._fail(e)
+            self.abort()
+            return
+
+        if self._parser.done:
+            self._finish()
+
+    def eof_received(self):
+        return False
+
+    def connection_lost(self, exc):
+        self._closed = True
+        if self._response is None or self._response.done():
+            return
+
+        if self._parser.eof():
+            self._finish()
+        else:
+            self._fail(exc or EOFError(
+                'Connection closed before the response was complete'))
+
+    def _finish(self):
+        self._cancel_timer()
+        self._response.set_result(self._parser)
+        if not self._parser.keep_alive:
+            self.close()
+
+    def _fail(self, error):
+        self._cancel_timer()
+        if not self._response.done():
+            self._response.set_exception(error)
+
+    def _timed_out(self):
+        self._timer = None
+        self._fail(_Timeout())
+        self.abort()
+
+    def _reset_timer(self):
+        self._cancel_timer()
+        if self._read_timeout is not None:
+            self._timer = self._loop.call_later(
+                self._read_timeout, self._timed_out)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+class _ResponseParser(object):
+    """Incremental parser for an HTTP/1.x response.
+
+    :param method: the request's method
+    :type method: str
+    """
+
+    def __init__(self, method):
+        self._head_only = method == 'HEAD'
+        self._buffer = bytearray()
+        self._state = self._parse_head
+        self._remaining = 0
+        self.done = False
+        self.status = None
+        self.reason = None
+        self.headers = None
+        self.keep_alive = False
+        self.body = bytearray()
+
+    def feed(self, data):
+        """Parses data received from the server.
+
+        :param data: the data
+        :type data: bytes
+        :rtype: None
+        """
+
+        self._buffer.extend(data)
+        while not self.done and self._state():
+            pass
+
+    def eof(self):
+        """Handles the server closing the connection.
+
+        :returns: whether the response is complete
+        :rtype: bool
+        """
+
+        if self._state == self._parse_until_close:
+            self._parse_until_close()
+            self.done = True
+        return self.done
+
+    def _parse_head(self):
+        end = self._buffer.find(b'\r\n\r\n')
+        if end < 0:
+            if len(self._buffer) > MAX_HEADER_SIZE:
+                raise DCOSException('Response headers are too large')
+            return False
+
+        lines = bytes(self._buffer[:end]).decode('latin-1').split('\r\n')
+        del self._buffer[:end + 4]
+
+        try:
+            version, status, reason = (lines[0].split(None, 2) + [''])[:3]
+            status = int(status)
+        except ValueError:
+            raise DCOSException(
+                'Invalid HTTP status line: {!r}'.format(lines[0]))
+
+        if 100 <= status < 200:
+            # skip interim responses
+            return True
+
+        headers = CaseInsensitiveDict()
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            name, value = name.strip(), value.strip()
+            if name in headers:
+                headers[name] += ', ' + value
+            else:
+                headers[name] = value
+
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        connection = headers.get('Connection', '').lower()
+        if version == 'HTTP/1.1':
+            self.keep_alive = 'close' not in connection
+        else:
+            self.keep_alive = 'keep-alive' in connection
+
+        if self._head_only or status in (204, 304):
+            self.done = True
+        elif 'chunked' in headers.get('Transfer-Encoding', '').lower():
+            self._state = self._parse_chunk_size
+        elif 'Content-Length' in headers:
+            self._remaining = int(headers['Content-Length'])
+            self._state = self._parse_body
+            self.done = self._remaining == 0
+        else:
+            self.keep_alive = False
+            self._state = self._parse_until_close
+        return True
+
+    def _parse_body(self):
+        if not self._buffer:
+            return False
+
+        length = min(self._remaining, len(self._buffer))
+        self.body.extend(self._buffer[:length])
+        del self._buffer[:length]
+        self._remaining -= length
+        self.done = self._remaining == 0
+        return True
+
+    def _parse_chunk_size(self):
+        end = self._buffer.find(b'\r\n')
+        if end < 0:
+            return False
+
+        size = bytes(self._buffer[:end]).split(b';')[0].strip()
+        del self._buffer[:end + 2]
+        try:
+            self._remaining = int(size, 16)
+        except ValueError:
+            raise DCOSException('Invalid chunk size: {!r}'.format(size))
+
+        if self._remaining == 0:
+            self._state = self._parse_trailer
+        else:
+            self._state = self._parse_chunk
+        return True
+
+    def _parse_chunk(self):
+        if not self._buffer:
+            return False
+
+        length = min(self._remaining, len(self._buffer))
+        self.body.extend(self._buffer[:length])
+        del self._buffer[:length]
+        self._remaining -= length
+        if self._remaining == 0:
+            self._state = self._parse_chunk_end
+        return True
+
+    def _parse_chunk_end(self):
+        if len(self._buffer) < 2:
+            return False
+
+        del self._buffer[:2]
+        self._state = self._parse_chunk_size
+        return True
+
+    def _parse_trailer(self):
+        end = self._buffer.find(b'\r\n')
+        if end < 0:
+            return False
+
+        del self._buffer[:end + 2]
+        self.done = end == 0
+        return True
+
+    def _parse_until_close(self):
+        self.body.extend(self._buffer)
+        del self._buffer[:]
+        return False
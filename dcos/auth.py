@@ -360,7 +360,7 @@ def get_providers(dcos_url=None):
     url = urllib.parse.urljoin(dcos_url, endpoint)
 
     try:
-        providers = http.get(url, verify=verify)
+        providers = http.get(url, verify=verify, cache=True)
         return providers.json()
     # this endpoint should only have authentication in DC/OS 1.8
     except DCOSAuthenticationException:
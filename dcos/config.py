@@ -11,6 +11,44 @@ from dcos.errors import DCOSException
 
 logger = util.get_logger(__name__)
 
+_config_cache = {}
+"""Parsed config files, keyed by path. Each value is a (stat key, dict) tuple
+where the stat key identifies the version of the file that was parsed."""
+
+_attached_cluster_cache = {}
+"""The last resolved attached cluster path, along with the state of the
+clusters directory it was resolved from."""
+
+
+def _stat_key(path):
+    """Returns a key identifying the current version of the file at `path`.
+
+    :param path: path to the file
+    :type path: str
+    :returns: (mtime, size, inode, mode) of the file or None if it doesn't
+              exist
+    :rtype: tuple | None
+    """
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    mtime = getattr(st, 'st_mtime_ns', st.st_mtime)
+    return (mtime, st.st_size, st.st_ino, st.st_mode)
+
+
+def invalidate_cache():
+    """Drops all cached config files and the cached attached cluster path.
+    Subsequent reads go to disk.
+
+    :rtype: None
+    """
+
+    _config_cache.clear()
+    _attached_cluster_cache.clear()
+
 
 def uses_deprecated_config():
     """Returns True if the configuration for the user's CLI
@@ -56,36 +94,49 @@ def get_attached_cluster_path():
     """
 
     path = get_clusters_path()
-    if not os.path.exists(path):
+    clusters_key = _stat_key(path)
+    if clusters_key is None:
         return None
 
-    attached = None
-    clusters = os.listdir(get_clusters_path())
     cluster_envvar = os.environ.get(constants.DCOS_CLUSTER)
+    cache_key = (path, clusters_key, cluster_envvar)
+
+    # The cached path stays valid as long as no cluster was added or removed
+    # and the attached file wasn't moved to another cluster.
+    cached = _attached_cluster_cache.get('path')
+    if _attached_cluster_cache.get('key') == cache_key and \
+            os.path.exists(os.path.join(
+                cached, constants.DCOS_CLUSTER_ATTACHED_FILE)):
+        return cached
+
+    attached = None
+    clusters = os.listdir(path)
 
     for c in clusters:
         cluster_path = os.path.join(path, c)
-        name = get_config_val("cluster.name",
-                              load_from_path(
-                                  os.path.join(cluster_path, "dcos.toml")))
-        if cluster_envvar is not None \
-           and (cluster_envvar == c or cluster_envvar == name):
-            return cluster_path
+        if cluster_envvar is not None:
+            if cluster_envvar == c:
+                return cluster_path
+            name = get_config_val("cluster.name",
+                                  load_from_path(
+                                      os.path.join(cluster_path, "dcos.toml")))
+            if cluster_envvar == name:
+                return cluster_path
         if os.path.exists(os.path.join(
                 cluster_path, constants.DCOS_CLUSTER_ATTACHED_FILE)):
             attached = cluster_path
 
-    if attached is not None:
-        return attached
-
     # if only one cluster, set as attached
-    if len(clusters) == 1:
-        cluster_path = os.path.join(path, clusters[0])
+    if attached is None and len(clusters) == 1:
+        attached = os.path.join(path, clusters[0])
         util.ensure_file_exists(os.path.join(
-            cluster_path, constants.DCOS_CLUSTER_ATTACHED_FILE))
-        return cluster_path
+            attached, constants.DCOS_CLUSTER_ATTACHED_FILE))
 
-    return None
+    if attached is not None:
+        _attached_cluster_cache['key'] = cache_key
+        _attached_cluster_cache['path'] = attached
+
+    return attached
 
 
 def get_clusters_path():
@@ -97,6 +148,32 @@ def get_clusters_path():
     return os.path.join(get_config_dir_path(), constants.DCOS_CLUSTERS_SUBDIR)
 
 
+def get_cluster_cache_path(toml_config=None):
+    """Returns the directory for data cached about the attached cluster,
+    $DCOS_DIR/clusters/CLUSTER_ID/cache.
+
+    :param toml_config: config the cached data is fetched with; there is no
+                        cache directory for it unless it points at the
+                        attached cluster
+    :type toml_config: Toml | None
+    :returns: path to the cache directory, or None if no cluster is attached
+    :rtype: str | None
+    """
+
+    cluster_path = get_attached_cluster_path()
+    if cluster_path is None:
+        return None
+
+    if toml_config is not None:
+        attached_config = load_from_path(
+            os.path.join(cluster_path, "dcos.toml"))
+        if get_config_val("core.dcos_url", toml_config) != \
+                get_config_val("core.dcos_url", attached_config):
+            return None
+
+    return os.path.join(cluster_path, constants.DCOS_CLUSTER_CACHE_SUBDIR)
+
+
 def get_config_path():
     """Returns the path to the DCOS config file of the attached cluster.
     If still using "global" config return that toml instead
@@ -287,7 +364,8 @@ def set_val(name, value, config_path=None):
 
 
 def load_from_path(path, mutable=False):
-    """Loads a TOML file from the path
+    """Loads a TOML file from the path. The parsed file is cached in memory
+    until the file changes on disk.
 
     :param path: Path to the TOML file
     :type path: str
@@ -297,16 +375,26 @@ def load_from_path(path, mutable=False):
     :rtype: Toml | MutableToml
     """
 
-    util.ensure_dir_exists(os.path.dirname(path))
-    util.ensure_file_exists(path)
-    util.enforce_file_permissions(path)
-    with util.open_file(path, 'r') as config_file:
-        try:
-            toml_obj = toml.loads(config_file.read())
-        except Exception as e:
-            raise DCOSException(
-                'Error parsing config file at [{}]: {}'.format(path, e))
-        return (MutableToml if mutable else Toml)(toml_obj)
+    key = _stat_key(path)
+    cached = _config_cache.get(path)
+    if key is None or cached is None or cached[0] != key:
+        util.ensure_dir_exists(os.path.dirname(path))
+        util.ensure_file_exists(path)
+        util.enforce_file_permissions(path)
+        key = _stat_key(path)
+        with util.open_file(path, 'r') as config_file:
+            try:
+                toml_obj = toml.loads(config_file.read())
+            except Exception as e:
+                raise DCOSException(
+                    'Error parsing config file at [{}]: {}'.format(path, e))
+        _config_cache[path] = (key, toml_obj)
+    else:
+        toml_obj = cached[1]
+
+    if mutable:
+        return MutableToml(copy.deepcopy(toml_obj))
+    return Toml(toml_obj)
 
 
 def save(toml_config, config_path=None):
@@ -326,6 +414,8 @@ def save(toml_config, config_path=None):
     with util.open_file(config_path, 'w') as config_file:
         config_file.write(serial)
 
+    invalidate_cache()
+
 
 def _get_path(toml_config, path):
     """
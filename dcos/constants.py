@@ -15,6 +15,10 @@ or id."""
 DCOS_CLUSTER_ATTACHED_FILE = "attached"
 """Name of the file indicating the current attached cluster."""
 
+DCOS_CLUSTER_CACHE_SUBDIR = "cache"
+"""Name of the subdirectory of a cluster's directory that contains data
+cached about the cluster."""
+
 DCOS_SUBCOMMAND_ENV_SUBDIR = 'env'
 """In a package's directory, this is the cli contents subdirectory."""
 
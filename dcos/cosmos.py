@@ -1,3 +1,8 @@
+import json
+import os
+import threading
+import time
+
 from six.moves import urllib
 
 from dcos import config, http, util
@@ -9,6 +14,22 @@ from dcos.errors import (DCOSAuthenticationException,
 
 logger = util.get_logger(__name__)
 
+DEFAULT_PROBE_TTL = 3600
+"""The default number of seconds for which the capabilities of Cosmos and the
+media type versions negotiated with it are reused, it can be overriden
+through the `package.probe_ttl` config."""
+
+PROBES_FILE = 'cosmos.json'
+"""Name of the file in a cluster's cache directory holding what was probed
+about its Cosmos."""
+
+_probes = {}
+"""What was probed about each Cosmos, keyed by its URL. Each value maps a
+probe name to an [expiration time, result] pair."""
+
+_probes_lock = threading.Lock()
+_probes_loaded = False
+
 
 class Cosmos(object):
     """
@@ -75,8 +96,7 @@ class Cosmos(object):
         :rtype: bool
         """
         try:
-            response = self.call_endpoint(
-                'capabilities')
+            return self.capabilities() is not None
         # return `Authentication failed` error messages
         except DCOSAuthenticationException:
             raise
@@ -84,15 +104,34 @@ class Cosmos(object):
         # authorized for the command specified, not this endpoint
         except DCOSAuthorizationException:
             return True
-        # allow exception through so we can show user actual http exception
-        # except 404, because then the url is fine, just not cosmos enabled
-        except DCOSHTTPException as e:
-            logger.exception(e)
-            return e.status() != 404
         except Exception as e:
             logger.exception(e)
             return True
-        return response.status_code == 200
+
+    def capabilities(self):
+        """
+        Returns the capabilities of cosmos. They are requested at most once
+        per `package.probe_ttl` seconds for each cosmos, and shared with
+        later commands through the attached cluster's cache directory.
+
+        :return: the capabilities response, or None if cosmos isn't
+        enabled on the cluster
+        :rtype: dict | None
+        """
+        found, capabilities = get_probe(self.cosmos_url, 'capabilities')
+        if found:
+            return capabilities
+
+        try:
+            capabilities = self.call_endpoint('capabilities').json()
+        # a 404 means the url is fine, just not cosmos enabled
+        except DCOSHTTPException as e:
+            if e.status() != 404:
+                raise
+            capabilities = None
+
+        set_probe(self.cosmos_url, 'capabilities', capabilities)
+        return capabilities
 
     def call_endpoint(self,
                       endpoint,
@@ -121,12 +160,22 @@ class Cosmos(object):
         """
         url = self._get_endpoint_url(endpoint)
         request_versions = self._get_request_version_preferences(endpoint)
+
+        # start from the version cosmos accepted last time, rather than
+        # being refused the more recent ones again
+        probe = 'version:' + endpoint
+        if len(request_versions) > 1:
+            found, version = get_probe(self.cosmos_url, probe)
+            if found and version in request_versions:
+                request_versions = request_versions[
+                    request_versions.index(version):]
+
         headers_preference = list(map(
             lambda version: self._get_header(
                 endpoint, version, headers),
             request_versions))
         http_request_type = self._get_http_method(endpoint)
-        return self._cosmos_request(
+        response = self._cosmos_request(
             url,
             http_request_type,
             headers_preference,
@@ -134,6 +183,14 @@ class Cosmos(object):
             json,
             **kwargs)
 
+        if len(request_versions) > 1:
+            content_type = response.headers.get('Content-Type', '')
+            for version in request_versions:
+                if self._get_accept(endpoint, version) in content_type:
+                    set_probe(self.cosmos_url, probe, version)
+                    break
+        return response
+
     def _cosmos_request(self,
                         url,
                         http_request_type,
@@ -351,6 +408,109 @@ def get_cosmos_url():
     return cosmos_url
 
 
+def invalidate_cache():
+    """Forgets what was probed about all cosmos instances, in memory and in
+    the attached cluster's cache directory.
+
+    :rtype: None
+    """
+
+    global _probes_loaded
+
+    with _probes_lock:
+        _probes.clear()
+        _probes_loaded = False
+
+        path = _probes_path()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+
+def _probes_path():
+    """
+    :returns: path of the file holding the probes of the attached
+    cluster, or None if no cluster is attached
+    :rtype: str | None
+    """
+    cache_path = config.get_cluster_cache_path()
+    if cache_path is None:
+        return None
+    return os.path.join(cache_path, PROBES_FILE)
+
+
+def get_probe(cosmos_url, name):
+    """
+    Looks up the unexpired result of probing cosmos.
+
+    :param cosmos_url: the url of cosmos
+    :type cosmos_url: str
+    :param name: the name of the probe
+    :type name: str
+    :return: whether there is a result, and the result
+    :rtype: (bool, object)
+    """
+    global _probes_loaded
+
+    with _probes_lock:
+        if not _probes_loaded:
+            _probes.update(_read_probes())
+            _probes_loaded = True
+
+        expires, result = _probes.get(cosmos_url, {}).get(name, (0, None))
+        if expires > time.time():
+            return True, result
+        return False, None
+
+
+def set_probe(cosmos_url, name, result):
+    """
+    Records the result of probing cosmos, for `package.probe_ttl` seconds.
+
+    :param cosmos_url: the url of cosmos
+    :type cosmos_url: str
+    :param name: the name of the probe
+    :type name: str
+    :param result: the result, which must be serializable to JSON
+    :type result: object
+    :rtype: None
+    """
+    ttl = config.get_config_val('package.probe_ttl')
+    ttl = DEFAULT_PROBE_TTL if ttl is None else util.parse_int(ttl)
+
+    with _probes_lock:
+        probes = _read_probes()
+        probes.setdefault(cosmos_url, {})[name] = [time.time() + ttl, result]
+        _probes.setdefault(cosmos_url, {}).update(probes[cosmos_url])
+
+        path = _probes_path()
+        if path is None:
+            return
+        try:
+            util.ensure_dir_exists(os.path.dirname(path))
+            util.write_file_atomically(
+                path, json.dumps(probes).encode('utf-8'))
+        except (DCOSException, IOError, OSError) as e:
+            logger.warning('Unable to store cosmos probes: %s', e)
+
+
+def _read_probes():
+    """
+    :return: the probes stored in the attached cluster's cache directory
+    :rtype: dict
+    """
+    path = _probes_path()
+    if path is None:
+        return {}
+
+    try:
+        with open(path) as probes_file:
+            probes = json.load(probes_file)
+    except (IOError, OSError, ValueError):
+        return {}
+
+    return probes if isinstance(probes, dict) else {}
+
+
 def _merge_dict(a, b):
     """
     Given two dicts, merge them into a new dict as a
@@ -1,8 +1,16 @@
+import hashlib
+import os
+import threading
+import time
+
 import requests
 
+from requests.adapters import HTTPAdapter
 from requests.auth import AuthBase
+from requests.structures import CaseInsensitiveDict
+from six.moves.http_cookiejar import DefaultCookiePolicy
 
-from dcos import config, util
+from dcos import config, httpcache, util
 from dcos.errors import (DCOSAuthenticationException,
                          DCOSAuthorizationException, DCOSBadRequest,
                          DCOSConnectionError, DCOSException, DCOSHTTPException,
@@ -25,6 +33,22 @@ DEFAULT_CONNECT_TIMEOUT = 5
 DEFAULT_TIMEOUT = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
 """The default timeout tuple for connection and read."""
 
+DEFAULT_POOL_SIZE = util.STREAM_CONCURRENCY
+"""The default number of connections kept open per host by a pooled session,
+it can be overriden through the `core.http_pool_size` config. It matches the
+number of threads used by `util.stream` so that fanned out requests do not
+have to wait for a free connection."""
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_sessions_pid = os.getpid()
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+_caches = {}
+_caches_lock = threading.Lock()
+
 
 def _default_is_success(status_code):
     """Returns true if the success status is between [200, 300).
@@ -99,6 +123,201 @@ def _verify_ssl(url, verify=None, toml_config=None):
     return verify
 
 
+def _keep_alive(toml_config):
+    """Returns whether HTTP connections should be kept alive and reused
+    across requests, based on the `core.http_keep_alive` config.
+
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :returns: True if connections should be reused; False otherwise
+    :rtype: bool
+    """
+
+    keep_alive = config.get_config_val("core.http_keep_alive", toml_config)
+    if keep_alive is False or str(keep_alive).lower() == "false":
+        return False
+    return True
+
+
+def _pool_size(toml_config):
+    """Returns the number of connections to keep open per host.
+
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :returns: the connection pool size
+    :rtype: int
+    """
+
+    pool_size = config.get_config_val("core.http_pool_size", toml_config)
+    if pool_size is None:
+        return DEFAULT_POOL_SIZE
+    return util.parse_int(pool_size)
+
+
+def _create_session(pool_size):
+    """Creates a requests session with a connection pool of `pool_size`
+    connections per host.
+
+    Cookies set by the server are never stored in the session, so that each
+    request behaves as if it was sent with `requests.request`.
+
+    :param pool_size: number of connections to keep open per host
+    :type pool_size: int
+    :returns: the new session
+    :rtype: requests.Session
+    """
+
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(url, verify=None, toml_config=None):
+    """Returns the pooled session used for requests to `url`. Sessions are
+    shared per scheme, host and SSL verification setting, so that connections
+    to the same cluster are kept alive and reused across requests.
+
+    :param url: the target URL
+    :type url: str
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str | None
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :returns: the session for `url`
+    :rtype: requests.Session
+    """
+
+    global _sessions_pid
+
+    parsed_url = urlparse(url)
+    key = (parsed_url.scheme, parsed_url.netloc, verify)
+
+    with _sessions_lock:
+        # Connections inherited from a parent process can't be shared with
+        # it, forget about them and start with a fresh pool.
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+
+        session = _sessions.get(key)
+        if session is None:
+            if toml_config is None:
+                toml_config = config.get_config()
+
+            session = _create_session(_pool_size(toml_config))
+            _sessions[key] = session
+
+        return session
+
+
+def close_sessions():
+    """Closes all pooled sessions and their connections. Subsequent requests
+    will open new connections.
+
+    :rtype: None
+    """
+
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+
+    for session in sessions:
+        session.close()
+
+
+def reset_sessions():
+    """Forgets all pooled sessions without closing their connections. This is
+    meant to be called in a forked worker, whose inherited connections are
+    still in use by the parent process.
+
+    :rtype: None
+    """
+
+    global _sessions_pid
+
+    with _sessions_lock:
+        _sessions.clear()
+        _sessions_pid = os.getpid()
+
+
+def _timeout(timeout, toml_config=None):
+    """Returns the (connect timeout, read timeout) tuple for a request.
+
+    :param timeout: the timeout passed to `request`, see there
+    :type timeout: int | float | None | bool |
+                   (int | float | None, int | float | None)
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :returns: the timeout tuple, or None for no timeout
+    :rtype: (int | float | None, int | float | None) | None
+    """
+
+    if timeout is True:
+        if toml_config is None:
+            toml_config = config.get_config()
+
+        timeout = config.get_config_val("core.timeout", toml_config)
+        timeout = (DEFAULT_CONNECT_TIMEOUT, timeout or DEFAULT_READ_TIMEOUT)
+    elif type(timeout) in (float, int):
+        timeout = (DEFAULT_CONNECT_TIMEOUT, timeout)
+
+    return timeout
+
+
+def _auth(url, toml_config):
+    """Returns the authentication for a request, and the token it uses.
+
+    :param url: the target URL
+    :type url: str
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :returns: the authentication, or None if the request isn't to the
+              DC/OS cluster, and the configured token
+    :rtype: (DCOSAcsAuth | None, str | None)
+    """
+
+    auth_token = config.get_config_val("core.dcos_acs_token", toml_config)
+
+    # only request with DC/OS Auth if request is to DC/OS cluster
+    if auth_token and _is_request_to_dcos(url, toml_config=toml_config):
+        auth = DCOSAcsAuth(auth_token)
+    else:
+        auth = None
+
+    return auth, auth_token
+
+
+def _raise_for_status(response, auth_token):
+    """Raises the exception for a response with an unsuccessful status.
+
+    :param response: the response
+    :type response: Response
+    :param auth_token: the token the request was sent with, if any
+    :type auth_token: str | None
+    :rtype: None
+    """
+
+    if response.status_code == 401:
+        if auth_token is not None:
+            msg = ("Your core.dcos_acs_token is invalid. "
+                   "Please run: `dcos auth login`")
+            raise DCOSAuthenticationException(response, msg)
+        else:
+            raise DCOSAuthenticationException(response)
+    elif response.status_code == 422:
+        raise DCOSUnprocessableException(response)
+    elif response.status_code == 403:
+        raise DCOSAuthorizationException(response)
+    elif response.status_code == 400:
+        raise DCOSBadRequest(response)
+    else:
+        raise DCOSHTTPException(response)
+
+
 @util.duration
 def _request(method,
              url,
@@ -137,14 +356,7 @@ def _request(method,
     :rtype: Response
     """
 
-    if timeout is True:
-        if toml_config is None:
-            toml_config = config.get_config()
-
-        timeout = config.get_config_val("core.timeout", toml_config)
-        timeout = (DEFAULT_CONNECT_TIMEOUT, timeout or DEFAULT_READ_TIMEOUT)
-    elif type(timeout) in (float, int):
-        timeout = (DEFAULT_CONNECT_TIMEOUT, timeout)
+    timeout = _timeout(timeout, toml_config)
 
     if 'headers' not in kwargs:
         kwargs['headers'] = {'Accept': 'application/json'}
@@ -161,8 +373,16 @@ def _request(method,
         url,
         kwargs.get('headers'))
 
+    if toml_config is None:
+        toml_config = config.get_config()
+
+    if _keep_alive(toml_config):
+        send = get_session(url, verify, toml_config).request
+    else:
+        send = requests.request
+
     try:
-        response = requests.request(
+        response = send(
             method=method,
             url=url,
             timeout=timeout,
@@ -194,12 +414,216 @@ def _request(method,
     return response
 
 
+class _Flight(object):
+    """A request whose response is shared by the callers that coalesce on
+    it, see `_coalesce`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+        self.expires = None
+
+    def expired(self, now):
+        """
+        :param now: the current time
+        :type now: float
+        :returns: whether the flight completed and its response can no
+                  longer be reused
+        :rtype: bool
+        """
+
+        return self.expires is not None and self.expires <= now
+
+
+def _coalesce_key(url, is_success, verify, timeout, auth_token, kwargs):
+    """Returns the key identifying equivalent GET requests.
+
+    :param url: the target URL
+    :type url: str
+    :param is_success: Defines successful status codes for the request
+    :type is_success: Function from int to bool
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str | None
+    :param timeout: the timeout passed to `request`
+    :type timeout: object
+    :param auth_token: the token the request is sent with, if any
+    :type auth_token: str | None
+    :param kwargs: the other arguments to requests.request
+    :type kwargs: dict
+    :returns: the key
+    :rtype: tuple
+    """
+
+    kwargs = dict(kwargs)
+    url = requests.Request(
+        'GET', url, params=kwargs.pop('params', None)).prepare().url
+    headers = kwargs.pop('headers', None)
+    if headers is None:
+        headers = {'Accept': 'application/json'}
+    headers = tuple(sorted(
+        (name.lower(), value) for name, value in headers.items()))
+
+    return (url, headers, is_success, verify, repr(timeout), auth_token,
+            repr(sorted(kwargs.items())))
+
+
+def _coalesce(key, ttl, send):
+    """Sends a request unless an equivalent one is in flight, or completed
+    less than `ttl` seconds ago, in which case its response or error is
+    returned instead.
+
+    :param key: identifies equivalent requests
+    :type key: tuple
+    :param ttl: number of seconds for which a response is reused after it
+                is received
+    :type ttl: int | float
+    :param send: sends the request
+    :type send: () -> Response
+    :rtype: Response
+    """
+
+    with _flights_lock:
+        now = time.time()
+        for expired in [k for k, f in _flights.items() if f.expired(now)]:
+            del _flights[expired]
+
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            _flights[key] = flight
+
+    if leader:
+        try:
+            flight.response = send()
+        except Exception as e:
+            flight.error = e
+        finally:
+            with _flights_lock:
+                if ttl and flight.error is None:
+                    flight.expires = time.time() + ttl
+                elif _flights.get(key) is flight:
+                    del _flights[key]
+            flight.done.set()
+    else:
+        logger.info('Coalescing HTTP GET to [%r]', key[0])
+        flight.done.wait()
+
+    if flight.error is not None:
+        raise flight.error
+    return flight.response
+
+
+def get_cache(toml_config=None):
+    """Returns the cache of response bodies used by requests sent with
+    `cache=True`. Its size is set by the `core.http_cache_size` config, in MB,
+    and if `core.http_cache_persist` is true and `toml_config` is the attached
+    cluster's, its entries are also stored in the cluster's cache directory.
+
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :returns: the cache
+    :rtype: httpcache.HTTPCache
+    """
+
+    if toml_config is None:
+        toml_config = config.get_config()
+
+    max_size = config.get_config_val("core.http_cache_size", toml_config)
+    if max_size is None:
+        max_size = httpcache.DEFAULT_MAX_SIZE
+    else:
+        max_size = util.parse_int(max_size) * 1024 * 1024
+
+    path = None
+    persist = config.get_config_val("core.http_cache_persist", toml_config)
+    if persist is True or str(persist).lower() == "true":
+        cache_path = config.get_cluster_cache_path(toml_config)
+        if cache_path is not None:
+            path = os.path.join(cache_path, 'http')
+
+    with _caches_lock:
+        cache = _caches.get((max_size, path))
+        if cache is None:
+            cache = httpcache.HTTPCache(max_size, path)
+            _caches[(max_size, path)] = cache
+        return cache
+
+
+def _cached_get(url, is_success, timeout, verify, toml_config, kwargs):
+    """Sends a GET request through the response cache: a fresh cached body is
+    returned without contacting the server, and a stale one is revalidated
+    with a conditional request.
+
+    :param url: URL for the new Request object
+    :type url: str
+    :param is_success: Defines successful status codes for the request
+    :type is_success: Function from int to bool
+    :param timeout: the timeout passed to `request`
+    :type timeout: object
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str
+    :param toml_config: cluster config to use
+    :type toml_config: Toml
+    :param kwargs: Additional arguments to requests.request
+    :type kwargs: dict
+    :rtype: Response
+    """
+
+    cache = get_cache(toml_config)
+    headers = CaseInsensitiveDict(
+        kwargs.pop('headers', {'Accept': 'application/json'}))
+    full_url = requests.Request(
+        'GET', url, params=kwargs.get('params')).prepare().url
+
+    # the cluster filters responses by the user's permissions, so a body is
+    # only reused with the token it was fetched with. Only a digest of the
+    # token is kept, as entries may be stored in the cluster's directory
+    auth, auth_token = _auth(url, toml_config)
+    identity = None
+    if auth is not None:
+        identity = hashlib.sha256(auth_token.encode('utf-8')).hexdigest()
+    key = ('GET', full_url, headers.get('Accept'), identity)
+
+    entry = cache.get(key)
+    if entry is not None:
+        if entry.is_fresh() and \
+                'no-cache' not in httpcache.cache_control(headers):
+            logger.info('Using cached HTTP response for [%r]', full_url)
+            return entry.response()
+        headers.update(entry.validators())
+
+    def is_success_or_not_modified(status_code):
+        return is_success(status_code) or \
+            (entry is not None and status_code == 304)
+
+    response = request('get', url, is_success_or_not_modified, timeout,
+                       verify, toml_config, headers=dict(headers), **kwargs)
+
+    if entry is not None and response.status_code == 304:
+        entry = entry.revalidated(response)
+        cache.put(key, entry)
+        return entry.response()
+
+    if response.status_code == 200:
+        entry = httpcache.Entry.from_response(response)
+        if entry is None:
+            cache.remove(key)
+        else:
+            cache.put(key, entry)
+
+    return response
+
+
 def request(method,
             url,
             is_success=_default_is_success,
             timeout=True,
             verify=None,
             toml_config=None,
+            coalesce=False,
+            cache=False,
             **kwargs):
     """Sends an HTTP request. If the server responds with a 401, ask the
     user for their credentials, and try request again (up to 3 times).
@@ -223,6 +647,19 @@ def request(method,
     :type verify: bool | str
     :param toml_config: cluster config to use
     :type toml_config: Toml
+    :param coalesce: whether a GET request shares the response of an
+                     identical request in flight in another thread, rather
+                     than being sent again. If a number, the response is
+                     also reused for that many seconds after it is
+                     received. Streamed requests are never coalesced.
+    :type coalesce: bool | int | float
+    :param cache: whether a GET request goes through the response cache,
+                  see `get_cache`. The body of a successful response is
+                  stored with its `ETag` and `Last-Modified` headers, reused
+                  as long as its `Cache-Control: max-age` allows, and then
+                  revalidated with a conditional request. Streamed requests
+                  are never cached.
+    :type cache: bool
     :param kwargs: Additional arguments to requests.request
         (see http://docs.python-requests.org/en/latest/api/#requests.request)
     :type kwargs: dict
@@ -232,15 +669,23 @@ def request(method,
     if toml_config is None:
         toml_config = config.get_config()
 
-    auth_token = config.get_config_val("core.dcos_acs_token", toml_config)
+    if (coalesce and method.lower() == 'get' and
+            not kwargs.get('stream', False)):
+        ttl = 0 if coalesce is True else coalesce
+        auth_token = _auth(url, toml_config)[1]
+        key = _coalesce_key(
+            url, is_success, verify, timeout, auth_token, kwargs)
+        return _coalesce(key, ttl, lambda: request(
+            method, url, is_success, timeout, verify, toml_config,
+            cache=cache, **kwargs))
+
+    if cache and method.lower() == 'get' and not kwargs.get('stream', False):
+        return _cached_get(
+            url, is_success, timeout, verify, toml_config, kwargs)
+
     prompt_login = config.get_config_val("core.prompt_login", toml_config)
     dcos_url = urlparse(config.get_config_val("core.dcos_url", toml_config))
-
-    # only request with DC/OS Auth if request is to DC/OS cluster
-    if auth_token and _is_request_to_dcos(url, toml_config=toml_config):
-        auth = DCOSAcsAuth(auth_token)
-    else:
-        auth = None
+    auth, auth_token = _auth(url, toml_config)
 
     response = _request(method, url, is_success, timeout,
                         auth=auth, verify=verify, toml_config=toml_config,
@@ -248,35 +693,21 @@ def request(method,
 
     if is_success(response.status_code):
         return response
-    elif response.status_code == 401:
-        if prompt_login:
-            # I don't like having imports that aren't at the top level, but
-            # this is to resolve a circular import issue between dcos.http and
-            # dcos.auth
-            from dcos.auth import header_challenge_auth
-
-            header_challenge_auth(dcos_url.geturl())
-            # if header_challenge_auth succeeded, then we auth-ed correctly and
-            # thus can safely recursively call ourselves and not have to worry
-            # about an infinite loop
-            return request(method=method, url=url,
-                           is_success=is_success, timeout=timeout,
-                           verify=verify, **kwargs)
-        else:
-            if auth_token is not None:
-                msg = ("Your core.dcos_acs_token is invalid. "
-                       "Please run: `dcos auth login`")
-                raise DCOSAuthenticationException(response, msg)
-            else:
-                raise DCOSAuthenticationException(response)
-    elif response.status_code == 422:
-        raise DCOSUnprocessableException(response)
-    elif response.status_code == 403:
-        raise DCOSAuthorizationException(response)
-    elif response.status_code == 400:
-        raise DCOSBadRequest(response)
+    elif response.status_code == 401 and prompt_login:
+        # I don't like having imports that aren't at the top level, but
+        # this is to resolve a circular import issue between dcos.http and
+        # dcos.auth
+        from dcos.auth import header_challenge_auth
+
+        header_challenge_auth(dcos_url.geturl())
+        # if header_challenge_auth succeeded, then we auth-ed correctly and
+        # thus can safely recursively call ourselves and not have to worry
+        # about an infinite loop
+        return request(method=method, url=url,
+                       is_success=is_success, timeout=timeout,
+                       verify=verify, **kwargs)
     else:
-        raise DCOSHTTPException(response)
+        _raise_for_status(response, auth_token)
 
 
 def head(url, **kwargs):
@@ -0,0 +1,399 @@
+"""
+Cache of HTTP response bodies for conditional requests.
+
+Entries hold the body of a successful GET response with its headers. They
+are reused without contacting the server while the response's
+`Cache-Control: max-age` allows it, and are otherwise revalidated with
+`If-None-Match`/`If-Modified-Since`, see `dcos.http.request`.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+from requests.structures import CaseInsensitiveDict
+
+from dcos import util
+from dcos.errors import DCOSException
+
+logger = util.get_logger(__name__)
+
+DEFAULT_MAX_SIZE = 32 * 1024 * 1024
+"""The default maximum number of body bytes kept by a cache, it can be
+overriden through the `core.http_cache_size` config, in MB."""
+
+_UNSTORED_HEADERS = {'connection', 'content-encoding', 'content-length',
+                     'keep-alive', 'transfer-encoding'}
+"""Headers that don't apply to a cached body, which is stored decoded."""
+
+_REVALIDATION_HEADERS = ('Cache-Control', 'Date', 'ETag', 'Expires',
+                         'Last-Modified')
+"""Headers of a 304 response that update the cached ones."""
+
+
+def cache_control(headers):
+    """Parses the Cache-Control header.
+
+    :param headers: request or response headers
+    :type headers: dict
+    :returns: the directives, lowercased, with their value or None
+    :rtype: {str: str | None}
+    """
+
+    directives = {}
+    value = CaseInsensitiveDict(headers).get('Cache-Control') or ''
+    for directive in value.split(','):
+        name, _, argument = directive.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+class Entry(object):
+    """A cached response body.
+
+    :param url: the URL of the response
+    :type url: str
+    :param headers: the response headers
+    :type headers: dict
+    :param content: the decoded response body
+    :type content: bytes
+    :param expires: time until which the entry can be used without
+                    revalidation, or None if it must always be revalidated
+    :type expires: float | None
+    """
+
+    def __init__(self, url, headers, content, expires):
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.expires = expires
+
+    @classmethod
+    def from_response(cls, response):
+        """Creates the entry for a response, unless it can't be stored or
+        reused.
+
+        :param response: a successful GET response
+        :type response: requests.Response
+        :returns: the entry, or None
+        :rtype: Entry | None
+        """
+
+        directives = cache_control(response.headers)
+        if 'no-store' in directives:
+            return None
+
+        expires = _expires(directives, response.headers)
+        if expires is None and not _validators(response.headers):
+            return None
+
+        headers = {name: value for name, value in response.headers.items()
+                   if name.lower() not in _UNSTORED_HEADERS}
+        return cls(response.url, headers, response.content, expires)
+
+    def is_fresh(self, now=None):
+        """
+        :param now: the current time
+        :type now: float | None
+        :returns: whether the entry can be used without revalidation
+        :rtype: bool
+        """
+
+        if now is None:
+            now = time.time()
+        return self.expires is not None and now < self.expires
+
+    def validators(self):
+        """
+        :returns: the conditional request headers revalidating the entry
+        :rtype: dict
+        """
+
+        return _validators(self.headers)
+
+    def revalidated(self, response):
+        """
+        :param response: the 304 response to a conditional request
+        :type response: requests.Response
+        :returns: the entry with the headers of the response
+        :rtype: Entry
+        """
+
+        headers = CaseInsensitiveDict(self.headers)
+        for name in _REVALIDATION_HEADERS:
+            if name in response.headers:
+                headers[name] = response.headers[name]
+
+        expires = _expires(cache_control(headers), headers)
+        return Entry(self.url, dict(headers.items()), self.content, expires)
+
+    def response(self):
+        """
+        :returns: a new response with the entry's body and headers
+        :rtype: requests.Response
+        """
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = requests.utils.get_encoding_from_headers(
+            response.headers)
+        response._content = self.content
+        return response
+
+
+class HTTPCache(object):
+    """Least recently used cache of `Entry`s, with a cap on the total size of
+    their bodies. If it has a directory, entries are also stored there so
+    that other processes can reuse them.
+
+    :param max_size: the maximum number of body bytes to keep
+    :type max_size: int
+    :param path: the directory to persist entries to, if any
+    :type path: str | None
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, path=None):
+        self.max_size = max_size
+        self.path = path
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :param key: the key of the entry
+        :type key: tuple
+        :returns: the entry, or None if there is none
+        :rtype: Entry | None
+        """
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+                return entry
+
+        entry = self._load(key)
+        if entry is not None:
+            self._add(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        """Stores an entry, evicting the least recently used ones if the
+        cache is full.
+
+        :param key: the key of the entry
+        :type key: tuple
+        :param entry: the entry
+        :type entry: Entry
+        :rtype: None
+        """
+
+        if len(entry.content) > self.max_size:
+            self.remove(key)
+            return
+
+        self._add(key, entry)
+        self._store(key, entry)
+
+    def remove(self, key):
+        """Removes an entry, if there is one.
+
+        :param key: the key of the entry
+        :type key: tuple
+        :rtype: None
+        """
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= len(entry.content)
+
+        if self.path is not None:
+            for path in self._paths(key):
+                _remove_file(path)
+
+    def clear(self):
+        """Removes all entries, from memory only.
+
+        :rtype: None
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _add(self, key, entry):
+        """Adds an entry to memory, evicting the least recently used ones if
+        the cache is full.
+
+        :param key: the key of the entry
+        :type key: tuple
+        :param entry: the entry
+        :type entry: Entry
+        :rtype: None
+        """
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.content)
+
+            self._entries[key] = entry
+            self._size += len(entry.content)
+            while self._size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.content)
+
+    def _paths(self, key):
+        """
+        :param key: the key of an entry
+        :type key: tuple
+        :returns: the paths of the entry's metadata and body files
+        :rtype: (str, str)
+        """
+
+        name = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        base = os.path.join(self.path, name)
+        return base + '.json', base + '.body'
+
+    def _load(self, key):
+        """
+        :param key: the key of the entry
+        :type key: tuple
+        :returns: the entry stored on disk, or None
+        :rtype: Entry | None
+        """
+
+        if self.path is None:
+            return None
+
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                content = f.read()
+        except (IOError, OSError, ValueError):
+            return None
+
+        if meta.get('key') != repr(key) or meta.get('size') != len(content):
+            return None
+
+        return Entry(meta['url'], meta['headers'], content, meta['expires'])
+
+    def _store(self, key, entry):
+        """Writes an entry to disk, and removes the least recently used ones
+        if the entries there exceed the maximum size.
+
+        :param key: the key of the entry
+        :type key: tuple
+        :param entry: the entry
+        :type entry: Entry
+        :rtype: None
+        """
+
+        if self.path is None:
+            return
+
+        meta = {'key': repr(key),
+                'url': entry.url,
+                'headers': entry.headers,
+                'expires': entry.expires,
+                'size': len(entry.content)}
+        meta_path, body_path = self._paths(key)
+        try:
+            util.ensure_dir_exists(self.path)
+            util.write_file_atomically(body_path, entry.content)
+            util.write_file_atomically(
+                meta_path, json.dumps(meta).encode('utf-8'))
+            self._prune()
+        except (DCOSException, IOError, OSError) as e:
+            logger.warning('Unable to store HTTP cache entry: %s', e)
+
+    def _prune(self):
+        """Removes the least recently written entries from disk until they
+        fit in the maximum size.
+
+        :rtype: None
+        """
+
+        bodies = []
+        for name in os.listdir(self.path):
+            if name.endswith('.body'):
+                st = os.stat(os.path.join(self.path, name))
+                bodies.append((st.st_mtime, st.st_size, name))
+
+        size = sum(body[1] for body in bodies)
+        for _, body_size, name in sorted(bodies):
+            if size <= self.max_size:
+                break
+            base = os.path.join(self.path, name[:-len('.body')])
+            _remove_file(base + '.json')
+            _remove_file(base + '.body')
+            size -= body_size
+
+
+def _validators(headers):
+    """
+    :param headers: the headers of a cached response
+    :type headers: dict
+    :returns: the conditional request headers revalidating the response
+    :rtype: dict
+    """
+
+    headers = CaseInsensitiveDict(headers)
+    validators = {}
+    if 'ETag' in headers:
+        validators['If-None-Match'] = headers['ETag']
+    if 'Last-Modified' in headers:
+        validators['If-Modified-Since'] = headers['Last-Modified']
+    return validators
+
+
+def _expires(directives, headers):
+    """
+    :param directives: the response's Cache-Control directives
+    :type directives: dict
+    :param headers: the response headers
+    :type headers: dict
+    :returns: the time until which the response is fresh, or None if it
+              must be revalidated before use
+    :rtype: float | None
+    """
+
+    if 'no-cache' in directives:
+        return None
+
+    try:
+        max_age = int(directives.get('max-age'))
+        age = int(CaseInsensitiveDict(headers).get('Age') or 0)
+    except (TypeError, ValueError):
+        return None
+
+    if max_age <= age:
+        return None
+    return time.time() + max_age - age
+
+
+def _remove_file(path):
+    """Removes a file, if it exists.
+
+    :param path: the path of the file
+    :type path: str
+    :rtype: None
+    """
+
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -1,12 +1,39 @@
+import bisect
+import collections
+import copy
 import json
+import re
+import threading
+import time
 
 from six.moves import urllib
 
-from dcos import config, http, rpcclient, util
+from dcos import asynchttp, config, http, rpcclient, sse, util
 from dcos.errors import DCOSException, DCOSHTTPException
 
 logger = util.get_logger(__name__)
 
+FRAMEWORK_NAME_LABEL = 'DCOS_PACKAGE_FRAMEWORK_NAME'
+
+
+ApplyResult = collections.namedtuple(
+    'ApplyResult', ['app_id', 'deployment_id', 'error', 'succeeded'])
+"""Outcome of creating or updating an application with `apply_many`.
+
+:param app_id: the application's ID
+:type app_id: str
+:param deployment_id: the resulting deployment ID, or None if the
+                      application couldn't be created or updated
+:type deployment_id: str | None
+:param error: the error that prevented creating or updating the
+              application, if any
+:type error: DCOSException | None
+:param succeeded: whether the deployment succeeded, or None if it wasn't
+                  waited for or its outcome is unknown, see
+                  `Client.watch_deployments`
+:type succeeded: bool | None
+"""
+
 
 def create_client(toml_config=None):
     """Creates a Marathon client with the supplied configuration.
@@ -28,6 +55,27 @@ def create_client(toml_config=None):
     return Client(rpc_client)
 
 
+def create_async_client(toml_config=None):
+    """Creates a Marathon client for asyncio event loops with the supplied
+    configuration.
+
+    :param toml_config: configuration dictionary
+    :type toml_config: config.Toml
+    :returns: Marathon client
+    :rtype: dcos.marathon.AsyncClient
+    """
+
+    if toml_config is None:
+        toml_config = config.get_config()
+
+    marathon_url = _get_marathon_url(toml_config)
+    timeout = config.get_config_val('core.timeout') or http.DEFAULT_TIMEOUT
+    rpc_client = rpcclient.create_async_client(marathon_url, timeout)
+
+    logger.info('Creating async marathon client with: %r', marathon_url)
+    return AsyncClient(rpc_client)
+
+
 def _get_marathon_url(toml_config):
     """
     :param toml_config: configuration dictionary
@@ -77,7 +125,7 @@ class Client(object):
         response = self._rpc.http_req(http.get, 'ping')
         return response.text
 
-    def get_app(self, app_id, version=None):
+    def get_app(self, app_id, version=None, embed=None):
         """Returns a representation of the requested application version. If
         version is None the return the latest version.
 
@@ -85,6 +133,9 @@ class Client(object):
         :type app_id: str
         :param version: application version as a ISO8601 datetime
         :type version: str
+        :param embed: additional information to include in the latest
+                      version, e.g. ['app.tasks', 'app.counts']
+        :type embed: [str] | None
         :returns: the requested Marathon application
         :rtype: dict
         """
@@ -95,7 +146,8 @@ class Client(object):
         else:
             path = 'v2/apps{}/versions/{}'.format(app_id, version)
 
-        response = self._rpc.http_req(http.get, path)
+        response = self._rpc.http_req(
+            http.get, path, params=self._embed_params(embed))
 
         # Looks like Marathon return different JSON for versions
         if version is None:
@@ -103,14 +155,19 @@ class Client(object):
         else:
             return response.json()
 
-    def get_groups(self):
+    def get_groups(self, embed=None):
         """Get a list of known groups.
 
+        :param embed: the information to include in each group, e.g.
+                      ['group.apps', 'group.groups']
+        :type embed: [str] | None
         :returns: list of known groups
         :rtype: list of dict
         """
 
-        response = self._rpc.http_req(http.get, 'v2/groups')
+        response = self._rpc.http_req(
+            http.get, 'v2/groups', params=self._embed_params(embed),
+            cache=True)
         return response.json().get('groups')
 
     def get_group(self, group_id, version=None):
@@ -131,7 +188,7 @@ class Client(object):
         else:
             path = 'v2/groups{}/versions/{}'.format(group_id, version)
 
-        response = self._rpc.http_req(http.get, path)
+        response = self._rpc.http_req(http.get, path, cache=True)
         return response.json()
 
     def get_app_versions(self, app_id, max_count=None):
@@ -162,14 +219,24 @@ class Client(object):
         else:
             return response.json().get('versions')[:max_count]
 
-    def get_apps(self):
+    def get_apps(self, embed=None, label=None):
         """Get a list of known applications.
 
+        :param embed: additional information to include in each
+                      application, e.g. ['apps.tasks', 'apps.counts']
+        :type embed: [str] | None
+        :param label: Marathon label selector the applications must match,
+                      e.g. 'env==prod'
+        :type label: str | None
         :returns: list of known applications
         :rtype: [dict]
         """
 
-        response = self._rpc.http_req(http.get, 'v2/apps')
+        params = self._embed_params(embed)
+        if label is not None:
+            params = dict(params or {}, label=label)
+
+        response = self._rpc.http_req(http.get, 'v2/apps', params=params)
         return response.json().get('apps')
 
     def get_apps_for_framework(self, framework_name):
@@ -180,9 +247,9 @@ class Client(object):
         :rtype: [dict]
         """
 
-        return [app for app in self.get_apps()
-                if app.get('labels', {}).get(
-                    'DCOS_PACKAGE_FRAMEWORK_NAME') == framework_name]
+        label = '{}=={}'.format(
+            FRAMEWORK_NAME_LABEL, _escape_label_value(framework_name))
+        return _apps_for_framework(self.get_apps(label=label), framework_name)
 
     def add_app(self, app_resource):
         """Add a new application.
@@ -485,6 +552,138 @@ class Client(object):
 
         return deployments
 
+    def watch_deployments(self, deployment_ids, timeout=None,
+                          min_interval=1, max_interval=30):
+        """Waits for deployments to finish.
+
+        The deployments are followed over a single Marathon event stream
+        connection, and Marathon's deployment list is only fetched once at
+        the start and then every `max_interval` seconds to catch up on
+        anything the stream missed. If the event stream is unavailable,
+        the deployment list is polled instead, every `min_interval`
+        seconds at first and backing off up to every `max_interval`
+        seconds.
+
+        Polling can't tell a failed deployment from a successful one, so
+        the outcome of a deployment that Marathon no longer knows about
+        without having reported it on the event stream is unknown: for
+        instance one that finished before the stream was opened, or all of
+        them when the stream is unavailable.
+
+        :param deployment_ids: the deployment ids
+        :type deployment_ids: [str]
+        :param timeout: maximum number of seconds to wait, or None to wait
+                        until all the deployments finish
+        :type timeout: float | None
+        :param min_interval: initial number of seconds between polls
+        :type min_interval: float
+        :param max_interval: maximum number of seconds between polls
+        :type max_interval: float
+        :returns: whether each deployment succeeded, or None if it is
+                  unknown, by deployment id
+        :rtype: {str: bool | None}
+        """
+
+        watcher = _DeploymentWatcher(self, deployment_ids)
+        return watcher.wait(timeout, min_interval, max_interval)
+
+    def apply_many(self, definitions, concurrency=util.STREAM_CONCURRENCY,
+                   force=False, wait=False, timeout=None):
+        """Creates or updates many applications.
+
+        The applications of each group are sent to Marathon in a single
+        request, so that they are deployed together, and the requests for
+        different groups are sent concurrently. If Marathon rejects a
+        group's request, its applications are sent one at a time so that
+        each error is reported against the application causing it.
+
+        :param definitions: the application definitions
+        :type definitions: [dict]
+        :param concurrency: maximum number of requests in flight
+        :type concurrency: int
+        :param force: whether to override running deployments
+        :type force: bool
+        :param wait: whether to wait for the resulting deployments
+        :type wait: bool
+        :param timeout: maximum number of seconds to wait, or None to wait
+                        until all the deployments finish
+        :type timeout: float | None
+        :returns: the outcome for each definition, in order
+        :rtype: [ApplyResult]
+        """
+
+        batches = collections.OrderedDict()
+        for index, definition in enumerate(definitions):
+            parent_id = definition['id'].strip('/').rpartition('/')[0]
+            batches.setdefault(parent_id, []).append(index)
+
+        def apply_batch(indices):
+            return self._apply_batch(
+                [definitions[index] for index in indices], force)
+
+        results = [None] * len(definitions)
+        for job, indices in util.stream(
+                apply_batch, batches.values(), concurrency):
+            for index, (deployment_id, error) in zip(indices, job.result()):
+                results[index] = ApplyResult(
+                    definitions[index]['id'], deployment_id, error, None)
+
+        deployment_ids = {result.deployment_id for result in results
+                          if result.deployment_id is not None}
+        if wait and deployment_ids:
+            succeeded = self.watch_deployments(deployment_ids, timeout)
+            results = [result._replace(
+                succeeded=succeeded.get(result.deployment_id))
+                for result in results]
+
+        return results
+
+    def _apply_batch(self, definitions, force):
+        """Creates or updates applications in a single deployment, or one
+        at a time if Marathon rejects them together.
+
+        :param definitions: the application definitions
+        :type definitions: [dict]
+        :param force: whether to override running deployments
+        :type force: bool
+        :returns: the deployment ID and error for each definition
+        :rtype: [(str | None, DCOSException | None)]
+        """
+
+        if len(definitions) > 1:
+            try:
+                deployment_id = self._update_apps(definitions, force)
+                return [(deployment_id, None)] * len(definitions)
+            except DCOSException as e:
+                logger.info('Failed to update %d apps together, updating '
+                            'them one at a time: %s', len(definitions), e)
+
+        outcomes = []
+        for definition in definitions:
+            try:
+                deployment_id = self.update_app(
+                    definition['id'], definition, force)
+                outcomes.append((deployment_id, None))
+            except DCOSException as e:
+                outcomes.append((None, e))
+        return outcomes
+
+    def _update_apps(self, definitions, force=False):
+        """Creates or updates applications in a single deployment.
+
+        :param definitions: the application definitions
+        :type definitions: [dict]
+        :param force: whether to override running deployments
+        :type force: bool
+        :returns: the resulting deployment ID
+        :rtype: str
+        """
+
+        params = self._force_params(force)
+        response = self._rpc.http_req(
+            http.put, 'v2/apps', params=params, json=definitions)
+        return self._parse_json(response).get('deploymentId')
+
     def _cancel_deployment(self, deployment_id, force):
         """Cancels an application deployment.
 
@@ -539,18 +738,24 @@ class Client(object):
         :rtype: [dict]
         """
 
-        response = self._rpc.http_req(http.get, 'v2/tasks')
+        if app_id is None:
+            response = self._rpc.http_req(http.get, 'v2/tasks')
+            return response.json()['tasks']
 
-        if app_id is not None:
-            app_id = util.normalize_marathon_id_path(app_id)
-            tasks = [
-                task for task in response.json()['tasks']
-                if app_id == task['appId']
-            ]
-        else:
-            tasks = response.json()['tasks']
+        # An app that doesn't exist has no tasks
+        def get_unless_missing(url, **kwargs):
+            try:
+                return http.get(url, **kwargs)
+            except DCOSHTTPException as e:
+                if e.status() == 404:
+                    return None
+                raise
 
-        return tasks
+        path = self._marathon_id_path_format('v2/apps/{}/tasks', app_id)
+        response = self._rpc.http_req(get_unless_missing, path)
+        if response is None:
+            return []
+        return response.json()['tasks']
 
     def get_task(self, task_id):
         """Returns a task
@@ -738,17 +943,21 @@ class Client(object):
         response = self._rpc.http_req(test_for_pods, 'v2/pods')
         return response.status_code // 100 == 2
 
-    def get_queued_app(self, app_id):
+    def get_queued_app(self, app_id, embed=('lastUnusedOffers',)):
         """Returns app information inside the launch queue.
 
         :param app_id: the app id
         :type app_id: str
+        :param embed: additional information to include; pass None to leave
+                      out the offers Marathon last declined, which make up
+                      most of the response
+        :type embed: [str] | None
         :returns: app information inside the launch queue
         :rtype: dict
         """
 
-        response = self._rpc.http_req(http.get,
-                                      'v2/queue?embed=lastUnusedOffers')
+        response = self._rpc.http_req(
+            http.get, 'v2/queue', params=self._embed_params(embed))
         app = next(
             (app for app in response.json().get('queue')
              if app_id == get_app_or_pod_id(app)),
@@ -756,15 +965,19 @@ class Client(object):
 
         return app
 
-    def get_queued_apps(self):
+    def get_queued_apps(self, embed=None):
         """Returns the content of the launch queue,
         including the apps which should be scheduled.
 
+        :param embed: additional information to include, e.g.
+                      ['lastUnusedOffers']
+        :type embed: [str] | None
         :returns: a list of to be scheduled apps, including debug information
         :rtype: list of dict
         """
 
-        response = self._rpc.http_req(http.get, 'v2/queue')
+        response = self._rpc.http_req(
+            http.get, 'v2/queue', params=self._embed_params(embed))
 
         return response.json().get('queue')
 
@@ -800,6 +1013,17 @@ class Client(object):
         normalized_id_path = urllib.parse.quote(id_path.strip('/'))
         return url_path_template.format(normalized_id_path)
 
+    @staticmethod
+    def _embed_params(embed):
+        """Returns the query parameters that embed the provided information.
+
+        :param embed: the information to embed
+        :type embed: [str] | None
+        :rtype: {} | None
+        """
+
+        return {'embed': list(embed)} if embed is not None else None
+
     @staticmethod
     def _force_params(force):
         """Returns the query parameters that signify the provided force value.
@@ -831,6 +1055,582 @@ class Client(object):
             raise DCOSException(template.format(response.text))
 
 
+class CachedMarathonClient(Client):
+    """Marathon client that serves `get_app`, `get_apps`, `get_tasks` and
+    `get_task` from a local index of apps and tasks instead of fetching
+    and filtering the full collections on every call.
+
+    The index is built from one fetch of all apps and tasks and then kept
+    up to date by following Marathon's event stream. It is rebuilt when it
+    is older than `max_age` seconds or if the event stream fails, so reads
+    are never served from data older than that. All other calls,
+    including writes, go to Marathon; their effect shows up in the index
+    once Marathon emits the corresponding event.
+
+    :param rpc_client: provides a method for making HTTP requests
+    :type rpc_client: _RpcClient
+    :param max_age: maximum number of seconds between full fetches
+    :type max_age: float
+    """
+
+    EVENT_TYPES = ['status_update_event', 'api_post_event',
+                   'app_terminated_event', 'deployment_success',
+                   'deployment_failed', 'instance_changed_event']
+
+    # Task states after which Marathon forgets about a task.
+    TERMINAL_TASK_STATES = {
+        'TASK_FINISHED', 'TASK_FAILED', 'TASK_KILLED', 'TASK_ERROR',
+        'TASK_GONE', 'TASK_GONE_BY_OPERATOR', 'TASK_DROPPED'}
+
+    # Instance conditions after which Marathon forgets about an instance.
+    TERMINAL_CONDITIONS = {
+        'Error', 'Failed', 'Finished', 'Killed', 'Gone', 'Dropped'}
+
+    # status_update_event fields, by the task field they update.
+    TASK_FIELDS = {
+        'appId': 'appId',
+        'host': 'host',
+        'ports': 'ports',
+        'ipAddresses': 'ipAddresses',
+        'slaveId': 'slaveId',
+        'state': 'taskStatus',
+        'version': 'version',
+    }
+
+    def __init__(self, rpc_client, max_age=60):
+        super(CachedMarathonClient, self).__init__(rpc_client)
+        self._max_age = max_age
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._apps = {}
+        self._tasks = {}
+        self._synced_at = None
+        self._events = None
+        # events received while the index is being fetched
+        self._pending_events = None
+
+    def get_app(self, app_id, version=None, embed=None):
+        """Returns a representation of the requested application version. If
+        version is None the return the latest version.
+
+        :param app_id: the ID of the application
+        :type app_id: str
+        :param version: application version as a ISO8601 datetime
+        :type version: str
+        :param embed: additional information to include in the latest
+                      version, e.g. ['app.tasks', 'app.counts']
+        :type embed: [str] | None
+        :returns: the requested Marathon application
+        :rtype: dict
+        """
+
+        if version is not None or embed is not None:
+            return super(CachedMarathonClient, self).get_app(
+                app_id, version, embed)
+
+        self._refresh()
+        with self._lock:
+            app = self._apps.get(util.normalize_marathon_id_path(app_id))
+            if app is not None:
+                return copy.deepcopy(app)
+
+        # let Marathon answer, or raise, for apps we don't know about
+        return super(CachedMarathonClient, self).get_app(app_id)
+
+    def get_apps(self, embed=None, label=None):
+        """Get a list of known applications.
+
+        :param embed: additional information to include in each
+                      application, e.g. ['apps.tasks', 'apps.counts']
+        :type embed: [str] | None
+        :param label: Marathon label selector the applications must match,
+                      e.g. 'env==prod'
+        :type label: str | None
+        :returns: list of known applications
+        :rtype: [dict]
+        """
+
+        if embed is not None or label is not None:
+            return super(CachedMarathonClient, self).get_apps(embed, label)
+
+        self._refresh()
+        with self._lock:
+            return copy.deepcopy(list(self._apps.values()))
+
+    def get_apps_for_framework(self, framework_name):
+        """ Return all apps running the given framework.
+
+        :param framework_name: framework name
+        :type framework_name: str
+        :rtype: [dict]
+        """
+
+        return _apps_for_framework(self.get_apps(), framework_name)
+
+    def get_tasks(self, app_id):
+        """Returns a list of tasks, optionally limited to an app.
+
+        :param app_id: the id of the application to restart
+        :type app_id: str
+        :returns: a list of tasks
+        :rtype: [dict]
+        """
+
+        self._refresh()
+        with self._lock:
+            tasks = list(self._tasks.values())
+            if app_id is not None:
+                app_id = util.normalize_marathon_id_path(app_id)
+                tasks = [task for task in tasks if task['appId'] == app_id]
+            return copy.deepcopy(tasks)
+
+    def get_task(self, task_id):
+        """Returns a task
+
+        :param task_id: the id of the task
+        :type task_id: str
+        :returns: a tasks
+        :rtype: dict
+        """
+
+        self._refresh()
+        with self._lock:
+            return copy.deepcopy(self._tasks.get(task_id))
+
+    def close(self):
+        """Stops following Marathon's event stream
+
+        :rtype: None
+        """
+
+        with self._lock:
+            events = self._events
+            self._events = None
+            self._synced_at = None
+        if events is not None:
+            events.resp.close()
+
+    def _refresh(self):
+        """Rebuilds the index if it is too old or not kept up to date
+        """
+
+        with self._sync_lock:
+            with self._lock:
+                if (self._synced_at is not None and
+                        time.time() - self._synced_at < self._max_age):
+                    return
+
+            if self._events is None:
+                try:
+                    self._events = _subscribe(self._rpc, self.EVENT_TYPES)
+                except DCOSException as e:
+                    logger.info('Marathon event stream unavailable, the '
+                                'index is only refreshed every %s seconds: '
+                                '%s', self._max_age, e)
+                else:
+                    thread = threading.Thread(target=self._follow,
+                                              args=(self._events,))
+                    thread.daemon = True
+                    thread.start()
+
+            with self._lock:
+                self._pending_events = []
+            try:
+                apps = super(CachedMarathonClient, self).get_apps()
+                response = self._rpc.http_req(http.get, 'v2/tasks')
+                tasks = response.json()['tasks']
+            except Exception:
+                with self._lock:
+                    self._pending_events = None
+                raise
+
+            with self._lock:
+                self._apps = {app['id']: app for app in apps}
+                self._tasks = {task['id']: task for task in tasks}
+                self._synced_at = time.time()
+                # the fetch may predate these events: apply them on top
+                pending, self._pending_events = self._pending_events, None
+                for event in pending:
+                    self._apply(event)
+
+    def _follow(self, events):
+        """Applies the events from the event stream to the index. Marks the
+        index for a rebuild if the stream fails.
+
+        :param events: Marathon's event stream
+        :type events: sseclient.SSEClient
+        """
+
+        try:
+            for event in _iter_events(events):
+                with self._lock:
+                    if self._events is not events:
+                        return
+                    if self._pending_events is not None:
+                        self._pending_events.append(event)
+                    else:
+                        self._apply(event)
+        except Exception:
+            with self._lock:
+                if self._events is not events:
+                    return
+                logger.exception('Error reading the Marathon event stream')
+                self._events = None
+                self._synced_at = None
+
+    def _apply(self, event):
+        """Applies an event to the index
+
+        :param event: Marathon event
+        :type event: dict
+        """
+
+        event_type = event['eventType']
+        if event_type == 'status_update_event':
+            self._apply_status_update(event)
+        elif event_type == 'api_post_event':
+            app = event.get('appDefinition')
+            if app is not None:
+                self._apps.setdefault(app['id'], {}).update(app)
+        elif event_type == 'app_terminated_event':
+            self._remove_app(event['appId'])
+        elif event_type == 'deployment_success':
+            plan = event.get('plan', {})
+            target = _group_apps(plan.get('target'))
+            for app in target:
+                self._apps.setdefault(app['id'], {}).update(app)
+            target_ids = {app['id'] for app in target}
+            for app in _group_apps(plan.get('original')):
+                if app['id'] not in target_ids:
+                    self._remove_app(app['id'])
+        elif event_type == 'deployment_failed':
+            # the apps are somewhere between the original and the target
+            self._synced_at = None
+        elif event_type == 'instance_changed_event':
+            if event.get('condition') in self.TERMINAL_CONDITIONS:
+                prefix = event['instanceId'] + '.'
+                for task_id in list(self._tasks):
+                    if task_id.startswith(prefix):
+                        del self._tasks[task_id]
+
+    def _apply_status_update(self, event):
+        """Applies a status_update_event to the index
+
+        :param event: Marathon status_update_event
+        :type event: dict
+        """
+
+        task_id = event['taskId']
+        if event.get('taskStatus') in self.TERMINAL_TASK_STATES:
+            self._tasks.pop(task_id, None)
+            return
+
+        task = self._tasks.setdefault(task_id, {'id': task_id})
+        for field, event_field in self.TASK_FIELDS.items():
+            if event_field in event:
+                task[field] = event[event_field]
+
+    def _remove_app(self, app_id):
+        """Removes an app and its tasks from the index
+
+        :param app_id: the app's ID
+        :type app_id: str
+        """
+
+        self._apps.pop(app_id, None)
+        for task_id, task in list(self._tasks.items()):
+            if task.get('appId') == app_id:
+                del self._tasks[task_id]
+
+
+class AsyncClient(object):
+    """Marathon client for asyncio event loops. It has the read methods of
+    `Client`, returning futures of what they return, so that many reads can
+    be in flight on a single thread.
+
+    :param rpc_client: provides a method for making HTTP requests
+    :type rpc_client: rpcclient.AsyncRpcClient
+    """
+
+    def __init__(self, rpc_client):
+        self._rpc = rpc_client
+
+    def get_about(self):
+        """Returns info about Marathon instance
+
+        :returns: future of the Marathon information
+        :rtype: asyncio.Future
+        """
+
+        return self._get('v2/info')
+
+    def get_app(self, app_id, version=None, embed=None):
+        """Returns a representation of the requested application version. If
+        version is None the return the latest version.
+
+        :param app_id: the ID of the application
+        :type app_id: str
+        :param version: application version as a ISO8601 datetime
+        :type version: str
+        :param embed: additional information to include in the latest
+                      version, e.g. ['app.tasks', 'app.counts']
+        :type embed: [str] | None
+        :returns: future of the requested Marathon application
+        :rtype: asyncio.Future
+        """
+
+        app_id = util.normalize_marathon_id_path(app_id)
+        if version is None:
+            return self._get('v2/apps{}'.format(app_id),
+                             lambda body: body.get('app'),
+                             params=Client._embed_params(embed))
+        else:
+            return self._get('v2/apps{}/versions/{}'.format(app_id, version))
+
+    def get_apps(self, embed=None, label=None):
+        """Get a list of known applications.
+
+        :param embed: additional information to include in each
+                      application, e.g. ['apps.tasks', 'apps.counts']
+        :type embed: [str] | None
+        :param label: Marathon label selector the applications must match,
+                      e.g. 'env==prod'
+        :type label: str | None
+        :returns: future of the list of known applications
+        :rtype: asyncio.Future
+        """
+
+        params = Client._embed_params(embed)
+        if label is not None:
+            params = dict(params or {}, label=label)
+
+        return self._get(
+            'v2/apps', lambda body: body.get('apps'), params=params)
+
+    def get_apps_for_framework(self, framework_name):
+        """ Return all apps running the given framework.
+
+        :param framework_name: framework name
+        :type framework_name: str
+        :returns: future of the apps
+        :rtype: asyncio.Future
+        """
+
+        label = '{}=={}'.format(
+            FRAMEWORK_NAME_LABEL, _escape_label_value(framework_name))
+        return asynchttp.then(
+            self.get_apps(label=label),
+            lambda apps: _apps_for_framework(apps, framework_name))
+
+    def get_groups(self, embed=None):
+        """Get a list of known groups.
+
+        :param embed: the information to include in each group, e.g.
+                      ['group.apps', 'group.groups']
+        :type embed: [str] | None
+        :returns: future of the list of known groups
+        :rtype: asyncio.Future
+        """
+
+        return self._get('v2/groups', lambda body: body.get('groups'),
+                         params=Client._embed_params(embed))
+
+    def get_group(self, group_id, version=None):
+        """Returns a representation of the requested group version. If
+        version is None the return the latest version.
+
+        :param group_id: the ID of the application
+        :type group_id: str
+        :param version: application version as a ISO8601 datetime
+        :type version: str
+        :returns: future of the requested Marathon group
+        :rtype: asyncio.Future
+        """
+
+        group_id = util.normalize_marathon_id_path(group_id)
+        if version is None:
+            path = 'v2/groups{}'.format(group_id)
+        else:
+            path = 'v2/groups{}/versions/{}'.format(group_id, version)
+
+        return self._get(path)
+
+    def get_tasks(self, app_id):
+        """Returns a list of tasks, optionally limited to an app.
+
+        :param app_id: the id of the application
+        :type app_id: str
+        :returns: future of the list of tasks
+        :rtype: asyncio.Future
+        """
+
+        if app_id is None:
+            return self._get('v2/tasks', lambda body: body['tasks'])
+
+        # An app that doesn't exist has no tasks
+        def parse(response):
+            if response.status_code == 404:
+                return []
+            return Client._parse_json(response)['tasks']
+
+        path = Client._marathon_id_path_format('v2/apps/{}/tasks', app_id)
+        response = self._rpc.http_req(
+            asynchttp.get, path, is_success=_is_success_or_missing)
+        return asynchttp.then(response, parse)
+
+    def get_deployments(self, app_id=None):
+        """Returns a list of deployments, optionally limited to an app.
+
+        :param app_id: the id of the application
+        :type app_id: str
+        :returns: future of the list of deployments
+        :rtype: asyncio.Future
+        """
+
+        def parse(deployments):
+            if app_id is None:
+                return deployments
+            normalized_id = util.normalize_marathon_id_path(app_id)
+            return [deployment for deployment in deployments
+                    if normalized_id in deployment['affectedApps']]
+
+        return self._get('v2/deployments', parse)
+
+    def get_queued_apps(self, embed=None):
+        """Returns the content of the launch queue,
+        including the apps which should be scheduled.
+
+        :param embed: additional information to include, e.g.
+                      ['lastUnusedOffers']
+        :type embed: [str] | None
+        :returns: future of the list of to be scheduled apps
+        :rtype: asyncio.Future
+        """
+
+        return self._get('v2/queue', lambda body: body.get('queue'),
+                         params=Client._embed_params(embed))
+
+    def list_pod(self):
+        """Get a list of known pods.
+
+        :returns: future of the list of known pods
+        :rtype: asyncio.Future
+        """
+
+        return self._get('v2/pods/::status')
+
+    def _get(self, path, parse=None, **kwargs):
+        """Sends a GET request and parses the JSON response body.
+
+        :param path: the endpoint path
+        :type path: str
+        :param parse: extracts the result from the parsed body
+        :type parse: function | None
+        :param kwargs: kwargs to pass to `http_req`
+        :type kwargs: dict
+        :returns: future of the result
+        :rtype: asyncio.Future
+        """
+
+        def parse_response(response):
+            body = Client._parse_json(response)
+            return body if parse is None else parse(body)
+
+        response = self._rpc.http_req(asynchttp.get, path, **kwargs)
+        return asynchttp.then(response, parse_response)
+
+
+def _is_success_or_missing(status_code):
+    """
+    :param status_code: the HTTP status code of a response
+    :type status_code: int
+    :returns: whether the status is successful or 404
+    :rtype: bool
+    """
+
+    return 200 <= status_code < 300 or status_code == 404
+
+
+def _subscribe(rpc_client, event_types):
+    """Opens Marathon's event stream
+
+    :param rpc_client: provides a method for making HTTP requests
+    :type rpc_client: _RpcClient
+    :param event_types: the types of the events to receive
+    :type event_types: [str]
+    :returns: Marathon's event stream
+    :rtype: sseclient.SSEClient
+    """
+
+    return rpc_client.http_req(
+        sse.get,
+        'v2/events',
+        params={'event_type': event_types},
+        timeout=(http.DEFAULT_CONNECT_TIMEOUT, None))
+
+
+def _iter_events(events):
+    """Parses the events from Marathon's event stream
+
+    :param events: Marathon's event stream
+    :type events: sseclient.SSEClient
+    :returns: the events, with their `eventType`
+    :rtype: iterator of dict
+    """
+
+    for event in events:
+        if not event.data:
+            continue
+
+        data = json.loads(event.data)
+        data.setdefault('eventType', event.event)
+        yield data
+
+
+def _apps_for_framework(apps, framework_name):
+    """
+    :param apps: Marathon applications
+    :type apps: [dict]
+    :param framework_name: framework name
+    :type framework_name: str
+    :returns: the applications running the framework
+    :rtype: [dict]
+    """
+
+    return [app for app in apps
+            if app.get('labels', {}).get(
+                FRAMEWORK_NAME_LABEL) == framework_name]
+
+
+def _escape_label_value(value):
+    """Escapes the characters that are special in Marathon label selectors.
+
+    :param value: a label value
+    :type value: str
+    :rtype: str
+    """
+
+    return re.sub(r'([^\w.\-])', r'\\\1', value)
+
+
+def _group_apps(group):
+    """Returns the apps in a group and its subgroups
+
+    :param group: Marathon group
+    :type group: dict | None
+    :returns: the apps
+    :rtype: [dict]
+    """
+
+    if not group:
+        return []
+
+    apps = list(group.get('apps', []))
+    for subgroup in group.get('groups', []):
+        apps.extend(_group_apps(subgroup))
+    return apps
+
+
 def get_app_or_pod_id(app_or_pod):
     """Gets the app or pod ID from the given app or pod
 
@@ -840,3 +1640,372 @@ def get_app_or_pod_id(app_or_pod):
         :rtype: str
         """
     return app_or_pod.get('app', app_or_pod.get('pod', {})).get('id')
+
+
+class GroupIndex(object):
+    """Flat index of a Marathon group tree, built once from the root group
+    returned by `Client.get_group`, for answering hierarchy queries without
+    walking the nested JSON.
+
+    Groups, apps and pods are indexed by absolute ID. The IDs are also kept
+    sorted, so the members of a subtree, or any IDs with a given prefix,
+    are found by binary search. The instances, cpus and mem of each group's
+    subtree are summed up front.
+
+    :param group: Marathon group, e.g. `client.get_group('/')`
+    :type group: dict
+    """
+
+    TOTALS = ('instances', 'cpus', 'mem')
+
+    def __init__(self, group):
+        self._nodes = {}
+        self._kinds = {}
+        self._parents = {}
+        self._children = {}
+        self._totals = {}
+        self._add_group(group, None)
+        self._ids = sorted(self._nodes)
+
+    def __contains__(self, marathon_id):
+        return _index_id(marathon_id) in self._nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def get(self, marathon_id):
+        """
+        :param marathon_id: the ID of a group, app or pod
+        :type marathon_id: str
+        :returns: the group, app or pod definition, or None
+        :rtype: dict | None
+        """
+
+        return self._nodes.get(_index_id(marathon_id))
+
+    def kind(self, marathon_id):
+        """
+        :param marathon_id: the ID of a group, app or pod
+        :type marathon_id: str
+        :returns: 'group', 'app' or 'pod', or None if it isn't indexed
+        :rtype: str | None
+        """
+
+        return self._kinds.get(_index_id(marathon_id))
+
+    def parent(self, marathon_id):
+        """
+        :param marathon_id: the ID of a group, app or pod
+        :type marathon_id: str
+        :returns: the ID of the enclosing group, or None for the root
+        :rtype: str | None
+        """
+
+        return self._parents.get(_index_id(marathon_id))
+
+    def children(self, group_id):
+        """
+        :param group_id: the ID of a group
+        :type group_id: str
+        :returns: the IDs of the group's direct subgroups, apps and pods
+        :rtype: [str]
+        """
+
+        return list(self._children.get(_index_id(group_id), []))
+
+    def ids(self, prefix=''):
+        """
+        :param prefix: the start of the IDs to return
+        :type prefix: str
+        :returns: the sorted IDs starting with `prefix`
+        :rtype: [str]
+        """
+
+        start = bisect.bisect_left(self._ids, prefix)
+        end = bisect.bisect_left(self._ids, prefix + u'\U0010ffff', start)
+        return self._ids[start:end]
+
+    def descendants(self, group_id, kind=None):
+        """
+        :param group_id: the ID of a group
+        :type group_id: str
+        :param kind: 'group', 'app' or 'pod' to only return those
+        :type kind: str | None
+        :returns: the sorted IDs of everything in the group's subtree,
+                  excluding the group itself
+        :rtype: [str]
+        """
+
+        group_id = _index_id(group_id)
+        prefix = group_id.rstrip('/') + '/'
+        return [marathon_id for marathon_id in self.ids(prefix)
+                if marathon_id != group_id and
+                (kind is None or self._kinds[marathon_id] == kind)]
+
+    def apps(self, group_id='/'):
+        """
+        :param group_id: the ID of a group
+        :type group_id: str
+        :returns: the apps in the group's subtree, sorted by ID
+        :rtype: [dict]
+        """
+
+        return [self._nodes[app_id]
+                for app_id in self.descendants(group_id, 'app')]
+
+    def pods(self, group_id='/'):
+        """
+        :param group_id: the ID of a group
+        :type group_id: str
+        :returns: the pods in the group's subtree, sorted by ID
+        :rtype: [dict]
+        """
+
+        return [self._nodes[pod_id]
+                for pod_id in self.descendants(group_id, 'pod')]
+
+    def totals(self, marathon_id):
+        """
+        :param marathon_id: the ID of a group, app or pod
+        :type marathon_id: str
+        :returns: the instances, and the cpus and mem they use, of the
+                  group's subtree or of the app or pod
+        :rtype: {str: float}
+        """
+
+        totals = self._totals.get(_index_id(marathon_id))
+        if totals is None:
+            raise DCOSException(
+                'Group, app or pod [{}] does not exist'.format(marathon_id))
+        return dict(zip(self.TOTALS, totals))
+
+    def _add(self, marathon_id, kind, node, parent_id, totals):
+        """Indexes a group, app or pod.
+
+        :param marathon_id: the ID
+        :type marathon_id: str
+        :param kind: 'group', 'app' or 'pod'
+        :type kind: str
+        :param node: the definition
+        :type node: dict
+        :param parent_id: the ID of the enclosing group, or None
+        :type parent_id: str | None
+        :param totals: the instances, cpus and mem
+        :type totals: [float]
+        :rtype: None
+        """
+
+        self._nodes[marathon_id] = node
+        self._kinds[marathon_id] = kind
+        self._parents[marathon_id] = parent_id
+        self._totals[marathon_id] = totals
+        if parent_id is not None:
+            self._children[parent_id].append(marathon_id)
+
+    def _add_group(self, group, parent_id):
+        """Indexes a group and its subtree.
+
+        :param group: Marathon group
+        :type group: dict
+        :param parent_id: the ID of the enclosing group, or None
+        :type parent_id: str | None
+        :returns: the group's totals
+        :rtype: [float]
+        """
+
+        group_id = _index_id(group.get('id', '/'))
+        totals = [0, 0, 0]
+        self._add(group_id, 'group', group, parent_id, totals)
+        self._children[group_id] = []
+
+        for app in group.get('apps') or []:
+            instances = app.get('instances', 1)
+            app_totals = [instances,
+                          app.get('cpus', 0) * instances,
+                          app.get('mem', 0) * instances]
+            self._add(_index_id(app['id']), 'app', app, group_id, app_totals)
+            totals[:] = map(sum, zip(totals, app_totals))
+
+        for pod in group.get('pods') or []:
+            instances = pod.get('scaling', {}).get('instances', 1)
+            resources = [container.get('resources', {})
+                         for container in pod.get('containers', [])]
+            pod_totals = [
+                instances,
+                sum(r.get('cpus', 0) for r in resources) * instances,
+                sum(r.get('mem', 0) for r in resources) * instances]
+            self._add(_index_id(pod['id']), 'pod', pod, group_id, pod_totals)
+            totals[:] = map(sum, zip(totals, pod_totals))
+
+        for subgroup in group.get('groups') or []:
+            subgroup_totals = self._add_group(subgroup, group_id)
+            totals[:] = map(sum, zip(totals, subgroup_totals))
+
+        return totals
+
+
+def _index_id(marathon_id):
+    """
+    :param marathon_id: the ID of a group, app or pod
+    :type marathon_id: str
+    :returns: the ID with a single leading and no trailing slash
+    :rtype: str
+    """
+
+    return '/' + marathon_id.strip('/')
+
+
+class _DeploymentWatcher(object):
+    """Waits for a set of deployments to finish, following Marathon's event
+    stream and falling back to polling the deployment list.
+
+    :param client: Marathon client
+    :type client: Client
+    :param deployment_ids: the deployment ids
+    :type deployment_ids: [str]
+    """
+
+    EVENT_TYPES = ['deployment_success', 'deployment_failed']
+
+    def __init__(self, client, deployment_ids):
+        self._client = client
+        self._pending = set(deployment_ids)
+        self._results = {}
+        self._condition = threading.Condition()
+        self._events = None
+        self._poll_now = False
+        self._stopped = False
+
+    def wait(self, timeout, min_interval, max_interval):
+        """Waits for the deployments to finish.
+
+        :param timeout: maximum number of seconds to wait, or None
+        :type timeout: float | None
+        :param min_interval: initial number of seconds between polls
+        :type min_interval: float
+        :param max_interval: maximum number of seconds between polls
+        :type max_interval: float
+        :returns: whether each deployment succeeded, or None if it is
+                  unknown, by deployment id
+        :rtype: {str: bool | None}
+        """
+
+        deadline = None if timeout is None else time.time() + timeout
+        interval = min_interval
+        self._subscribe()
+        try:
+            while True:
+                # Deployments that finished before we subscribed, or while
+                # the stream was reconnecting, only show up here.
+                self._poll()
+                if self._events is not None:
+                    next_poll = time.time() + max_interval
+                else:
+                    next_poll = time.time() + interval
+                    interval = min(interval * 2, max_interval)
+
+                with self._condition:
+                    while self._pending and not self._poll_now:
+                        now = time.time()
+                        if deadline is not None and now >= deadline:
+                            raise DCOSException(
+                                'Timed out waiting for deployments: {}'.format(
+                                    ', '.join(sorted(self._pending))))
+                        if now >= next_poll:
+                            break
+                        self._condition.wait(
+                            min(next_poll, deadline or next_poll) - now)
+
+                    if not self._pending:
+                        return dict(self._results)
+                    self._poll_now = False
+        finally:
+            self._stop()
+
+    def _subscribe(self):
+        """Opens the event stream and starts following it on a daemon
+        thread. Leaves the watcher polling if the stream is unavailable.
+        """
+
+        try:
+            self._events = _subscribe(self._client._rpc, self.EVENT_TYPES)
+        except DCOSException as e:
+            logger.info('Marathon event stream unavailable, polling '
+                        'deployments instead: %s', e)
+            return
+
+        thread = threading.Thread(target=self._follow, args=(self._events,))
+        thread.daemon = True
+        thread.start()
+
+    def _follow(self, events):
+        """Records the outcome of the deployments reported by the event
+        stream. Switches the watcher to polling if the stream fails.
+
+        :param events: Marathon's event stream
+        :type events: sseclient.SSEClient
+        """
+
+        try:
+            for event in _iter_events(events):
+                if self._stopped:
+                    return
+                if event['eventType'] in self.EVENT_TYPES:
+                    self._finish(event.get('id'),
+                                 event['eventType'] == 'deployment_success')
+        except Exception:
+            if self._stopped:
+                return
+            logger.exception('Error reading the Marathon event stream, '
+                             'polling deployments instead')
+            with self._condition:
+                self._events = None
+                self._poll_now = True
+                self._condition.notify_all()
+
+    def _poll(self):
+        """Marks the deployments missing from Marathon's deployment list as
+        finished, with an unknown outcome.
+        """
+
+        try:
+            deployments = self._client.get_deployments()
+        except DCOSException:
+            logger.exception('Error polling Marathon deployments')
+            return
+
+        active = {deployment['id'] for deployment in deployments}
+        for deployment_id in list(self._pending):
+            if deployment_id not in active:
+                self._finish(deployment_id, None)
+
+    def _finish(self, deployment_id, succeeded):
+        """Records the outcome of a deployment, if it is one being waited
+        for. An event reporting the outcome of a deployment that a poll
+        found finished replaces the unknown outcome.
+
+        :param deployment_id: the deployment id
+        :type deployment_id: str
+        :param succeeded: whether the deployment succeeded, or None if it
+                          is unknown
+        :type succeeded: bool | None
+        """
+
+        with self._condition:
+            if deployment_id in self._pending:
+                self._pending.discard(deployment_id)
+                self._results[deployment_id] = succeeded
+                self._condition.notify_all()
+            elif (succeeded is not None and deployment_id in self._results
+                    and self._results[deployment_id] is None):
+                self._results[deployment_id] = succeeded
+
+    def _stop(self):
+        """Stops following the event stream
+        """
+
+        self._stopped = True
+        events = self._events
+        if events is not None:
+            # unblocks the thread, which exits on its next event
+            events.resp.close()
@@ -0,0 +1,476 @@
+import collections
+
+from dcos import util
+from dcos.errors import DCOSException
+
+logger = util.get_logger(__name__)
+
+
+Change = collections.namedtuple('Change', ['path', 'desired', 'live'])
+"""A difference between a desired and a live Marathon definition.
+
+:param path: the keys leading to the value that differs. Apps, pods and
+             groups within a group are keyed by their absolute ID.
+:type path: tuple
+:param desired: the desired value, or None if it is unset or defaulted
+:type desired: object
+:param live: the live value, or None if it is unset or defaulted
+:type live: object
+"""
+
+# Fields Marathon adds to the definitions it returns.
+SERVER_GENERATED_FIELDS = {
+    'app': {
+        'version', 'versionInfo', 'tasksRunning', 'tasksStaged',
+        'tasksHealthy', 'tasksUnhealthy', 'deployments', 'tasks',
+        'lastTaskFailure', 'taskStats', 'readinessCheckResults'},
+    'pod': {'version', 'versionInfo', 'status'},
+    'group': {'version', 'versionInfo'},
+}
+
+# Fields Marathon fills in when they aren't given, with values that
+# depend on the cluster; they only count when they are given.
+SERVER_ASSIGNED_FIELDS = {
+    'app': {'ports', 'portDefinitions', 'role'},
+    'pod': {'role'},
+    'group': set(),
+}
+
+
+class _Items(object):
+    """Defaults of each item of a list of objects.
+
+    :param defaults: the defaults of the item's fields
+    :type defaults: dict
+    """
+
+    def __init__(self, defaults):
+        self.defaults = defaults
+
+
+_ASSIGNED = object()
+"""Default of a nested field whose value Marathon assigns when it is unset
+or 0, like a service port; it only counts when it is given."""
+
+# Values Marathon uses for fields that aren't given. A dict holds the
+# defaults of the fields of an object, and `_Items` those of each object of
+# a list; any other value is the default of the field itself.
+HEALTH_CHECK_DEFAULTS = {
+    'protocol': 'HTTP',
+    'path': '/',
+    'portIndex': 0,
+    'gracePeriodSeconds': 300,
+    'intervalSeconds': 60,
+    'timeoutSeconds': 20,
+    'maxConsecutiveFailures': 3,
+    'delaySeconds': 15,
+    'ignoreHttp1xx': False,
+    'ipProtocol': 'IPv4',
+}
+
+APP_DEFAULTS = {
+    'instances': 1,
+    'cpus': 1,
+    'mem': 128,
+    'disk': 0,
+    'gpus': 0,
+    'executor': '',
+    'backoffSeconds': 1,
+    'backoffFactor': 1.15,
+    'maxLaunchDelaySeconds': 3600,
+    'requirePorts': False,
+    'killSelection': 'YOUNGEST_FIRST',
+    'networks': [{'mode': 'host'}],
+    'upgradeStrategy': {'minimumHealthCapacity': 1,
+                        'maximumOverCapacity': 1},
+    'unreachableStrategy': {'inactiveAfterSeconds': 0,
+                            'expungeAfterSeconds': 0},
+    'container': {
+        'docker': {'forcePullImage': False, 'privileged': False},
+        'portMappings': _Items({'protocol': 'tcp',
+                                'hostPort': 0,
+                                'servicePort': _ASSIGNED}),
+    },
+    'portDefinitions': _Items({'protocol': 'tcp', 'port': _ASSIGNED}),
+    'healthChecks': _Items(HEALTH_CHECK_DEFAULTS),
+    'fetch': _Items({'extract': True, 'executable': False, 'cache': False}),
+}
+
+POD_DEFAULTS = {
+    'scaling': {'kind': 'fixed', 'instances': 1},
+    'scheduling': {
+        'backoff': {'backoff': 1,
+                    'backoffFactor': 1.15,
+                    'maxLaunchDelay': 3600},
+        'upgrade': {'minimumHealthCapacity': 1, 'maximumOverCapacity': 1},
+        'killSelection': 'YOUNGEST_FIRST',
+        'unreachableStrategy': {'inactiveAfterSeconds': 0,
+                                'expungeAfterSeconds': 0},
+    },
+    'networks': [{'mode': 'host'}],
+    'executorResources': {'cpus': 0.1, 'mem': 32, 'disk': 10},
+    'containers': _Items({
+        'resources': {'disk': 0, 'gpus': 0},
+        'endpoints': _Items({'protocol': ['tcp']}),
+        'healthCheck': {'gracePeriodSeconds': 300,
+                        'intervalSeconds': 60,
+                        'timeoutSeconds': 20,
+                        'maxConsecutiveFailures': 3,
+                        'delaySeconds': 15},
+        'artifacts': _Items({'extract': True,
+                             'executable': False,
+                             'cache': False}),
+    }),
+}
+
+DEFAULTS = {
+    'app': APP_DEFAULTS,
+    'pod': POD_DEFAULTS,
+    'group': {},
+}
+
+CHILD_KINDS = [('apps', 'app'), ('pods', 'pod'), ('groups', 'group')]
+
+
+def canonicalize(definition, kind='app', parent_id='/'):
+    """Returns the canonical form of an app, pod or group definition, in
+    which equivalent definitions are equal: server generated fields and
+    unset or defaulted values are removed, in nested objects too, and the
+    apps, pods and subgroups of a group are keyed by absolute ID. Values
+    that don't contain any of those are shared with `definition`, not
+    copied.
+
+    :param definition: app, pod or group definition
+    :type definition: dict
+    :param kind: 'app', 'pod' or 'group'
+    :type kind: str
+    :param parent_id: ID of the enclosing group, for relative IDs
+    :type parent_id: str
+    :returns: the canonical definition
+    :rtype: dict
+    """
+
+    if kind not in DEFAULTS:
+        raise DCOSException('Unknown definition kind [{}]'.format(kind))
+
+    fields = {key: value for key, value in definition.items()
+              if key not in SERVER_GENERATED_FIELDS[kind] and
+              not (kind == 'group' and key in dict(CHILD_KINDS))}
+    canonical = _strip(fields, DEFAULTS[kind])
+
+    if 'id' in definition:
+        canonical['id'] = _absolute_id(definition['id'], parent_id)
+
+    if kind == 'group':
+        group_id = canonical.get('id', parent_id)
+        for key, child_kind in CHILD_KINDS:
+            children = {}
+            for child in definition.get(key) or []:
+                child = canonicalize(child, child_kind, group_id)
+                children[child['id']] = child
+            if children:
+                canonical[key] = children
+
+    return canonical
+
+
+def diff(desired, live, kind='app'):
+    """Computes the changes needed to turn a live app, pod or group
+    definition into the desired one.
+
+    :param desired: the desired definition
+    :type desired: dict
+    :param live: the definition Marathon returns
+    :type live: dict
+    :param kind: 'app', 'pod' or 'group'
+    :type kind: str
+    :returns: the differences, empty if the definitions are equivalent
+    :rtype: [Change]
+    """
+
+    desired = canonicalize(desired, kind)
+    live = canonicalize(live, kind)
+    _drop_server_assigned(desired, live, kind)
+
+    changes = []
+    _diff(desired, live, (), changes)
+    return changes
+
+
+def apply_app(client, app, force=False):
+    """Brings an app to its desired definition with the least disruptive
+    call: nothing if it is already there, `scale_app` if only the number of
+    instances differs, else `update_app`.
+
+    :param client: Marathon client
+    :type client: dcos.marathon.Client
+    :param app: the desired app definition
+    :type app: dict
+    :param force: whether to override running deployments
+    :type force: bool
+    :returns: the resulting deployment ID, or None if there was nothing
+              to do
+    :rtype: str | None
+    """
+
+    app_id = _absolute_id(app['id'], '/')
+    live = _get_live(client.get_app, app_id)
+    if live is None:
+        return client.update_app(app_id, app, force)
+
+    changes = diff(app, live, 'app')
+    if not changes:
+        logger.info('App %s is up to date', app_id)
+        return None
+
+    if [change.path for change in changes] == [('instances',)]:
+        return client.scale_app(app_id, _instances(changes[0]), force)
+
+    return client.update_app(app_id, app, force)
+
+
+def apply_group(client, group, force=False):
+    """Brings a group to its desired definition with the least disruptive
+    calls: nothing if it is already there, `scale_app` for each app if
+    only numbers of instances differ, else `update_group`.
+
+    :param client: Marathon client
+    :type client: dcos.marathon.Client
+    :param group: the desired group definition
+    :type group: dict
+    :param force: whether to override running deployments
+    :type force: bool
+    :returns: the resulting deployment IDs
+    :rtype: [str]
+    """
+
+    group_id = _absolute_id(group['id'], '/')
+    live = _get_live(client.get_group, group_id)
+    if live is None:
+        return [client.update_group(group_id, group, force)]
+
+    changes = diff(group, live, 'group')
+    if not changes:
+        logger.info('Group %s is up to date', group_id)
+        return []
+
+    if all(_is_app_scale(change.path) for change in changes):
+        return [client.scale_app(change.path[-2], _instances(change), force)
+                for change in changes]
+
+    return [client.update_group(group_id, group, force)]
+
+
+_NO_DEFAULT = object()
+
+
+def _strip(value, defaults):
+    """Removes unset and defaulted values from a value, recursively.
+
+    :param value: a field's value
+    :type value: object
+    :param defaults: the field's defaults, see `APP_DEFAULTS`
+    :type defaults: object
+    :returns: the value without unset and defaulted values; it is `value`
+              itself if there were none
+    :rtype: object
+    """
+
+    if isinstance(value, dict):
+        fields = defaults if isinstance(defaults, dict) else {}
+        stripped = {}
+        changed = False
+        for key, item in value.items():
+            default = fields.get(key, _NO_DEFAULT)
+            if isinstance(item, (dict, list)):
+                new_item = _strip(item, default)
+                unset = not new_item
+            else:
+                new_item = item
+                unset = item is None
+            if unset or (default is not _NO_DEFAULT and
+                         _is_default(new_item, default)):
+                changed = True
+            else:
+                stripped[key] = new_item
+                changed = changed or new_item is not item
+        return stripped if changed else value
+
+    if isinstance(value, list):
+        items = defaults.defaults if isinstance(defaults, _Items) else None
+        stripped = [_strip(item, items) if isinstance(item, (dict, list))
+                    else item for item in value]
+        if all(new is old for new, old in zip(stripped, value)):
+            return value
+        return stripped
+
+    return value
+
+
+def _is_default(value, default):
+    """
+    :param value: a field's stripped value
+    :type value: object
+    :param default: the field's defaults, see `APP_DEFAULTS`
+    :type default: object
+    :returns: whether the value is the field's default
+    :rtype: bool
+    """
+
+    if (default is _NO_DEFAULT or default is _ASSIGNED or
+            isinstance(default, (dict, _Items))):
+        return False
+    return (isinstance(value, bool) == isinstance(default, bool) and
+            value == default)
+
+
+def _absolute_id(marathon_id, parent_id):
+    """
+    :param marathon_id: an app, pod or group ID, possibly relative
+    :type marathon_id: str
+    :param parent_id: ID of the enclosing group
+    :type parent_id: str
+    :returns: the absolute ID, without trailing slashes
+    :rtype: str
+    """
+
+    if not marathon_id.startswith('/'):
+        marathon_id = parent_id.rstrip('/') + '/' + marathon_id
+    return '/' + marathon_id.strip('/')
+
+
+def _drop_server_assigned(desired, live, kind):
+    """Removes the server assigned fields from `live` that aren't given in
+    `desired`, recursively for groups.
+
+    :param desired: canonical desired definition
+    :type desired: dict
+    :param live: canonical live definition
+    :type live: dict
+    :param kind: 'app', 'pod' or 'group'
+    :type kind: str
+    :rtype: None
+    """
+
+    for key in SERVER_ASSIGNED_FIELDS[kind]:
+        if key not in desired:
+            live.pop(key, None)
+    for key, default in DEFAULTS[kind].items():
+        if key in desired and key in live:
+            desired[key], live[key] = _drop_assigned(
+                desired[key], live[key], default)
+
+    if kind == 'group':
+        for key, child_kind in CHILD_KINDS:
+            desired_children = desired.get(key, {})
+            for child_id, child in live.get(key, {}).items():
+                if child_id in desired_children:
+                    _drop_server_assigned(
+                        desired_children[child_id], child, child_kind)
+
+
+def _drop_assigned(desired, live, defaults):
+    """Removes the nested fields that Marathon assigns when the desired
+    value leaves them to Marathon.
+
+    :param desired: canonical desired value
+    :type desired: object
+    :param live: canonical live value
+    :type live: object
+    :param defaults: the value's defaults, see `APP_DEFAULTS`
+    :type defaults: object
+    :returns: the desired and live values without those fields, copied if
+              they had any
+    :rtype: (object, object)
+    """
+
+    if isinstance(defaults, _Items):
+        if not (isinstance(desired, list) and isinstance(live, list)):
+            return desired, live
+        pairs = [_drop_assigned(desired_item, live_item, defaults.defaults)
+                 for desired_item, live_item in zip(desired, live)]
+        return ([pair[0] for pair in pairs] + desired[len(pairs):],
+                [pair[1] for pair in pairs] + live[len(pairs):])
+
+    if not (isinstance(defaults, dict) and isinstance(desired, dict) and
+            isinstance(live, dict)):
+        return desired, live
+
+    desired, live = dict(desired), dict(live)
+    for key, default in defaults.items():
+        if default is _ASSIGNED:
+            if desired.get(key) in (None, 0):
+                desired.pop(key, None)
+                live.pop(key, None)
+        elif key in desired and key in live:
+            desired[key], live[key] = _drop_assigned(
+                desired[key], live[key], default)
+    return desired, live
+
+
+def _diff(desired, live, path, changes):
+    """Appends the differences between two canonical values to `changes`
+
+    :param desired: desired value
+    :type desired: object
+    :param live: live value
+    :type live: object
+    :param path: the keys leading to the values
+    :type path: tuple
+    :param changes: the differences found so far
+    :type changes: [Change]
+    :rtype: None
+    """
+
+    if isinstance(desired, dict) and isinstance(live, dict):
+        for key in sorted(set(desired) | set(live)):
+            _diff(desired.get(key), live.get(key), path + (key,), changes)
+    elif (isinstance(desired, list) and isinstance(live, list) and
+            len(desired) == len(live)):
+        for index, (desired_item, live_item) in enumerate(zip(desired, live)):
+            _diff(desired_item, live_item, path + (index,), changes)
+    elif desired != live:
+        changes.append(Change(path, desired, live))
+
+
+def _is_app_scale(path):
+    """
+    :param path: path of a change within a group
+    :type path: tuple
+    :returns: whether the change is to the number of instances of an app
+    :rtype: bool
+    """
+
+    return len(path) >= 3 and path[-3] == 'apps' and path[-1] == 'instances'
+
+
+def _instances(change):
+    """
+    :param change: a change to the number of instances of an app
+    :type change: Change
+    :returns: the desired number of instances
+    :rtype: int
+    """
+
+    if change.desired is None:
+        return APP_DEFAULTS['instances']
+    return change.desired
+
+
+def _get_live(get_fn, marathon_id):
+    """Fetches a live definition, treating errors as it not existing: the
+    update that follows creates it, or reports the same error.
+
+    :param get_fn: function fetching the definition
+    :type get_fn: function
+    :param marathon_id: the app or group ID
+    :type marathon_id: str
+    :returns: the live definition, or None
+    :rtype: dict | None
+    """
+
+    try:
+        return get_fn(marathon_id)
+    except DCOSException as e:
+        logger.info('Unable to fetch %s, updating it: %s', marathon_id, e)
+        return None
@@ -1,5 +1,8 @@
 import base64
+import collections
+import concurrent.futures
 import fnmatch
+import io
 import itertools
 import json
 import os
@@ -14,7 +17,7 @@ from functools import partial
 from six.moves import urllib
 from six.moves.queue import Queue
 
-from dcos import config, http, recordio, util
+from dcos import asynchttp, config, http, recordio, util
 
 from dcos.errors import DCOSException, DCOSHTTPException
 
@@ -22,6 +25,11 @@ if not util.is_windows_platform():
     import termios
     import tty
 
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
 logger = util.get_logger(__name__)
 
 
@@ -31,6 +39,31 @@ COMPLETED_TASK_STATES = [
     "TASK_UNKNOWN"
 ]
 
+ExecResult = collections.namedtuple(
+    'ExecResult',
+    ['task_id', 'exit_status', 'stdout', 'stderr', 'error'])
+"""Outcome of running a command in a task's container with `exec_tasks`.
+
+:param task_id: the task's ID
+:type task_id: str
+:param exit_status: the command's exit status as reported by the agent, a
+                    wait(2) status, or None if it couldn't be obtained
+:type exit_status: int | None
+:param stdout: the command's STDOUT, or the path of the file it was
+               written to
+:type stdout: bytes | str
+:param stderr: the command's STDERR, or the path of the file it was
+               written to
+:type stderr: bytes | str
+:param error: the error that prevented running the command, if any
+:type error: DCOSException | None
+"""
+
+DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+DOWNLOAD_WORKERS = 8
+TAIL_WORKERS = 20
+TAIL_POLL_CHUNKS = 16
+
 
 def get_master(dcos_client=None):
     """Create a Master object using the url stored in the
@@ -44,7 +77,7 @@ def get_master(dcos_client=None):
     """
 
     dcos_client = dcos_client or DCOSClient()
-    return Master(dcos_client.get_master_state())
+    return Master(dcos_client.get_master_state(), dcos_client)
 
 
 class DCOSClient(object):
@@ -303,6 +336,152 @@ class DCOSClient(object):
             data=json.dumps(message),
             headers=headers)
 
+    def master_subscribe(self):
+        """Subscribe to the master's v1 operator API event stream.
+
+        The response streams RecordIO encoded JSON events, starting with a
+        SUBSCRIBED event that holds the full state of the cluster.
+
+        :returns: the streaming response
+        :rtype: requests.Response
+        """
+
+        message = {'type': 'SUBSCRIBE'}
+
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/recordio',
+            'Message-Accept': 'application/json'}
+
+        return http.post(
+            self.master_url('api/v1'),
+            data=json.dumps(message),
+            headers=headers,
+            stream=True,
+            timeout=None)
+
+
+class AsyncDCOSClient(DCOSClient):
+    """Client for communicating with DC/OS from an asyncio event loop. Its
+    read methods return futures of what `DCOSClient` returns; the others
+    block as in `DCOSClient`.
+    """
+
+    def get_master_state(self):
+        """Get the Mesos master state json object
+
+        :returns: future of Mesos' master state json object
+        :rtype: asyncio.Future
+        """
+
+        return self._get(self.master_url('master/state.json'))
+
+    def get_slave_state(self, slave_id, private_url):
+        """Get the Mesos slave state json object
+
+        :param slave_id: slave ID
+        :type slave_id: str
+        :param private_url: The slave's private URL derived from its
+                            pid.  Used when we're accessing mesos
+                            directly, rather than through DC/OS.
+        :type private_url: str
+        :returns: future of Mesos' slave state json object
+        :rtype: asyncio.Future
+        """
+
+        return self._get(self.slave_url(slave_id, private_url, 'state.json'))
+
+    def get_state_summary(self):
+        """Get the Mesos master state summary json object
+
+        :returns: future of Mesos' master state summary json object
+        :rtype: asyncio.Future
+        """
+
+        return self._get(self.master_url('master/state-summary'))
+
+    def slave_file_read(self, slave_id, private_url, path, offset, length):
+        """See `DCOSClient.master_file_read`
+
+        :param slave_id: slave ID
+        :type slave_id: str
+        :param private_url: The slave's private URL derived from its
+                            pid.  Used when we're accessing mesos
+                            directly, rather than through DC/OS.
+        :type private_url: str
+        :param path: absolute path to read
+        :type path: str
+        :param offset: start byte location, or -1
+        :type offset: int
+        :param length: number of bytes to read, or -1
+        :type length: int
+        :returns: future of the files/read.json response
+        :rtype: asyncio.Future
+        """
+
+        url = self.slave_url(slave_id, private_url, 'files/read.json')
+        params = {'path': path,
+                  'length': length,
+                  'offset': offset}
+        return self._get(url, params=params)
+
+    def master_file_read(self, path, length, offset):
+        """See `DCOSClient.master_file_read`
+
+        :param path: absolute path to read
+        :type path: str
+        :param length: number of bytes to read, or -1
+        :type length: int
+        :param offset: start byte location, or -1
+        :type offset: int
+        :returns: future of the files/read.json response
+        :rtype: asyncio.Future
+        """
+
+        params = {'path': path,
+                  'length': length,
+                  'offset': offset}
+        return self._get(self.master_url('files/read.json'), params=params)
+
+    def metadata(self):
+        """ GET /metadata
+
+        :returns: future of the /metadata content
+        :rtype: asyncio.Future
+        """
+
+        return self._get(self.get_dcos_url('metadata'))
+
+    def browse(self, slave, path):
+        """ GET /files/browse.json, see `DCOSClient.browse`
+
+        :param slave: slave to issue the request on
+        :type slave: Slave
+        :param path: path to run ls on
+        :type path: str
+        :returns: future of the /files/browse.json response
+        :rtype: asyncio.Future
+        """
+
+        url = self.slave_url(slave['id'],
+                             slave.http_url(),
+                             'files/browse.json')
+        return self._get(url, params={'path': path})
+
+    def _get(self, url, params=None):
+        """Sends a GET request and parses the JSON response body.
+
+        :param url: the URL to get
+        :type url: str
+        :param params: the query parameters
+        :type params: dict | None
+        :returns: future of the parsed body
+        :rtype: asyncio.Future
+        """
+
+        response = asynchttp.get(url, params=params, timeout=self._timeout)
+        return asynchttp.then(response, lambda r: r.json())
+
 
 class MesosDNSClient(object):
     """ Mesos-DNS client
@@ -357,13 +536,21 @@ class Master(object):
 
     :param state: Mesos master's state.json
     :type state: dict
+    :param dcos_client: client to use for network requests
+    :type dcos_client: DCOSClient | None
     """
 
-    def __init__(self, state):
+    def __init__(self, state, dcos_client=None):
         self._state = state
+        self._dcos_client = dcos_client
         self._frameworks = {}
         self._slaves = {}
 
+        # id -> dict indexes over `state`, built on first use
+        self._slave_index = None
+        self._framework_index = None
+        self._task_index = None
+
     def state(self):
         """Returns master's master/state.json.
 
@@ -384,6 +571,10 @@ class Master(object):
         :rtype: Slave
         """
 
+        slave = self._slave_dicts().get(fltr)
+        if slave is not None:
+            return self._slave_obj(slave)
+
         slaves = self.slaves(fltr)
 
         if len(slaves) == 0:
@@ -440,10 +631,10 @@ class Master(object):
         :rtype: Framework
         """
 
-        for f in self._framework_dicts(True, True):
-            if f['id'] == framework_id:
-                return self._framework_obj(f)
-        return None
+        framework = self._framework_dicts_by_id().get(framework_id)
+        if framework is None:
+            return None
+        return self._framework_obj(framework)
 
     def slaves(self, fltr=""):
         """Returns those slaves that have `fltr` in their 'id'
@@ -540,6 +731,51 @@ class Master(object):
         return [self._framework_obj(framework)
                 for framework in self._framework_dicts(inactive, completed)]
 
+    def prefetch_agent_states(self, agent_ids=None,
+                              workers=util.STREAM_CONCURRENCY):
+        """Fetches the state.json of several agents concurrently, so that
+        their tasks' executors and sandboxes can be resolved without a
+        round trip per agent. Agents whose state was already fetched are
+        skipped, and agents that fail are left to be fetched on demand.
+
+        :param agent_ids: IDs of the agents to fetch, or None for all of
+                          them
+        :type agent_ids: [str] | None
+        :param workers: maximum number of concurrent requests
+        :type workers: int
+        :rtype: None
+        """
+
+        slave_dicts = self._slave_dicts()
+        if agent_ids is None:
+            agent_ids = slave_dicts.keys()
+
+        slaves = [self._slave_obj(slave_dicts[agent_id])
+                  for agent_id in set(agent_ids)
+                  if agent_id in slave_dicts]
+        slaves = [slave for slave in slaves if slave._state is None]
+
+        # create the shared client before the workers race to do it
+        self.dcos_client()
+        for job, slave in util.stream(Slave.state, slaves, workers):
+            try:
+                job.result()
+            except DCOSException:
+                logger.exception('Error fetching state of agent %s',
+                                 slave['id'])
+
+    def dcos_client(self):
+        """Returns the client used for network requests on behalf of this
+        master and its agents.
+
+        :returns: client
+        :rtype: DCOSClient
+        """
+
+        if self._dcos_client is None:
+            self._dcos_client = DCOSClient()
+        return self._dcos_client
+
     @util.duration
     def fetch(self, path, **kwargs):
         """GET the resource located at `path`
@@ -555,6 +791,51 @@ class Master(object):
         url = urllib.parse.urljoin(self._base_url(), path)
         return http.get(url, **kwargs)
 
+    def _task_entry(self, task_id):
+        """Returns the framework and task dictionaries for the task with the
+        given ID, including completed tasks.
+
+        :param task_id: the task's ID
+        :type task_id: str
+        :returns: (framework, task) or None if there is no such task
+        :rtype: (dict, dict) | None
+        """
+
+        if self._task_index is None:
+            index = {}
+            for framework in self._framework_dicts(True, True, True):
+                for task in _merge(framework, ['tasks', 'completed_tasks']):
+                    index.setdefault(task['id'], (framework, task))
+            self._task_index = index
+        return self._task_index.get(task_id)
+
+    def _slave_dicts(self):
+        """Returns the slave dictionaries from the state.json, by ID
+
+        :returns: slaves by ID
+        :rtype: {str: dict}
+        """
+
+        if self._slave_index is None:
+            self._slave_index = {slave['id']: slave
+                                 for slave in self.state()['slaves']}
+        return self._slave_index
+
+    def _framework_dicts_by_id(self):
+        """Returns the framework dictionaries from the state.json, by ID,
+        including inactive and completed frameworks
+
+        :returns: frameworks by ID
+        :rtype: {str: dict}
+        """
+
+        if self._framework_index is None:
+            index = {}
+            for framework in self._framework_dicts(True, True):
+                index.setdefault(framework['id'], framework)
+            self._framework_index = index
+        return self._framework_index
+
     def _slave_obj(self, slave):
         """Returns the Slave object corresponding to the provided `slave`
         dict.  Creates it if it doesn't exist already.
@@ -621,6 +902,9 @@ class Slave(object):
         self._state = state
         self._master = master
 
+        # task id -> executor dict over `state`, built on first use
+        self._executor_index = None
+
     def state(self):
         """Get the slave's state.json object.  Fetch it if it's not already
         an instance variable.
@@ -630,8 +914,12 @@ class Slave(object):
         """
 
         if not self._state:
-            self._state = DCOSClient().get_slave_state(self['id'],
-                                                       self.http_url())
+            if self._master is None:
+                dcos_client = DCOSClient()
+            else:
+                dcos_client = self._master.dcos_client()
+            self._state = dcos_client.get_slave_state(self['id'],
+                                                      self.http_url())
         return self._state
 
     def http_url(self):
@@ -664,6 +952,27 @@ class Slave(object):
                  for framework in self._framework_dicts()]
         return itertools.chain(*iters)
 
+    def executor(self, task_id):
+        """Returns the executor of a task running on this slave
+
+        :param task_id: the task's ID
+        :type task_id: str
+        :returns: the task's executor, or None if there is no such task
+        :rtype: dict | None
+        """
+
+        if self._executor_index is None:
+            index = {}
+            for executor in self.executor_dicts():
+                tasks = _merge(executor,
+                               ['completed_tasks',
+                                'tasks',
+                                'queued_tasks'])
+                for task in tasks:
+                    index.setdefault(task['id'], executor)
+            self._executor_index = index
+        return self._executor_index.get(task_id)
+
     def fault_domain(self):
         """ Fault domain for a given task e.g.
 
@@ -711,6 +1020,13 @@ class Framework(object):
         :rtype: Task
         """
 
+        entry = self._master._task_entry(task_id)
+        if entry is None:
+            return None
+        elif entry[0] is self._framework:
+            return self._task_obj(entry[1])
+
+        # The same task ID is used by another framework
         for task in _merge(self._framework, ['tasks', 'completed_tasks']):
             if task['id'] == task_id:
                 return self._task_obj(task)
@@ -807,14 +1123,8 @@ class Task(object):
         :returns: task's executor
         :rtype: dict
         """
-        for executor in self.slave().executor_dicts():
-            tasks = _merge(executor,
-                           ['completed_tasks',
-                            'tasks',
-                            'queued_tasks'])
-            if any(task['id'] == self['id'] for task in tasks):
-                return executor
-        return None
+
+        return self.slave().executor(self['id'])
 
     def directory(self):
         """ Sandbox directory for this task
@@ -831,10 +1141,11 @@ class Task(object):
         :returns: fault domain structure
         :rtype: dict | None
         """
-        if self.slave() is None:
+        slave = self.slave()
+        if slave is None:
             return None
         else:
-            return self.slave().fault_domain()
+            return slave.fault_domain()
 
     def __getitem__(self, name):
         """Support the task[attr] syntax
@@ -860,9 +1171,324 @@ class Task(object):
         return name in self._task
 
 
+class MesosStateMirror(object):
+    """In-memory mirror of the Mesos master state, kept up to date with the
+    v1 operator API event stream instead of repeatedly downloading
+    master/state.json.
+
+    The mirror is initialized from the SUBSCRIBED event and then applies
+    TASK_ADDED, TASK_UPDATED, AGENT_ADDED, AGENT_REMOVED, FRAMEWORK_ADDED,
+    FRAMEWORK_UPDATED and FRAMEWORK_REMOVED events as they arrive. The state
+    is kept in the state.json format, so `snapshot()` returns a regular
+    `Master`.
+
+    :param dcos_client: client to use for network requests
+    :type dcos_client: DCOSClient | None
+    :param max_completed_tasks: number of completed tasks to keep per
+                                framework, like the master's
+                                --max_completed_tasks_per_framework flag
+    :type max_completed_tasks: int
+    """
+
+    def __init__(self, dcos_client=None, max_completed_tasks=1000):
+        self._dcos_client = dcos_client
+        self._max_completed_tasks = max_completed_tasks
+
+        self._lock = threading.Lock()
+        self._agents = collections.OrderedDict()
+        self._frameworks = collections.OrderedDict()
+        self._completed_frameworks = collections.OrderedDict()
+        # framework id -> task id -> task
+        self._tasks = {}
+        self._completed_tasks = {}
+        self._snapshot = None
+
+        self._response = None
+        self._thread = None
+        self._stopped = False
+        self._subscribed_event = threading.Event()
+        # set once subscribed, or once the event stream ended without it
+        self._ready_event = threading.Event()
+        self.exception = None
+
+    def start(self):
+        """Subscribe to the master and apply its events on a background
+        thread.
+
+        :rtype: None
+        """
+
+        dcos_client = self._dcos_client or DCOSClient()
+        self._response = dcos_client.master_subscribe()
+
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop applying events and close the event stream.
+
+        :rtype: None
+        """
+
+        self._stopped = True
+        if self._response is not None:
+            self._response.close()
+
+    def wait(self, timeout=None):
+        """Wait until the mirror holds the state of the cluster. Raises the
+        error that ended the event stream, if it ended.
+
+        :param timeout: number of seconds to wait, or None to wait forever
+        :type timeout: float | None
+        :returns: whether the mirror is subscribed
+        :rtype: bool
+        """
+
+        self._ready_event.wait(timeout)
+        if self.exception is not None:
+            raise self.exception
+        return self._subscribed_event.is_set()
+
+    def consume(self, chunks):
+        """Decode RecordIO encoded events from `chunks` and apply them.
+
+        :param chunks: chunks of the event stream
+        :type chunks: iterable of bytes
+        :rtype: None
+        """
+
+        decoder = recordio.Decoder(lambda s: json.loads(s.decode("UTF-8")))
+        for chunk in chunks:
+            for event in decoder.decode_iter(chunk):
+                if self._stopped:
+                    return
+                self.apply(event)
+
+    def apply(self, event):
+        """Apply a single operator API event to the mirrored state.
+
+        :param event: the decoded event
+        :type event: dict
+        :rtype: None
+        """
+
+        event_type = event.get('type')
+        handler = self._handlers.get(event_type)
+        if handler is None:
+            logger.debug('Ignoring Mesos event: %s', event_type)
+            return
+
+        with self._lock:
+            handler(self, event[event_type.lower()])
+            self._snapshot = None
+
+        if event_type == 'SUBSCRIBED':
+            self._subscribed_event.set()
+            self._ready_event.set()
+
+    def state(self):
+        """Returns the mirrored state in the format of master/state.json.
+
+        :returns: state.json
+        :rtype: dict
+        """
+
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._build_state()
+            return self._snapshot
+
+    def snapshot(self):
+        """Returns a Master for the current mirrored state. Raises the error
+        that ended the event stream, if it ended, since the state is stale.
+
+        :returns: master state object
+        :rtype: Master
+        """
+
+        if self.exception is not None:
+            raise self.exception
+        if not self._subscribed_event.is_set():
+            raise DCOSException(
+                "The Mesos state mirror hasn't received the state yet")
+        return Master(self.state(), self._dcos_client)
+
+    def _run(self):
+        """Consume the event stream of the subscription, saving exceptions,
+        and the end of the stream, so they can be raised by `wait()` and
+        `snapshot()`.
+        """
+
+        try:
+            self.consume(self._response.iter_content(chunk_size=None))
+            if not self._stopped:
+                self.exception = DCOSException(
+                    'The Mesos event stream was closed by the master')
+        except Exception as e:
+            if not self._stopped:
+                logger.exception('Error reading Mesos event stream')
+                self.exception = e
+        finally:
+            self._ready_event.set()
+
+    def _build_state(self):
+        """Build a state.json dictionary from the mirrored objects. Tasks are
+        copied since `Task` objects annotate them.
+
+        :returns: state.json
+        :rtype: dict
+        """
+
+        def _framework(framework):
+            framework = dict(framework)
+            framework['tasks'] = [
+                dict(task) for task in
+                self._tasks.get(framework['id'], {}).values()]
+            framework['completed_tasks'] = [
+                dict(task) for task in
+                self._completed_tasks.get(framework['id'], {}).values()]
+            return framework
+
+        return {
+            'slaves': list(self._agents.values()),
+            'frameworks': [_framework(f) for f in self._frameworks.values()],
+            'completed_frameworks': [
+                _framework(f) for f in self._completed_frameworks.values()],
+        }
+
+    def _on_subscribed(self, subscribed):
+        """Reset the mirror from the state sent with SUBSCRIBED."""
+
+        get_state = subscribed.get('get_state', {})
+
+        self._agents.clear()
+        self._frameworks.clear()
+        self._completed_frameworks.clear()
+        self._tasks.clear()
+        self._completed_tasks.clear()
+
+        for agent in get_state.get('get_agents', {}).get('agents', []):
+            self._on_agent_added({'agent': agent})
+
+        get_frameworks = get_state.get('get_frameworks', {})
+        for framework in get_frameworks.get('frameworks', []):
+            self._on_framework_added({'framework': framework})
+        for framework in get_frameworks.get('completed_frameworks', []):
+            framework = _v0_framework(framework)
+            self._completed_frameworks[framework['id']] = framework
+
+        get_tasks = get_state.get('get_tasks', {})
+        for task in get_tasks.get('tasks', []):
+            self._on_task_added({'task': task})
+        for task in get_tasks.get('completed_tasks', []):
+            self._add_completed_task(_v0_task(task))
+
+    def _on_task_added(self, task_added):
+        """Apply TASK_ADDED."""
+
+        task = _v0_task(task_added['task'])
+        self._framework_tasks(task['framework_id'])[task['id']] = task
+
+    def _on_task_updated(self, task_updated):
+        """Apply TASK_UPDATED, moving the task to the completed tasks once
+        it reaches a terminal state."""
+
+        status = task_updated['status']
+        framework_id = _v1_value(task_updated.get('framework_id'))
+        task_id = _v1_value(status.get('task_id'))
+
+        tasks = self._framework_tasks(framework_id)
+        task = tasks.get(task_id)
+        if task is None:
+            logger.debug('Update for unknown task: %s', task_id)
+            return
+
+        task['state'] = task_updated.get('state', status.get('state'))
+        task['statuses'] = task['statuses'] + [status]
+
+        if task['state'] in COMPLETED_TASK_STATES:
+            del tasks[task_id]
+            self._add_completed_task(task)
+
+    def _on_agent_added(self, agent_added):
+        """Apply AGENT_ADDED."""
+
+        agent = _v0_agent(agent_added['agent'])
+        self._agents[agent['id']] = agent
+
+    def _on_agent_removed(self, agent_removed):
+        """Apply AGENT_REMOVED."""
+
+        self._agents.pop(_v1_value(agent_removed.get('agent_id')), None)
+
+    def _on_framework_added(self, framework_added):
+        """Apply FRAMEWORK_ADDED and FRAMEWORK_UPDATED."""
+
+        framework = _v0_framework(framework_added['framework'])
+        self._frameworks[framework['id']] = framework
+
+    def _on_framework_removed(self, framework_removed):
+        """Apply FRAMEWORK_REMOVED, completing the framework's tasks."""
+
+        framework_id = _v1_value(framework_removed['framework_info']['id'])
+        framework = self._frameworks.pop(framework_id, None)
+        if framework is None:
+            framework = _v0_framework(
+                {'framework_info': framework_removed['framework_info']})
+        framework['active'] = False
+        self._completed_frameworks[framework_id] = framework
+
+        for task in self._tasks.pop(framework_id, {}).values():
+            self._add_completed_task(task)
+
+    def _framework_tasks(self, framework_id):
+        """Returns the running tasks of a framework, by task ID.
+
+        :param framework_id: the framework's ID
+        :type framework_id: str
+        :returns: task id -> task
+        :rtype: OrderedDict
+        """
+
+        if framework_id not in self._tasks:
+            self._tasks[framework_id] = collections.OrderedDict()
+        return self._tasks[framework_id]
+
+    def _add_completed_task(self, task):
+        """Add a task to the completed tasks of its framework, dropping the
+        oldest completed task if there are too many.
+
+        :param task: task
+        :type task: dict
+        """
+
+        framework_id = task['framework_id']
+        if framework_id not in self._completed_tasks:
+            self._completed_tasks[framework_id] = collections.OrderedDict()
+
+        completed = self._completed_tasks[framework_id]
+        completed[task['id']] = task
+        while len(completed) > self._max_completed_tasks:
+            completed.popitem(last=False)
+
+    _handlers = {
+        'SUBSCRIBED': _on_subscribed,
+        'TASK_ADDED': _on_task_added,
+        'TASK_UPDATED': _on_task_updated,
+        'AGENT_ADDED': _on_agent_added,
+        'AGENT_REMOVED': _on_agent_removed,
+        'FRAMEWORK_ADDED': _on_framework_added,
+        'FRAMEWORK_UPDATED': _on_framework_added,
+        'FRAMEWORK_REMOVED': _on_framework_removed,
+    }
+
+
 class MesosFile(object):
     """File-like object that is backed by a remote slave or master file.
-    Uses the files/read.json endpoint.
+    Uses the files/read.json endpoint, which returns the data as JSON text:
+    only UTF-8 text files can be read exactly, other data raises a
+    DCOSException.
 
     If `task` is provided, the file host is `task.slave()`.  If
     `slave` is provided, the file host is `slave`.  It is invalid to
@@ -897,6 +1523,7 @@ class MesosFile(object):
         self._path = path
         self._dcos_client = dcos_client or DCOSClient()
         self._cursor = 0
+        self._resolved_path = None
 
     def size(self):
         """Size of the file
@@ -950,36 +1577,275 @@ class MesosFile(object):
         :rtype: str
         """
 
-        data = ''
-        while length is None or length - len(data) > 0:
-            chunk_length = -1 if length is None else length - len(data)
-            chunk = self._fetch_chunk(chunk_length)
-            if chunk == '':
-                break
-            data += chunk
+        data = bytearray()
+        for chunk in self.iter_chunks(length=length):
+            data.extend(chunk)
 
-        return data
+        return data.decode('utf-8')
 
-    def _host_path(self):
-        """ The absolute path to the file on slave.
+    def iter_chunks(self, chunk_size=-1, length=None):
+        """Reads the file from the current cursor position, yielding it
+        chunk by chunk until `length` bytes have been read or the end of
+        the file is reached.
 
-        :returns: the absolute path to the file on slave
-        :rtype: str
+        :param chunk_size: maximum number of bytes to fetch per request.
+                           -1 lets the host choose its maximum.
+        :type chunk_size: int
+        :param length: number of bytes to read, or None to read up to
+                       the end of the file
+        :type length: int | None
+        :returns: generator of data chunks
+        :rtype: generator of bytes
         """
 
-        if self._task:
-            directory = self._task.directory().rstrip('/')
-            executor = self._task.executor()
-            # executor.type is currently used only by pods. All tasks in a pod
-            # share an executor, so if this is a pod, get the task logs instead
-            # of the executor logs
-            if executor.get('type') == "DEFAULT":
-                task_id = self._task.dict().get('id')
-                return directory + '/tasks/{}/'.format(task_id) + self._path
+        remaining = length
+        while remaining is None or remaining > 0:
+            if remaining is None:
+                chunk_length = chunk_size
+            elif chunk_size < 0:
+                chunk_length = remaining
             else:
-                return directory + '/' + self._path
-        else:
-            return self._path
+                chunk_length = min(chunk_size, remaining)
+
+            chunk = self._fetch_bytes(chunk_length)
+            if not chunk:
+                return
+
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+    def copy_to(self, sink, chunk_size=-1, length=None):
+        """Writes the file from the current cursor position to `sink`,
+        without holding more than one chunk in memory.
+
+        :param sink: binary file-like object to write to
+        :type sink: file
+        :param chunk_size: maximum number of bytes to fetch per request.
+                           -1 lets the host choose its maximum.
+        :type chunk_size: int
+        :param length: number of bytes to copy, or None to copy up to
+                       the end of the file
+        :type length: int | None
+        :returns: number of bytes written
+        :rtype: int
+        """
+
+        written = 0
+        for chunk in self.iter_chunks(chunk_size, length):
+            sink.write(chunk)
+            written += len(chunk)
+
+        return written
+
+    def follow(self, chunk_size=-1, min_interval=0.1, max_interval=5.0,
+               stop=None):
+        """Tails the file from the current cursor position, yielding new
+        data as it is appended.
+
+        The file is polled again immediately while data is flowing.
+        Once a poll comes back empty, the interval between polls doubles
+        after every empty poll, from `min_interval` up to
+        `max_interval`, and drops back to `min_interval` as soon as new
+        data shows up.
+
+        :param chunk_size: maximum number of bytes to fetch per request.
+                           -1 lets the host choose its maximum.
+        :type chunk_size: int
+        :param min_interval: seconds to wait after the first empty poll
+        :type min_interval: float
+        :param max_interval: maximum number of seconds between polls
+        :type max_interval: float
+        :param stop: event that ends the generator when set. If None,
+                     the generator never ends on its own.
+        :type stop: threading.Event | None
+        :returns: generator of data chunks
+        :rtype: generator of bytes
+        """
+
+        interval = min_interval
+        while stop is None or not stop.is_set():
+            chunk = self._fetch_bytes(chunk_size)
+            if chunk:
+                interval = min_interval
+                yield chunk
+                continue
+
+            if stop is None:
+                time.sleep(interval)
+            else:
+                stop.wait(interval)
+            interval = min(interval * 2, max_interval)
+
+    def download(self, dest, workers=DOWNLOAD_WORKERS,
+                 chunk_size=DOWNLOAD_CHUNK_SIZE):
+        """Downloads the whole file to `dest`.
+
+        The file is split into ranges of `chunk_size` bytes which are
+        fetched by `workers` concurrent requests and written in place
+        into `dest`, preallocated to the size of the file. Completed
+        ranges are recorded in a `<dest>.progress` file, so an
+        interrupted or failed download of the same file picks up where
+        it left off when called again. The progress file is removed
+        once the download is complete.
+
+        :param dest: local path to write the file to
+        :type dest: str
+        :param workers: number of ranges to fetch at once
+        :type workers: int
+        :param chunk_size: number of bytes in each range
+        :type chunk_size: int
+        :returns: number of bytes transferred by this call, seconds it
+                  took and resulting throughput in bytes per second
+        :rtype: dict
+        """
+
+        size = self.size()
+        source = {
+            'path': self._host_path(),
+            'size': size,
+            'chunk_size': chunk_size
+        }
+        progress_path = dest + '.progress'
+        done = _load_download_progress(progress_path, dest, source)
+        offsets = range(0, size, chunk_size)
+        pending = [offset for offset in offsets if offset not in done]
+
+        def fetch(offset):
+            length = min(chunk_size, size - offset)
+            data = self._read_range(offset, length)
+            if len(data) != length:
+                raise DCOSException(
+                    'Read {} bytes instead of {} at offset {}'.format(
+                        len(data), length, offset))
+            _pwrite(fd, data, offset, lock)
+            return len(data)
+
+        lock = threading.Lock()
+        errors = []
+        transferred = 0
+        start = time.time()
+        saved = start
+
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+        fd = os.open(dest, flags, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            for job, offset in util.stream(fetch, pending, workers):
+                try:
+                    transferred += job.result()
+                except (DCOSException, IOError, OSError) as e:
+                    logger.exception(
+                        'Error downloading range at offset %d of %s',
+                        offset, self)
+                    errors.append(e)
+                    continue
+
+                done.add(offset)
+                if time.time() - saved >= 1:
+                    _save_download_progress(progress_path, source, done)
+                    saved = time.time()
+        finally:
+            os.close(fd)
+            # whatever stopped the download, keep what completed so that
+            # the next call resumes from there
+            if len(done) < len(offsets):
+                _save_download_progress(progress_path, source, done)
+
+        if errors:
+            raise DCOSException(
+                'Failed to download {} of {} ranges of {}: {}. Download '
+                'again to resume'.format(
+                    len(errors), len(pending), self, errors[0]))
+
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+
+        elapsed = time.time() - start
+        throughput = transferred / elapsed if elapsed > 0 else 0
+        logger.info('Downloaded %d bytes of %s in %.2fs (%.0f bytes/s)',
+                    transferred, self, elapsed, throughput)
+        return {
+            'bytes': transferred,
+            'seconds': elapsed,
+            'bytes_per_second': throughput
+        }
+
+    def _read_range(self, offset, length):
+        """Fetch `length` bytes starting at `offset`, with as many requests
+        as the host needs. Doesn't use or move the file's cursor.
+
+        The range can start or end inside a multibyte character, which
+        files/read.json can't return on its own, so up to 3 more bytes are
+        read on each side: the bytes before the first complete character
+        come back as U+FFFD and are skipped, then the data is cut to the
+        range.
+
+        :param offset: start location
+        :type offset: int
+        :param length: number of bytes to fetch
+        :type length: int
+        :returns: data read; shorter than `length` at the end of the file
+        :rtype: bytes
+        """
+
+        start = max(offset - 3, 0)
+        end = offset + length + 3
+        position = start
+        data = bytearray()
+        while position < end:
+            params = self._params(end - position, position)
+            text = self._fetch(params)["data"]
+            if position == start:
+                # continuation bytes of a character starting before `start`
+                skipped = len(text) - len(text.lstrip(u'\ufffd'))
+                if start + skipped > offset:
+                    raise DCOSException(
+                        'The file is not UTF-8 text and cannot be read '
+                        'exactly')
+                text = text[skipped:]
+                start = position = start + skipped
+            chunk = _file_data_bytes(text, end - position)
+            if not chunk:
+                break
+            data.extend(chunk)
+            position += len(chunk)
+
+        return bytes(data[offset - start:offset - start + length])
+
+    def _host_path(self):
+        """ The absolute path to the file on slave.
+
+        :returns: the absolute path to the file on slave
+        :rtype: str
+        """
+
+        # resolving a task's sandbox may fetch the agent's state, so only
+        # do it once per file rather than once per chunk
+        if self._resolved_path is None:
+            self._resolved_path = self._resolve_host_path()
+        return self._resolved_path
+
+    def _resolve_host_path(self):
+        """ Computes the absolute path to the file on slave.
+
+        :returns: the absolute path to the file on slave
+        :rtype: str
+        """
+
+        if self._task:
+            directory = self._task.directory().rstrip('/')
+            executor = self._task.executor()
+            # executor.type is currently used only by pods. All tasks in a pod
+            # share an executor, so if this is a pod, get the task logs instead
+            # of the executor logs
+            if executor.get('type') == "DEFAULT":
+                task_id = self._task.dict().get('id')
+                return directory + '/tasks/{}/'.format(task_id) + self._path
+            else:
+                return directory + '/' + self._path
+        else:
+            return self._path
 
     def _params(self, length, offset=None):
         """GET parameters to send to files/read.json.  See the MesosFile
@@ -1018,8 +1884,21 @@ class MesosFile(object):
         if offset is not None:
             self.seek(offset, os.SEEK_SET)
 
+        return self._fetch_bytes(length).decode('utf-8')
+
+    def _fetch_bytes(self, length):
+        """Fetch data from files/read.json at the current cursor position
+        and advance the cursor past it.
+
+        :param length: number of bytes to fetch
+        :type length: int
+        :returns: data read
+        :rtype: bytes
+        """
+
         params = self._params(length)
-        data = self._fetch(params)["data"]
+        data = _file_data_bytes(self._fetch(params)["data"], length)
+        # offsets are in bytes, not characters
         self.seek(len(data), os.SEEK_CUR)
         return data
 
@@ -1054,6 +1933,376 @@ class MesosFile(object):
             return "master:{0}".format(self._path)
 
 
+def tail_tasks(fltr=None, path='stdout', completed=False, all_=False,
+               from_start=False, workers=TAIL_WORKERS, min_interval=0.5,
+               max_interval=10.0, stop=None, dcos_client=None):
+    """Follows a file in the sandbox of every task matching `fltr` and
+    yields their lines, merged in the order they are read.
+
+    Each task's file is read from its own offset. The files are polled
+    concurrently by at most `workers` requests at a time. A file with new
+    data is polled again right away, and an idle file waits twice as long
+    after each empty poll, from `min_interval` up to `max_interval`
+    seconds. A poll reads at most `TAIL_POLL_CHUNKS` chunks, so a large
+    file read from the start doesn't hold up the others.
+
+    :param fltr: task filter, as in `Master.tasks`
+    :type fltr: str | None
+    :param path: file's path, relative to the task's sandbox
+    :type path: str
+    :param completed: completed tasks only
+    :type completed: bool
+    :param all_: If True, include all tasks
+    :type all_: bool
+    :param from_start: read the files from the beginning rather than
+                       only the data appended from now on
+    :type from_start: bool
+    :param workers: maximum number of concurrent requests
+    :type workers: int
+    :param min_interval: seconds to wait after the first empty poll
+    :type min_interval: float
+    :param max_interval: maximum number of seconds between polls
+    :type max_interval: float
+    :param stop: event that ends the generator when set, as soon as the
+                 requests in flight return. If None, the generator never
+                 ends on its own.
+    :type stop: threading.Event | None
+    :param dcos_client: client to use for network requests
+    :type dcos_client: DCOSClient | None
+    :returns: generator of (task id, line) tuples
+    :rtype: generator of (str, str)
+    """
+
+    dcos_client = dcos_client or DCOSClient()
+    master = get_master(dcos_client)
+    tasks = master.tasks(fltr, completed, all_)
+    if not tasks:
+        return
+
+    master.prefetch_agent_states({task['slave_id'] for task in tasks},
+                                 workers)
+    tails = [_TaskLogTail(task, path, from_start, dcos_client)
+             for task in tasks]
+
+    for tail in tails:
+        tail.interval = min_interval
+
+    polling = {}
+    pool = concurrent.futures.ThreadPoolExecutor(workers)
+    try:
+        while stop is None or not stop.is_set():
+            now = time.time()
+            busy = set(polling.values())
+            idle = [tail for tail in tails if tail not in busy]
+            for tail in idle:
+                if tail.due <= now:
+                    polling[pool.submit(tail.poll)] = tail
+
+            waiting = [tail.due for tail in idle if tail.due > now]
+            timeout = max(min(waiting) - now, 0) if waiting else None
+            if polling:
+                done, _ = concurrent.futures.wait(
+                    polling, timeout,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+            else:
+                # every tail is idle: sleep until the next one is due,
+                # unless asked to stop in the meantime
+                done = ()
+                if stop is None:
+                    time.sleep(timeout)
+                else:
+                    stop.wait(timeout)
+
+            for future in done:
+                tail = polling.pop(future)
+                try:
+                    lines = future.result()
+                except DCOSException as e:
+                    logger.warning('Error reading %s: %s', tail.file, e)
+                    lines = None
+
+                now = time.time()
+                if lines is None or not tail.got_data:
+                    tail.due = now + tail.interval
+                    tail.interval = min(tail.interval * 2, max_interval)
+                else:
+                    tail.due = now
+                    tail.interval = min_interval
+
+                for line in lines or []:
+                    yield tail.task_id, line
+    finally:
+        for future in polling:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+class _TaskLogTail(object):
+    """Reads the lines appended to a file in a task's sandbox.
+
+    :param task: task
+    :type task: Task
+    :param path: file's path, relative to the task's sandbox
+    :type path: str
+    :param from_start: read the file from the beginning rather than
+                       only the data appended from now on
+    :type from_start: bool
+    :param dcos_client: client to use for network requests
+    :type dcos_client: DCOSClient
+    """
+
+    def __init__(self, task, path, from_start, dcos_client):
+        self.task_id = task['id']
+        self.file = MesosFile(path, task=task, dcos_client=dcos_client)
+        self.due = 0
+        self.interval = 0
+        self.got_data = False
+        self._started = from_start
+        self._partial = b''
+
+    def poll(self):
+        """Reads the data appended since the last poll, up to
+        `TAIL_POLL_CHUNKS` chunks.
+
+        :returns: the complete lines read
+        :rtype: [str]
+        """
+
+        if not self._started:
+            self.file.seek(0, os.SEEK_END)
+            self._started = True
+
+        data = b''.join(
+            itertools.islice(self.file.iter_chunks(), TAIL_POLL_CHUNKS))
+        self.got_data = bool(data)
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        return [line.decode('utf-8', 'replace') for line in lines]
+
+
+def exec_tasks(fltr, cmd, args=None, concurrency=util.STREAM_CONCURRENCY,
+               output_dir=None, dcos_client=None):
+    """Runs a command in the container of every running task matching
+    `fltr`, like a non-interactive `TaskIO` per task.
+
+    The tasks are resolved from a single snapshot of the master's state
+    and up to `concurrency` commands run at once. Each command's STDOUT
+    and STDERR are kept in memory, or written to `<task_id>.stdout` and
+    `<task_id>.stderr` in `output_dir` if it is given. A task the command
+    can't run on doesn't stop the others; its result carries the error.
+
+    :param fltr: task filter, as in `Master.tasks`
+    :type fltr: str | None
+    :param cmd: the command to run
+    :type cmd: str
+    :param args: the command's arguments
+    :type args: [str] | None
+    :param concurrency: maximum number of commands running at once
+    :type concurrency: int
+    :param output_dir: directory to write the output to, if not in memory
+    :type output_dir: str | None
+    :param dcos_client: client to use for network requests
+    :type dcos_client: DCOSClient | None
+    :returns: the result for each task, in the order of `Master.tasks`
+    :rtype: [ExecResult]
+    """
+
+    dcos_client = dcos_client or DCOSClient()
+    master = get_master(dcos_client)
+    tasks = master.tasks(fltr)
+
+    def run(task_obj):
+        return _exec_task(dcos_client, master, task_obj, cmd, args or [],
+                          output_dir)
+
+    results = {}
+    for job, task_obj in util.stream(run, tasks, concurrency):
+        results[task_obj['id']] = job.result()
+
+    return [results[task_obj['id']] for task_obj in tasks]
+
+
+def _exec_task(dcos_client, master, task_obj, cmd, args, output_dir):
+    """Runs a command in a task's container and collects its output and
+    exit status.
+
+    :param dcos_client: client to use for network requests
+    :type dcos_client: DCOSClient
+    :param master: master the task belongs to
+    :type master: Master
+    :param task_obj: the task
+    :type task_obj: Task
+    :param cmd: the command to run
+    :type cmd: str
+    :param args: the command's arguments
+    :type args: [str]
+    :param output_dir: directory to write the output to, if not in memory
+    :type output_dir: str | None
+    :returns: the outcome
+    :rtype: ExecResult
+    """
+
+    task_id = task_obj['id']
+    names = ['STDOUT', 'STDERR']
+    if output_dir is not None:
+        paths = {
+            name: os.path.join(output_dir, '{}.{}'.format(
+                task_id, name.lower()))
+            for name in names}
+
+    sinks = {}
+    exit_status = None
+    error = None
+    try:
+        for name in names:
+            if output_dir is None:
+                sinks[name] = io.BytesIO()
+            else:
+                sinks[name] = open(paths[name], 'wb')
+
+        _check_ucr_task(task_obj)
+        agent_url = _agent_api_url(dcos_client, task_obj)
+        container_id = {
+            'parent': master.get_container_id(task_obj),
+            'value': str(uuid.uuid4())
+        }
+
+        response = _launch_nested_container_session(
+            agent_url, container_id, cmd, args)
+        decoder = recordio.Decoder(lambda s: json.loads(s.decode("UTF-8")))
+        for chunk in response.iter_content(chunk_size=None):
+            for record in decoder.decode_iter(chunk):
+                output = record.get('data', {})
+                if record.get('type') == 'DATA' and output.get('data'):
+                    sinks[output['type']].write(
+                        base64.b64decode(output['data'].encode('utf-8')))
+
+        message = {
+            'type': 'WAIT_NESTED_CONTAINER',
+            'wait_nested_container': {'container_id': container_id}}
+        response = http.post(
+            agent_url,
+            data=json.dumps(message),
+            timeout=None,
+            headers={'Content-Type': 'application/json',
+                     'Accept': 'application/json'})
+        exit_status = response.json()[
+            'wait_nested_container'].get('exit_status')
+    except DCOSException as e:
+        logger.exception('Error running %s in task %s', cmd, task_id)
+        error = e
+    except (IOError, KeyError, OSError, TypeError, ValueError) as e:
+        logger.exception('Error running %s in task %s', cmd, task_id)
+        error = DCOSException(
+            'Error running command in task [{}]: {}'.format(task_id, e))
+    finally:
+        if output_dir is None:
+            stdout = sinks['STDOUT'].getvalue()
+            stderr = sinks['STDERR'].getvalue()
+        else:
+            stdout = paths['STDOUT']
+            stderr = paths['STDERR']
+        for sink in sinks.values():
+            sink.close()
+
+    return ExecResult(task_id, exit_status, stdout, stderr, error)
+
+
+def _check_ucr_task(task_obj):
+    """Raises a DCOSException if the task's container wasn't launched by
+    the UCR.
+
+    Since task's containers are launched by the UCR by default, we want to
+    allow most tasks to pass through unchecked. The only exception is when
+    a task has an explicit container specified and it is not of type
+    "MESOS". Having a type of "MESOS" implies that it was launched by the
+    UCR -- all other types imply it was not.
+
+    :param task_obj: the task
+    :type task_obj: Task
+    :rtype: None
+    """
+
+    if "container" in task_obj.dict():
+        if "type" in task_obj.dict()["container"]:
+            if task_obj.dict()["container"]["type"] != "MESOS":
+                raise DCOSException(
+                    "This command is only supported for tasks"
+                    " launched by the Universal Container Runtime (UCR).")
+
+
+def _agent_api_url(dcos_client, task_obj):
+    """Returns the URL of the v1 API of the agent running a task
+
+    :param dcos_client: client to use for network requests
+    :type dcos_client: DCOSClient
+    :param task_obj: the task
+    :type task_obj: Task
+    :returns: the agent's v1 API URL
+    :rtype: str
+    """
+
+    if dcos_client._mesos_master_url:
+        return dcos_client.slave_url(
+            slave_id="",
+            private_url=task_obj.slave().http_url(),
+            path="api/v1")
+    else:
+        return dcos_client.slave_url(
+            slave_id=task_obj.slave()['id'],
+            private_url="",
+            path="api/v1")
+
+
+def _launch_nested_container_session(agent_url, container_id, cmd, args,
+                                     tty=False):
+    """Sends a request to a Mesos Agent to launch a new nested container
+    and attach to its output stream.
+
+    :param agent_url: the agent's v1 API URL
+    :type agent_url: str
+    :param container_id: the nested container's ID
+    :type container_id: dict
+    :param cmd: the command to run
+    :type cmd: str
+    :param args: the command's arguments
+    :type args: [str]
+    :param tty: whether to allocate a tty for the command
+    :type tty: bool
+    :returns: the streaming response carrying the output
+    :rtype: requests.Response
+    """
+
+    message = {
+        'type': "LAUNCH_NESTED_CONTAINER_SESSION",
+        'launch_nested_container_session': {
+            'container_id': container_id,
+            'command': {
+                'value': cmd,
+                'arguments': [cmd] + args,
+                'shell': False}}}
+
+    if tty:
+        message[
+            'launch_nested_container_session'][
+                'container'] = {
+                    'type': 'MESOS',
+                    'tty_info': {}}
+
+    req_extra_args = {
+        'stream': True,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Accept': 'application/recordio',
+            'Message-Accept': 'application/json'}}
+
+    return http.post(
+        agent_url,
+        data=json.dumps(message),
+        timeout=None,
+        **req_extra_args)
+
+
 class TaskIO(object):
     """Object used to stream I/O between a
     running Mesos task and the local terminal.
@@ -1090,30 +2339,11 @@ class TaskIO(object):
         master = get_master(client)
 
         # Get the task and make sure its container was launched by the UCR.
-        # Since task's containers are launched by the UCR by default, we want
-        # to allow most tasks to pass through unchecked. The only exception is
-        # when a task has an explicit container specified and it is not of type
-        # "MESOS". Having a type of "MESOS" implies that it was launched by the
-        # UCR -- all other types imply it was not.
         task_obj = master.task(task_id)
-        if "container" in task_obj.dict():
-            if "type" in task_obj.dict()["container"]:
-                if task_obj.dict()["container"]["type"] != "MESOS":
-                    raise DCOSException(
-                        "This command is only supported for tasks"
-                        " launched by the Universal Container Runtime (UCR).")
+        _check_ucr_task(task_obj)
 
         # Get the URL to the agent running the task.
-        if client._mesos_master_url:
-            self.agent_url = client.slave_url(
-                slave_id="",
-                private_url=task_obj.slave().http_url(),
-                path="api/v1")
-        else:
-            self.agent_url = client.slave_url(
-                slave_id=task_obj.slave()['id'],
-                private_url="",
-                path="api/v1")
+        self.agent_url = _agent_api_url(client, task_obj)
 
         # Grab a reference to the container ID for the task.
         self.parent_id = master.get_container_id(task_obj)
@@ -1168,8 +2398,7 @@ class TaskIO(object):
         # Without a TTY.
         if not self.tty:
             try:
-                self._start_threads()
-                self.exit_event.wait()
+                self._run_session()
             except Exception as e:
                 self.exception = e
 
@@ -1195,8 +2424,7 @@ class TaskIO(object):
                 self._window_resize(signal.SIGWINCH, None)
                 signal.signal(signal.SIGWINCH, self._window_resize)
 
-            self._start_threads()
-            self.exit_event.wait()
+            self._run_session()
         except Exception as e:
             self.exception = e
 
@@ -1208,6 +2436,13 @@ class TaskIO(object):
         if self.exception:
             raise self.exception
 
+    def _run_session(self):
+        """Streams I/O until the command exits or an error occurs
+        """
+
+        self._start_threads()
+        self.exit_event.wait()
+
     def _thread_wrapper(self, func):
         """A wrapper around all threads used in this class
 
@@ -1276,37 +2511,12 @@ class TaskIO(object):
         The output stream is then sent back in the response.
         """
 
-        message = {
-            'type': "LAUNCH_NESTED_CONTAINER_SESSION",
-            'launch_nested_container_session': {
-                'container_id': {
-                    'parent': self.parent_id,
-                    'value': self.container_id
-                },
-                'command': {
-                    'value': self.cmd,
-                    'arguments': [self.cmd] + self.args,
-                    'shell': False}}}
-
-        if self.tty:
-            message[
-                'launch_nested_container_session'][
-                    'container'] = {
-                        'type': 'MESOS',
-                        'tty_info': {}}
-
-        req_extra_args = {
-            'stream': True,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Accept': 'application/recordio',
-                'Message-Accept': 'application/json'}}
-
-        response = http.post(
-            self.agent_url,
-            data=json.dumps(message),
-            timeout=None,
-            **req_extra_args)
+        container_id = {
+            'parent': self.parent_id,
+            'value': self.container_id
+        }
+        response = _launch_nested_container_session(
+            self.agent_url, container_id, self.cmd, self.args, self.tty)
 
         self._process_output_stream(response)
 
@@ -1332,9 +2542,7 @@ class TaskIO(object):
 
         try:
             for chunk in response.iter_content(chunk_size=None):
-                records = self.decoder.decode(chunk)
-
-                for r in records:
+                for r in self.decoder.decode_iter(chunk):
                     if r.get('type') and r['type'] == 'DATA':
                         self.output_queue.put(r['data'])
         except Exception as e:
@@ -1539,6 +2747,319 @@ class TaskIO(object):
         self.input_queue.put(self.encoder.encode(message))
 
 
+class AsyncTaskIO(TaskIO):
+    """Event loop based variant of `TaskIO`, with the same constructor and
+    `run()` contract.
+
+    Reading STDIN, sending heartbeats and writing STDOUT/STDERR all happen
+    on a single asyncio event loop; only the two blocking HTTP streams to
+    the agent get threads of their own. The STDIN bytes read in one loop
+    iteration are sent as a single message, and the output records
+    received in one loop iteration are written with a single write and
+    flush per stream.
+
+    Requires Python 3.
+    """
+
+    # The maximum number of bytes read from STDIN at once.
+    STDIN_READ_SIZE = 64 * 1024
+
+    def _run_session(self):
+        """Streams I/O on a new event loop until the command exits or an
+        error occurs
+        """
+
+        if asyncio is None:
+            raise DCOSException("AsyncTaskIO requires Python 3")
+
+        self._loop = asyncio.new_event_loop()
+        self._done = self._loop.create_future()
+        self._stdin_buffer = bytearray()
+        self._stdin_scheduled = False
+        self._stdin_reader = None
+        self._heartbeat_handle = None
+        self._output_buffers = {'STDOUT': bytearray(), 'STDERR': bytearray()}
+        self._output_scheduled = False
+
+        try:
+            self._loop.call_soon(self._start)
+            self._loop.run_until_complete(self._done)
+        finally:
+            self._stop()
+            self._loop.close()
+
+    def _start(self):
+        """Starts streaming: runs on the event loop
+        """
+
+        if self.interactive:
+            self._start_stdin()
+            self._heartbeat()
+            self._start_thread(self._attach_container_input,
+                               self._on_input_closed)
+
+        self._start_thread(self._launch_nested_container_session,
+                           self._on_output_closed)
+
+    def _stop(self):
+        """Stops reading STDIN and sending heartbeats, and ends the input
+        stream
+        """
+
+        if self._stdin_reader is not None:
+            self._loop.remove_reader(self._stdin_reader)
+            self._stdin_reader = None
+        if self._heartbeat_handle is not None:
+            self._heartbeat_handle.cancel()
+            self._heartbeat_handle = None
+        self.input_queue.put(None)
+
+    def _finish(self, exception=None):
+        """Ends the session, raising `exception` from `run()` if given
+
+        :param exception: the error the session failed with
+        :type exception: Exception | None
+        """
+
+        if self._done.done():
+            return
+        if exception is None:
+            self._done.set_result(None)
+        else:
+            self._done.set_exception(exception)
+
+    def _start_thread(self, func, callback):
+        """Runs the blocking function `func` on a daemon thread, then calls
+        `callback` on the event loop with the exception `func` raised, or
+        None.
+
+        :param func: function to run
+        :type func: function
+        :param callback: function to call with the outcome
+        :type callback: function
+        """
+
+        def target():
+            try:
+                func()
+            except Exception as e:
+                self._call_soon(callback, e)
+            else:
+                self._call_soon(callback, None)
+
+        thread = threading.Thread(target=target)
+        thread.daemon = True
+        thread.start()
+
+    def _call_soon(self, callback, *args):
+        """Schedules `callback` on the event loop from another thread.
+        Does nothing once the session is over.
+
+        :param callback: function to call
+        :type callback: function
+        """
+
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # the event loop has been closed
+            pass
+
+    def _on_input_closed(self, exception):
+        """Called once the ATTACH_CONTAINER_INPUT stream is over
+
+        :param exception: the error the stream failed with
+        :type exception: Exception | None
+        """
+
+        if exception is not None:
+            self._finish(exception)
+
+    def _on_output_closed(self, exception):
+        """Called once the output stream is over, which ends the session
+
+        :param exception: the error the stream failed with
+        :type exception: Exception | None
+        """
+
+        self._flush_output()
+        self._finish(exception)
+
+    def _process_output_stream(self, response):
+        """Hands the chunks streamed over the given response to the event
+        loop. Runs on the output stream's thread.
+
+        :param response: Response from an http post
+        :type response: requests.models.Response
+        """
+
+        self.attach_input_event.set()
+        if self.interactive:
+            self.print_output_event.wait()
+
+        try:
+            for chunk in response.iter_content(chunk_size=None):
+                self._call_soon(self._on_output_chunk, chunk)
+        except Exception as e:
+            raise DCOSException(
+                "Error parsing output stream: {error}".format(error=e))
+
+    def _on_output_chunk(self, chunk):
+        """Decodes a chunk of the output stream and buffers its data
+
+        :param chunk: chunk of the output stream
+        :type chunk: bytes
+        """
+
+        try:
+            records = list(self.decoder.decode_iter(chunk))
+        except Exception as e:
+            self._finish(DCOSException(
+                "Error parsing output stream: {error}".format(error=e)))
+            return
+
+        for record in records:
+            if record.get('type') != 'DATA':
+                continue
+
+            output = record['data']
+            if not output.get('data'):
+                self._finish(DCOSException(
+                    "Error no 'data' field in output message"))
+                return
+            if output.get('type') not in self._output_buffers:
+                self._finish(DCOSException(
+                    "Unsupported data type in output stream"))
+                return
+
+            self._output_buffers[output['type']].extend(
+                base64.b64decode(output['data'].encode('utf-8')))
+
+        if not self._output_scheduled:
+            self._output_scheduled = True
+            self._loop.call_soon(self._flush_output)
+
+    def _flush_output(self):
+        """Writes the buffered output to STDOUT and STDERR
+        """
+
+        self._output_scheduled = False
+        for name, stream in [('STDOUT', sys.stdout), ('STDERR', sys.stderr)]:
+            data = self._output_buffers[name]
+            if data:
+                stream.buffer.write(bytes(data))
+                stream.flush()
+                del data[:]
+
+    def _start_stdin(self):
+        """Starts reading STDIN: with the event loop where it can watch
+        STDIN, else on a thread.
+        """
+
+        fd = sys.stdin.fileno()
+        if not util.is_windows_platform():
+            try:
+                self._loop.add_reader(fd, self._on_stdin_readable, fd)
+                self._stdin_reader = fd
+                return
+            except (OSError, ValueError):
+                # e.g. STDIN is a regular file, which can't be polled
+                pass
+
+        def read_stdin():
+            for chunk in iter(partial(os.read, fd, self.STDIN_READ_SIZE),
+                              b''):
+                self._call_soon(self._on_stdin, chunk)
+            self._call_soon(self._on_stdin, b'')
+
+        self._start_thread(read_stdin, self._on_input_closed)
+
+    def _on_stdin_readable(self, fd):
+        """Reads the available STDIN data
+
+        :param fd: STDIN's file descriptor
+        :type fd: int
+        """
+
+        self._on_stdin(os.read(fd, self.STDIN_READ_SIZE))
+
+    def _on_stdin(self, data):
+        """Buffers data read from STDIN, or sends EOF if `data` is empty
+
+        :param data: data read from STDIN
+        :type data: bytes
+        """
+
+        if data:
+            self._stdin_buffer.extend(data)
+            if not self._stdin_scheduled:
+                self._stdin_scheduled = True
+                self._loop.call_soon(self._flush_stdin)
+            return
+
+        if self._stdin_reader is not None:
+            self._loop.remove_reader(self._stdin_reader)
+            self._stdin_reader = None
+
+        # Send what is left, then an empty string to indicate EOF to the
+        # server and 'None' to signal that we are done sending input.
+        self._flush_stdin()
+        self.input_queue.put(self._stdin_record(b''))
+        self.input_queue.put(None)
+
+    def _flush_stdin(self):
+        """Sends the buffered STDIN data as a single message
+        """
+
+        self._stdin_scheduled = False
+        if self._stdin_buffer:
+            self.input_queue.put(self._stdin_record(self._stdin_buffer))
+            del self._stdin_buffer[:]
+
+    def _stdin_record(self, data):
+        """Encodes an ATTACH_CONTAINER_INPUT message carrying STDIN data
+
+        :param data: data read from STDIN
+        :type data: bytes
+        :returns: A RecordIO encoded message
+        :rtype: bytes
+        """
+
+        message = {
+            'type': 'ATTACH_CONTAINER_INPUT',
+            'attach_container_input': {
+                'type': 'PROCESS_IO',
+                'process_io': {
+                    'type': 'DATA',
+                    'data': {
+                        'type': 'STDIN',
+                        'data': base64.b64encode(data).decode('utf-8')}}}}
+
+        return self.encoder.encode(message)
+
+    def _heartbeat(self):
+        """Sends a heartbeat over the ATTACH_CONTAINER_INPUT stream every
+        `HEARTBEAT_INTERVAL` seconds
+        """
+
+        message = {
+            'type': 'ATTACH_CONTAINER_INPUT',
+            'attach_container_input': {
+                'type': 'PROCESS_IO',
+                'process_io': {
+                    'type': 'CONTROL',
+                    'control': {
+                        'type': 'HEARTBEAT',
+                        'heartbeat': {
+                            'interval': {
+                                'nanoseconds':
+                                    self.HEARTBEAT_INTERVAL_NANOSECONDS}}}}}}
+
+        self.input_queue.put(self.encoder.encode(message))
+        self._heartbeat_handle = self._loop.call_later(
+            self.HEARTBEAT_INTERVAL, self._heartbeat)
+
+
 def parse_pid(pid):
     """ Parse the mesos pid string,
 
@@ -1567,3 +3088,218 @@ def _merge(d, keys):
     """
 
     return itertools.chain(*[d[k] for k in keys])
+
+
+def _load_download_progress(progress_path, dest, source):
+    """Reads the ranges of `source` that a previous download already wrote
+    to `dest`.
+
+    :param progress_path: path of the download's progress file
+    :type progress_path: str
+    :param dest: path the file is downloaded to
+    :type dest: str
+    :param source: remote path, size and chunk size of the download
+    :type source: dict
+    :returns: offsets of the ranges already downloaded
+    :rtype: set of int
+    """
+
+    if not (os.path.exists(progress_path) and os.path.exists(dest)):
+        return set()
+
+    try:
+        with util.open_file(progress_path) as f:
+            progress = json.load(f)
+    except (DCOSException, ValueError):
+        logger.exception('Ignoring unreadable progress file %s',
+                         progress_path)
+        return set()
+
+    if any(progress.get(key) != value for key, value in source.items()):
+        # a different file, or the same file has changed since
+        return set()
+
+    return set(progress.get('done', []))
+
+
+def _save_download_progress(progress_path, source, done):
+    """Records the ranges of `source` that have been downloaded.
+
+    :param progress_path: path of the download's progress file
+    :type progress_path: str
+    :param source: remote path, size and chunk size of the download
+    :type source: dict
+    :param done: offsets of the ranges already downloaded
+    :type done: set of int
+    :rtype: None
+    """
+
+    progress = dict(source, done=sorted(done))
+    with util.open_file(progress_path, 'w') as f:
+        json.dump(progress, f)
+
+
+def _file_data_bytes(text, length):
+    """Turns the data of a files/read.json response back into the bytes
+    that were read. They are sent as JSON text, so bytes that aren't UTF-8
+    come back as U+FFFD replacement characters. A multibyte character cut
+    by the end of the read is dropped, for the next read to start with it.
+
+    :param text: the response's data
+    :type text: str
+    :param length: the number of bytes requested, or -1
+    :type length: int
+    :returns: the bytes read, up to the last complete character
+    :rtype: bytes
+    """
+
+    data = text[:-1] if text.endswith(u'\ufffd') else text
+    if u'\ufffd' in data:
+        raise DCOSException(
+            'The file is not UTF-8 text and cannot be read exactly')
+
+    data = data.encode('utf-8')
+    if 0 <= length < len(data):
+        raise DCOSException(
+            'Read {} bytes where at most {} were requested'.format(
+                len(data), length))
+    return data
+
+
+def _pwrite(fd, data, offset, lock):
+    """Writes `data` at `offset` in `fd` without moving the file position,
+    so that several threads can write to the same file at once.  Falls
+    back to seeking and writing under `lock` where `os.pwrite` isn't
+    available.
+
+    :param fd: file descriptor
+    :type fd: int
+    :param data: data to write
+    :type data: bytes
+    :param offset: location in the file to write to
+    :type offset: int
+    :param lock: lock serializing writes to `fd` without `os.pwrite`
+    :type lock: threading.Lock
+    :rtype: None
+    """
+
+    if hasattr(os, 'pwrite'):
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view = view[written:]
+            offset += written
+    else:
+        with lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            os.write(fd, data)
+
+
+def _v1_value(obj):
+    """ Returns the value of a v1 operator API ID object,
+        e.g. {'value': 'abc'} -> 'abc'
+
+    :param obj: ID object
+    :type obj: dict | None
+    :returns: the ID
+    :rtype: str | None
+    """
+
+    if obj is None:
+        return None
+    return obj.get('value')
+
+
+def _v0_resources(resources):
+    """ Convert a list of v1 resources into the state.json format,
+        e.g. [{'name': 'cpus', 'type': 'SCALAR', 'scalar': {'value': 1}}] ->
+             {'cpus': 1}
+
+    :param resources: v1 resources
+    :type resources: [dict]
+    :returns: resources by name
+    :rtype: dict
+    """
+
+    result = {}
+    for resource in resources:
+        if resource.get('type') == 'SCALAR':
+            value = resource['scalar']['value']
+            result[resource['name']] = result.get(resource['name'], 0) + value
+        elif resource.get('type') == 'RANGES':
+            ranges = ['{}-{}'.format(r['begin'], r['end'])
+                      for r in resource['ranges'].get('range', [])]
+            result[resource['name']] = '[{}]'.format(', '.join(ranges))
+    return result
+
+
+def _v0_task(task):
+    """ Convert a v1 operator API task into the state.json format
+
+    :param task: v1 task
+    :type task: dict
+    :returns: state.json task
+    :rtype: dict
+    """
+
+    result = {
+        'id': _v1_value(task['task_id']),
+        'name': task.get('name'),
+        'framework_id': _v1_value(task['framework_id']),
+        'executor_id': _v1_value(task.get('executor_id')) or '',
+        'slave_id': _v1_value(task.get('agent_id')),
+        'state': task.get('state'),
+        'resources': _v0_resources(task.get('resources', [])),
+        'statuses': task.get('statuses', []),
+    }
+    for key in ['labels', 'discovery', 'container', 'health_check', 'user']:
+        if key in task:
+            result[key] = task[key]
+    return result
+
+
+def _v0_agent(agent):
+    """ Convert a v1 operator API agent into the state.json format
+
+    :param agent: v1 agent
+    :type agent: dict
+    :returns: state.json slave
+    :rtype: dict
+    """
+
+    agent_info = agent['agent_info']
+    result = {
+        'id': _v1_value(agent_info['id']),
+        'pid': agent.get('pid'),
+        'hostname': agent_info.get('hostname'),
+        'port': agent_info.get('port'),
+        'active': agent.get('active', True),
+        'version': agent.get('version'),
+        'resources': _v0_resources(agent_info.get('resources', [])),
+    }
+    if 'domain' in agent_info:
+        result['domain'] = agent_info['domain']
+    return result
+
+
+def _v0_framework(framework):
+    """ Convert a v1 operator API framework into the state.json format,
+        without its tasks
+
+    :param framework: v1 framework
+    :type framework: dict
+    :returns: state.json framework
+    :rtype: dict
+    """
+
+    framework_info = framework['framework_info']
+    return {
+        'id': _v1_value(framework_info['id']),
+        'name': framework_info.get('name'),
+        'user': framework_info.get('user'),
+        'role': framework_info.get('role'),
+        'hostname': framework_info.get('hostname'),
+        'webui_url': framework_info.get('webui_url'),
+        'active': framework.get('active', True),
+        'connected': framework.get('connected', True),
+    }
@@ -2,7 +2,8 @@ import json
 
 from six.moves import urllib
 
-from dcos import config, cosmos, http, packagemanager, rpcclient, util
+from dcos import (asynchttp, config, cosmos, http, packagemanager,
+                  rpcclient, util)
 from dcos.errors import DCOSException
 
 logger = util.get_logger(__name__)
@@ -33,6 +34,27 @@ def create_client(toml_config=None):
     return Client(rpc_client)
 
 
+def create_async_client(toml_config=None):
+    """Creates a Metronome client for asyncio event loops with the supplied
+    configuration.
+
+    :param toml_config: configuration dictionary
+    :type toml_config: config.Toml
+    :returns: Metronome client
+    :rtype: dcos.metronome.AsyncClient
+    """
+
+    if toml_config is None:
+        toml_config = config.get_config()
+
+    metronome_url = _get_metronome_url(toml_config)
+    timeout = config.get_config_val('core.timeout') or http.DEFAULT_TIMEOUT
+    rpc_client = rpcclient.create_async_client(metronome_url, timeout)
+
+    logger.info('Creating async metronome client with: %r', metronome_url)
+    return AsyncClient(rpc_client)
+
+
 def _get_embed_query_string(embed_list):
     return '?{}'.format('&'.join('embed=%s' % (item) for item in embed_list))
 
@@ -397,6 +419,121 @@ class Client(object):
             raise DCOSException(template.format(response.text))
 
 
+class AsyncClient(object):
+    """Metronome client for asyncio event loops. It has the read methods of
+    `Client`, returning futures of what they return.
+
+    :param rpc_client: provides a method for making HTTP requests
+    :type rpc_client: rpcclient.AsyncRpcClient
+    """
+
+    def __init__(self, rpc_client):
+        self._rpc = rpc_client
+
+    def get_about(self):
+        """Returns info about Metronome instance
+
+        :returns: future of the Metronome information
+        :rtype: asyncio.Future
+        """
+
+        return self._get('v1/info')
+
+    def get_job(self, job_id, embed_with=None):
+        """Returns a representation of the requested job.
+
+        :param job_id: the ID of the job
+        :type job_id: str
+        :param embed_with: list of strings to ?embed=str&embed=str2...
+        :type embed_with: [str]
+        :returns: future of the requested Metronome job
+        :rtype: asyncio.Future
+        """
+
+        job_id = util.normalize_marathon_id_path(job_id)
+        return self._get('v1/jobs{}'.format(job_id), embed_with)
+
+    def get_jobs(self, embed_with=None):
+        """Get a list of known jobs.
+
+        :param embed_with: list of strings to ?embed=str&embed=str2...
+        :type embed_with: [str]
+        :returns: future of the list of known jobs
+        :rtype: asyncio.Future
+        """
+
+        return self._get('v1/jobs', embed_with)
+
+    def get_schedules(self, job_id):
+        """Gets the schedules for a given job
+
+        :param job_id: the ID of the job
+        :type job_id: str
+        :returns: future of the schedules
+        :rtype: asyncio.Future
+        """
+
+        job_id = util.normalize_marathon_id_path(job_id)
+        return self._get('v1/jobs{}/schedules'.format(job_id))
+
+    def get_schedule(self, job_id, schedule_id):
+        """Gets a schedule of a given job
+
+        :param job_id: the ID of the job
+        :type job_id: str
+        :param schedule_id: the ID of the schedule
+        :type schedule_id: str
+        :returns: future of the schedule
+        :rtype: asyncio.Future
+        """
+
+        job_id = util.normalize_marathon_id_path(job_id)
+        schedule_id = util.normalize_marathon_id_path(schedule_id)
+        return self._get('v1/jobs{}/schedules{}'.format(job_id, schedule_id))
+
+    def get_runs(self, job_id):
+        """Gets the runs of a given job
+
+        :param job_id: the ID of the job
+        :type job_id: str
+        :returns: future of the job runs
+        :rtype: asyncio.Future
+        """
+
+        job_id = util.normalize_marathon_id_path(job_id)
+        return self._get('v1/jobs{}/runs'.format(job_id))
+
+    def get_run(self, job_id, run_id):
+        """Gets a run of a given job
+
+        :param job_id: the ID of the job
+        :type job_id: str
+        :param run_id: the ID of the job run
+        :type run_id: str
+        :returns: future of the job run
+        :rtype: asyncio.Future
+        """
+
+        job_id = util.normalize_marathon_id_path(job_id)
+        run_id = util.normalize_marathon_id_path(run_id)
+        return self._get('v1/jobs{}/runs{}'.format(job_id, run_id))
+
+    def _get(self, path, embed_with=None):
+        """Sends a GET request and parses the JSON response body.
+
+        :param path: the endpoint path
+        :type path: str
+        :param embed_with: the embed query parameters
+        :type embed_with: [str] | None
+        :returns: future of the parsed body
+        :rtype: asyncio.Future
+        """
+
+        params = {'embed': list(embed_with)} if embed_with else None
+        response = self._rpc.http_req(asynchttp.get, path, params=params)
+        return asynchttp.then(response, Client._parse_json)
+
+
 def _check_capability():
     """
     The function checks if cluster has metronome capability.
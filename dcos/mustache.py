@@ -0,0 +1,204 @@
+"""
+Renderer of the Mustache templates of packages.
+
+It implements the subset of Mustache used by package Marathon templates,
+the way Cosmos' renderer (mustache.java) does it: variables, which are HTML
+escaped unless they are written `{{{name}}}` or `{{&name}}`, dotted names,
+sections, inverted sections and comments. Templates with partials or
+delimiter changes, and values that mustache.java would format differently
+than JSON (lists and objects used as variables), raise a DCOSException.
+"""
+
+import json
+import threading
+
+import six
+
+from dcos.errors import DCOSException
+
+_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;',
+            "'": '&#39;', '`': '&#96;', '=': '&#61;'}
+_ESCAPES.update((chr(c), '&#{};'.format(c)) for c in range(14))
+
+_compiled = {}
+"""Parsed templates, keyed by template text."""
+
+_compiled_lock = threading.Lock()
+
+
+def render(template, context):
+    """Renders a template.
+
+    :param template: the template
+    :type template: str
+    :param context: the values of the template's names
+    :type context: dict
+    :returns: the rendered text
+    :rtype: str
+    """
+
+    with _compiled_lock:
+        nodes = _compiled.get(template)
+    if nodes is None:
+        nodes = _parse(template)
+        with _compiled_lock:
+            _compiled[template] = nodes
+
+    output = []
+    _render(nodes, [context], output)
+    return ''.join(output)
+
+
+def _parse(template):
+    """
+    :param template: the template
+    :type template: str
+    :returns: the template's nodes: text, ('var', name, escape) and
+              ('section', name, nodes, inverted)
+    :rtype: list
+    """
+
+    root = []
+    stack = [(None, root)]
+    position = 0
+    while True:
+        start = template.find('{{', position)
+        if start == -1:
+            stack[-1][1].append(template[position:])
+            break
+        stack[-1][1].append(template[position:start])
+
+        if template.startswith('{{{', start):
+            end = template.find('}}}', start)
+            close = 3
+        else:
+            end = template.find('}}', start)
+            close = 2
+        if end == -1:
+            raise DCOSException(
+                'Unclosed Mustache tag at offset {}'.format(start))
+        tag = template[start + 2:end + close - 2]
+        position = end + close
+
+        if close == 3:
+            stack[-1][1].append(('var', tag[1:-1].strip(), False))
+            continue
+
+        sigil, name = tag[:1], tag[1:].strip()
+        if sigil == '!':
+            continue
+        elif sigil == '&':
+            stack[-1][1].append(('var', name, False))
+        elif sigil in ('#', '^'):
+            nodes = []
+            stack[-1][1].append(('section', name, nodes, sigil == '^'))
+            stack.append((name, nodes))
+        elif sigil == '/':
+            if stack[-1][0] != name:
+                raise DCOSException(
+                    'Unexpected Mustache section end [{}]'.format(name))
+            stack.pop()
+        elif sigil in ('>', '=', '<', '$'):
+            raise DCOSException(
+                'Unsupported Mustache tag [{}]'.format(tag.strip()))
+        else:
+            stack[-1][1].append(('var', tag.strip(), True))
+
+    if len(stack) > 1:
+        raise DCOSException(
+            'Unclosed Mustache section [{}]'.format(stack[-1][0]))
+    return root
+
+
+def _render(nodes, scopes, output):
+    """
+    :param nodes: the nodes to render
+    :type nodes: list
+    :param scopes: the context stack, innermost last
+    :type scopes: list
+    :param output: the rendered text fragments
+    :type output: [str]
+    :rtype: None
+    """
+
+    for node in nodes:
+        if isinstance(node, six.string_types):
+            output.append(node)
+        elif node[0] == 'var':
+            _, name, escape = node
+            text = _format(name, _lookup(name, scopes))
+            if escape:
+                text = ''.join(_ESCAPES.get(c, c) for c in text)
+            output.append(text)
+        else:
+            _, name, children, inverted = node
+            value = _lookup(name, scopes)
+            if inverted:
+                if not _is_truthy(value):
+                    _render(children, scopes, output)
+            elif isinstance(value, list):
+                for item in value:
+                    _render(children, scopes + [item], output)
+            elif _is_truthy(value):
+                _render(children, scopes + [value], output)
+
+
+def _lookup(name, scopes):
+    """
+    :param name: a possibly dotted name, or . for the current scope
+    :type name: str
+    :param scopes: the context stack, innermost last
+    :type scopes: list
+    :returns: the value of the name, or None if it is undefined
+    :rtype: object
+    """
+
+    if name == '.':
+        return scopes[-1]
+
+    first, _, rest = name.partition('.')
+    for scope in reversed(scopes):
+        if isinstance(scope, dict) and first in scope:
+            value = scope[first]
+            break
+    else:
+        return None
+
+    for part in rest.split('.') if rest else []:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _is_truthy(value):
+    """
+    :param value: the value of a section
+    :type value: object
+    :returns: whether mustache.java renders the section
+    :rtype: bool
+    """
+
+    return value is not None and value is not False and \
+        value != '' and value != []
+
+
+def _format(name, value):
+    """
+    :param name: the name of a variable
+    :type name: str
+    :param value: the value of the variable
+    :type value: object
+    :returns: the value as mustache.java formats it
+    :rtype: str
+    """
+
+    if value is None:
+        return ''
+    elif isinstance(value, bool):
+        return 'true' if value else 'false'
+    elif isinstance(value, (dict, list)):
+        raise DCOSException(
+            'Unsupported value for Mustache variable [{}]: {}'.format(
+                name, json.dumps(value)))
+    return six.text_type(value)
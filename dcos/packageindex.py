@@ -0,0 +1,331 @@
+"""
+Local index of the packages in the configured package repositories.
+
+`sync` downloads the package index of each repository, revalidating the
+copy it has with the repository's ETag, and stores a compact summary of
+every package along with an inverted index of the terms in their names,
+descriptions and tags. `PackageIndex` searches packages and lists their
+versions from that file, without contacting the cluster. Its responses have
+the layout of Cosmos' package/search and package/list-versions, but a
+search matches the start of words, where Cosmos matches any substring, so
+it can find fewer packages.
+"""
+
+import bisect
+import fnmatch
+import json
+import os
+import re
+
+from dcos import config, http, util
+from dcos.errors import DCOSException
+
+logger = util.get_logger(__name__)
+
+INDEX_FILE = 'universe-index.json'
+"""Name of the index file in a cluster's cache directory."""
+
+INDEX_FORMAT_VERSION = 1
+"""Version of the layout of the index file."""
+
+REPOSITORY_MEDIA_TYPES = ', '.join(
+    'application/vnd.dcos.universe.repo+json;charset=utf-8;version={}'.format(
+        version) for version in ['v5', 'v4', 'v3']) + ', application/json'
+"""Accept header of requests for a repository's package index."""
+
+_TERM_PATTERN = re.compile(r'[a-z0-9*]+')
+
+
+def sync(package_manager, path=None):
+    """Updates the local index with the packages of the repositories
+    configured in Cosmos. The index of a repository is only downloaded
+    again if its ETag changed; repositories that can't be fetched keep
+    their previous packages.
+
+    :param package_manager: package manager of the cluster
+    :type package_manager: dcos.packagemanager.PackageManager
+    :param path: path of the index file, by default in the attached
+                 cluster's cache directory
+    :type path: str | None
+    :returns: the updated index
+    :rtype: PackageIndex
+    """
+
+    path = path or _index_path()
+    previous = load(path) if os.path.exists(path) else PackageIndex([])
+    previous_repositories = {repository['uri']: repository
+                             for repository in previous.repositories}
+
+    repos = package_manager.get_repos().get('repositories', [])
+
+    def fetch(repo):
+        return _fetch_repository(repo, previous_repositories.get(repo['uri']))
+
+    repositories = [future.result() for future, _ in util.stream(fetch, repos)]
+    by_uri = {repository['uri']: repository for repository in repositories}
+    index = PackageIndex([by_uri[repo['uri']] for repo in repos])
+    index.save(path)
+    return index
+
+
+def load(path=None):
+    """Loads the local index.
+
+    :param path: path of the index file, by default in the attached
+                 cluster's cache directory
+    :type path: str | None
+    :returns: the index
+    :rtype: PackageIndex
+    """
+
+    path = path or _index_path()
+    try:
+        with util.open_file(path) as index_file:
+            data = json.load(index_file)
+    except ValueError as e:
+        raise DCOSException(
+            'Error parsing package index at [{}]: {}'.format(path, e))
+
+    if data.get('version') != INDEX_FORMAT_VERSION:
+        raise DCOSException(
+            'Unsupported package index format at [{}], please sync it '
+            'again'.format(path))
+
+    return PackageIndex(data['repositories'], data['terms'])
+
+
+class PackageIndex(object):
+    """Packages of a list of repositories, in resolution order: if several
+    repositories have a package, the first one's is used.
+
+    :param repositories: the repositories, each with its name, uri, etag and
+                         package summaries keyed by package name
+    :type repositories: [dict]
+    :param terms: the names of the packages containing each term, computed
+                  from the repositories if not given
+    :type terms: {str: [str]} | None
+    """
+
+    def __init__(self, repositories, terms=None):
+        self.repositories = repositories
+
+        self._packages = {}
+        for repository in repositories:
+            for name, summary in repository['packages'].items():
+                self._packages.setdefault(name, summary)
+
+        if terms is None:
+            terms = {}
+            for name, summary in self._packages.items():
+                for term in _package_terms(name, summary):
+                    terms.setdefault(term, []).append(name)
+            for names in terms.values():
+                names.sort()
+        self._terms = terms
+        self._sorted_terms = sorted(terms)
+
+    def __len__(self):
+        return len(self._packages)
+
+    def __contains__(self, name):
+        return name in self._packages
+
+    def search(self, query=None):
+        """Searches packages: a package matches if each word of the query
+        starts a word of its name, description or tags. Words may contain *
+        wildcards. Unlike Cosmos' package/search, which matches substrings,
+        a word in the middle of another doesn't match.
+
+        :param query: the query, or None for all packages
+        :type query: str | None
+        :returns: the search response
+        :rtype: dict
+        """
+
+        names = set(self._packages)
+        for token in _TERM_PATTERN.findall((query or '').lower()):
+            names &= self._match(token)
+
+        return {'packages': [self._search_result(name)
+                             for name in sorted(names)]}
+
+    def list_versions(self, name):
+        """Lists the versions of a package like Cosmos' package/list-versions.
+
+        :param name: the package name
+        :type name: str
+        :returns: the list-versions response
+        :rtype: dict
+        """
+
+        if name not in self._packages:
+            raise DCOSException(
+                'Package [{}] not found in the local package index'.format(
+                    name))
+        return {'results': dict(self._packages[name]['versions'])}
+
+    def source(self, name, version):
+        """Finds the repository Cosmos takes a package version from.
+
+        :param name: the package name
+        :type name: str
+        :param version: the package version
+        :type version: str
+        :returns: the uri of the first repository with this version of the
+                  package, or None if there is none
+        :rtype: str | None
+        """
+
+        for repository in self.repositories:
+            summary = repository['packages'].get(name)
+            if summary is not None and version in summary['versions']:
+                return repository['uri']
+        return None
+
+    def save(self, path):
+        """Writes the index to a file.
+
+        :param path: path of the index file
+        :type path: str
+        :rtype: None
+        """
+
+        data = {'version': INDEX_FORMAT_VERSION,
+                'repositories': self.repositories,
+                'terms': self._terms}
+        util.ensure_dir_exists(os.path.dirname(path))
+        util.write_file_atomically(
+            path, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    def _match(self, token):
+        """
+        :param token: a word of a query
+        :type token: str
+        :returns: the names of the packages with a term matching the word
+        :rtype: set
+        """
+
+        if '*' in token:
+            terms = fnmatch.filter(self._sorted_terms, token + '*')
+        else:
+            start = bisect.bisect_left(self._sorted_terms, token)
+            end = bisect.bisect_left(self._sorted_terms, token + u'\uffff')
+            terms = self._sorted_terms[start:end]
+
+        names = set()
+        for term in terms:
+            names.update(self._terms[term])
+        return names
+
+    def _search_result(self, name):
+        """
+        :param name: the package name
+        :type name: str
+        :returns: the package's entry in a search response
+        :rtype: dict
+        """
+
+        summary = self._packages[name]
+        result = {key: value for key, value in summary.items()
+                  if key != 'versions'}
+        result['name'] = name
+        result['versions'] = dict(summary['versions'])
+        return result
+
+
+def _index_path():
+    """
+    :returns: path of the index file in the attached cluster's cache
+              directory
+    :rtype: str
+    """
+
+    cache_path = config.get_cluster_cache_path()
+    if cache_path is None:
+        raise DCOSException('No cluster is currently attached.')
+    return os.path.join(cache_path, INDEX_FILE)
+
+
+def _fetch_repository(repo, previous):
+    """Downloads the package index of a repository, unless it didn't change.
+
+    :param repo: the repository, as listed by Cosmos
+    :type repo: dict
+    :param previous: the repository as of the last sync, if any
+    :type previous: dict | None
+    :returns: the repository with its etag and package summaries
+    :rtype: dict
+    """
+
+    headers = {'Accept': REPOSITORY_MEDIA_TYPES}
+    if previous is not None and previous.get('etag'):
+        headers['If-None-Match'] = previous['etag']
+
+    try:
+        response = http.get(
+            repo['uri'],
+            headers=headers,
+            is_success=lambda status: 200 <= status < 300 or status == 304)
+        if response.status_code == 304:
+            logger.info('Package repository [%s] is up to date', repo['uri'])
+            return dict(previous, name=repo['name'])
+        summaries = _summaries(response.json()['packages'])
+    except (DCOSException, KeyError, TypeError, ValueError) as e:
+        logger.warning('Unable to fetch package repository [%s]: %s',
+                       repo['uri'], e)
+        if previous is not None:
+            return dict(previous, name=repo['name'])
+        summaries = {}
+        response = None
+
+    etag = None if response is None else response.headers.get('ETag')
+    return {'name': repo['name'],
+            'uri': repo['uri'],
+            'etag': etag,
+            'packages': summaries}
+
+
+def _summaries(packages):
+    """
+    :param packages: the package definitions of a repository
+    :type packages: [dict]
+    :returns: the summary of each package, with its versions
+    :rtype: {str: dict}
+    """
+
+    summaries = {}
+    for package in sorted(packages,
+                          key=lambda package: package['releaseVersion']):
+        summary = summaries.setdefault(package['name'], {'versions': {}})
+        summary['versions'][package['version']] = str(
+            package['releaseVersion'])
+
+        # the search result shows the latest version
+        summary['currentVersion'] = package['version']
+        summary['description'] = package.get('description', '')
+        summary['tags'] = package.get('tags', [])
+        summary['framework'] = package.get('framework', False)
+        summary['selected'] = package.get('selected', False)
+        images = package.get('resource', {}).get('images')
+        if images:
+            summary['images'] = images
+        else:
+            summary.pop('images', None)
+
+    return summaries
+
+
+def _package_terms(name, summary):
+    """
+    :param name: the package name
+    :type name: str
+    :param summary: the package summary
+    :type summary: dict
+    :returns: the terms a package can be searched by
+    :rtype: set
+    """
+
+    text = ' '.join([name, summary['description']] + summary['tags'])
+    terms = set(_TERM_PATTERN.findall(text.lower().replace('*', ' ')))
+    terms.add(name.lower())
+    return terms
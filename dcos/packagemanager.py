@@ -1,17 +1,81 @@
 import base64
 import collections
 import functools
+import hashlib
+import json
+import os
+import threading
+import time
 
+import jsonschema
 import six
 from six.moves import urllib
 
-from dcos import cosmos, util
+from dcos import (config, cosmos, mustache, packageindex, subcommand,
+                  util)
 from dcos.errors import (DCOSAuthenticationException,
                          DCOSAuthorizationException, DCOSBadRequest,
                          DCOSConnectionError, DCOSException, DCOSHTTPException)
 
 logger = util.get_logger(__name__)
 
+PACKAGES_CACHE_SUBDIR = 'packages'
+"""Name of the subdirectory of a cluster's cache directory holding cached
+package metadata."""
+
+_package_cache = {}
+"""Cached cosmos responses about packages, keyed by `_package_cache_key`.
+Each value is an (expiration time or None, (body, content type)) pair."""
+
+_package_cache_lock = threading.Lock()
+
+_package_cache_fingerprints = {}
+"""The repository fingerprint the package cache was last pruned for, keyed
+by cosmos url."""
+
+_options_validators = {}
+"""Validators of package options, keyed by their schema's JSON text."""
+
+_options_validators_lock = threading.Lock()
+
+PACKAGE_METADATA_FIELDS = [
+    'packagingVersion', 'name', 'version', 'maintainer', 'description',
+    'tags', 'selected', 'scm', 'website', 'framework', 'preInstallNotes',
+    'postInstallNotes', 'postUninstallNotes', 'licenses']
+"""Fields of a package definition that Cosmos copies to the
+DCOS_PACKAGE_METADATA label, along with the package's images."""
+
+
+InstallResult = collections.namedtuple(
+    'InstallResult', ['name', 'version', 'error', 'app', 'cli'])
+"""Outcome of installing a package with `PackageManager.install_many`.
+
+:param name: the package name
+:type name: str
+:param version: the installed version, or None if it couldn't be described
+:type version: str | None
+:param error: the error that prevented installing the package, if any
+:type error: DCOSException | None
+:param app: whether the package's application was installed
+:type app: bool
+:param cli: whether the package's CLI subcommand was installed
+:type cli: bool
+"""
+
+UninstallResult = collections.namedtuple(
+    'UninstallResult', ['name', 'error', 'app', 'cli'])
+"""Outcome of uninstalling a package with `PackageManager.uninstall_many`.
+
+:param name: the package name
+:type name: str
+:param error: the error that prevented uninstalling the package, if any
+:type error: DCOSException | None
+:param app: whether the package's applications were uninstalled
+:type app: bool
+:param cli: whether the package's CLI subcommand was uninstalled
+:type cli: bool
+"""
+
 
 def cosmos_error(fn):
     """Decorator for errors returned from cosmos
@@ -62,12 +126,8 @@ class PackageManager(object):
         :rtype: bool
         """
 
-        if not self.enabled():
-            return False
-
         try:
-            response = self.cosmos.call_endpoint(
-                'capabilities').json()
+            response = self.cosmos.capabilities()
         except DCOSAuthenticationException:
             raise
         except DCOSAuthorizationException:
@@ -78,6 +138,9 @@ class PackageManager(object):
             logger.exception(e)
             return False
 
+        if response is None:
+            return False
+
         if 'capabilities' not in response:
             logger.error(
                 'Request to get cluster capabilities: {} '
@@ -145,17 +208,158 @@ class PackageManager(object):
 
         return True
 
-    def search_sources(self, query):
+    def install_many(self, specs, concurrency=util.STREAM_CONCURRENCY):
+        """Installs several packages in parallel. All the packages are
+        described and their options validated first, then the applications
+        and CLI subcommands of the valid ones are installed. A package that
+        fails doesn't prevent installing the others.
+
+        Each spec is a dict with the package's `name`, and optionally its
+        `version`, `options`, whether to install its `app` (default True),
+        its `cli` (default False), and whether to install the CLI
+        globally (`global`, default False). A package can only be listed
+        once, since installing its CLI twice at once would race.
+
+        :param specs: the packages to install
+        :type specs: [dict]
+        :param concurrency: maximum number of packages processed at once
+        :type concurrency: int
+        :returns: the outcome for each spec, in order
+        :rtype: [InstallResult]
+        """
+
+        _check_package_specs(specs)
+
+        def prepare(index):
+            spec = specs[index]
+            pkg = self.get_package_version(spec['name'], spec.get('version'))
+            if spec.get('app', True):
+                pkg.options(spec.get('options'))
+            return pkg
+
+        def install(index):
+            spec, pkg = specs[index], packages[index]
+            app = cli = False
+            try:
+                if spec.get('app', True):
+                    self.install_app(pkg, spec.get('options'))
+                    app = True
+                if spec.get('cli', False):
+                    subcommand.install(pkg, spec.get('global', False))
+                    cli = True
+            except DCOSException as e:
+                error = e
+            except Exception as e:
+                logger.exception('Error installing package [%s]',
+                                 spec['name'])
+                error = DCOSException('Error installing package [{}]: {}'
+                                      .format(spec['name'], e))
+            else:
+                error = None
+            return InstallResult(pkg.name(), pkg.version(), error, app, cli)
+
+        results = [None] * len(specs)
+        packages = [None] * len(specs)
+        for job, index in util.stream(prepare, range(len(specs)),
+                                      concurrency):
+            spec = specs[index]
+            try:
+                packages[index] = job.result()
+                continue
+            except DCOSException as e:
+                error = e
+            except Exception as e:
+                logger.exception('Error preparing package [%s]', spec['name'])
+                error = DCOSException('Error preparing package [{}]: {}'
+                                      .format(spec['name'], e))
+            results[index] = InstallResult(
+                spec['name'], spec.get('version'), error, False, False)
+
+        valid = [index for index, pkg in enumerate(packages)
+                 if pkg is not None]
+        for job, index in util.stream(install, valid, concurrency):
+            results[index] = job.result()
+
+        return results
+
+    def uninstall_many(self, specs, concurrency=util.STREAM_CONCURRENCY):
+        """Uninstalls several packages in parallel. A package that fails
+        doesn't prevent uninstalling the others.
+
+        Each spec is a dict with the package's `name`, and optionally the
+        `app_id` of the application to uninstall, whether to uninstall `all`
+        its applications (default False), whether to uninstall its `app`
+        (default True) and its `cli` (default False). A package can only be
+        listed once, since uninstalling its CLI twice at once would race.
+
+        :param specs: the packages to uninstall
+        :type specs: [dict]
+        :param concurrency: maximum number of packages processed at once
+        :type concurrency: int
+        :returns: the outcome for each spec, in order
+        :rtype: [UninstallResult]
+        """
+
+        _check_package_specs(specs)
+
+        def uninstall(index):
+            spec = specs[index]
+            app = cli = False
+            try:
+                if spec.get('app', True):
+                    app = self.uninstall_app(
+                        spec['name'], spec.get('all', False),
+                        spec.get('app_id'))
+                if spec.get('cli', False):
+                    cli = subcommand.uninstall(spec['name'])
+            except DCOSException as e:
+                error = e
+            except Exception as e:
+                logger.exception('Error uninstalling package [%s]',
+                                 spec['name'])
+                error = DCOSException('Error uninstalling package [{}]: {}'
+                                      .format(spec['name'], e))
+            else:
+                error = None
+            return UninstallResult(spec['name'], error, app, cli)
+
+        results = [None] * len(specs)
+        for job, index in util.stream(uninstall, range(len(specs)),
+                                      concurrency):
+            results[index] = job.result()
+
+        return results
+
+    def search_sources(self, query, local=False):
         """package search
 
         :param query: query to search
         :type query: str
+        :param local: whether to search the local package index, see
+                      `sync_index`, instead of asking Cosmos. It matches
+                      the start of words rather than any substring.
+        :type local: bool
         :returns: list of package indicies of matching packages
         :rtype: [packages]
         """
+
+        if local:
+            return packageindex.load().search(query)
+
         response = self.cosmos_post("search", {"query": query})
         return response.json()
 
+    def sync_index(self):
+        """Updates the local index of the packages in the configured
+        repositories, used by `search_sources` and `list_versions` when
+        `local` is set.
+
+        :returns: the updated index
+        :rtype: dcos.packageindex.PackageIndex
+        """
+
+        return packageindex.sync(self)
+
     def get_package_version(self, package_name, package_version):
         """Returns PackageVersion of specified package
 
@@ -167,7 +371,50 @@ class PackageManager(object):
         """
 
         return CosmosPackageVersion(package_name, package_version,
-                                    self.cosmos_url)
+                                    self.cosmos_url, self)
+
+    def describe(self, package_name, package_version):
+        """Describes a package. The description of a given version is cached
+        in memory and in the attached cluster's cache directory, for as long
+        as the configured package repositories don't change.
+
+        :param package_name: package name
+        :type package_name: str
+        :param package_version: version of package, or None for the latest
+        :type package_version: str | None
+        :returns: the describe response and its content type
+        :rtype: (dict, str)
+        """
+
+        params = {"packageName": package_name}
+        if package_version is None:
+            response = self.cosmos_post("describe", params)
+            return response.json(), response.headers['Content-Type']
+
+        params["packageVersion"] = package_version
+        return self._cached_post("describe", params, None)
+
+    def list_versions(self, package_name, local=False):
+        """Lists the versions of a package. The list is cached for
+        `package.probe_ttl` seconds.
+
+        :param package_name: package name
+        :type package_name: str
+        :param local: whether to use the local package index, see
+                      `sync_index`, instead of asking Cosmos
+        :type local: bool
+        :returns: the list-versions response
+        :rtype: dict
+        """
+
+        if local:
+            return packageindex.load().list_versions(package_name)
+
+        params = {"packageName": package_name,
+                  "includePackageVersions": True}
+        ttl = config.get_config_val('package.probe_ttl')
+        ttl = cosmos.DEFAULT_PROBE_TTL if ttl is None else util.parse_int(ttl)
+        return self._cached_post("list-versions", params, ttl)[0]
 
     def installed_apps(self, package_name, app_id):
         """List installed packages
@@ -208,7 +455,9 @@ class PackageManager(object):
         :rtype: dict
         """
 
-        return self.cosmos_post("repository/list", params={}).json()
+        repos = self.cosmos_post("repository/list", params={}).json()
+        cosmos.set_probe(self.cosmos_url, 'repositories', repos)
+        return repos
 
     def add_repo(self, name, package_repo, index):
         """Add package repo and update repo with new repo
@@ -227,6 +476,7 @@ class PackageManager(object):
         if index is not None:
             params["index"] = index
         response = self.cosmos_post("repository/add", params=params)
+        cosmos.set_probe(self.cosmos_url, 'repositories', response.json())
         return response.json()
 
     def remove_repo(self, name):
@@ -240,6 +490,7 @@ class PackageManager(object):
 
         params = {"name": name}
         response = self.cosmos_post("repository/delete", params=params)
+        cosmos.set_probe(self.cosmos_url, 'repositories', response.json())
         return response.json()
 
     def package_add_local(self, dcos_package):
@@ -336,20 +587,69 @@ class PackageManager(object):
 
         return self._post(request, params)
 
+    def _repository_fingerprint(self):
+        """Identifies the configured package repositories. The list of
+        repositories is requested at most once per `package.probe_ttl`
+        seconds.
+
+        :returns: a digest of the repository list, or None if it can't be
+                  listed
+        :rtype: str | None
+        """
+
+        found, repos = cosmos.get_probe(self.cosmos_url, 'repositories')
+        if not found:
+            try:
+                repos = self.get_repos()
+            except DCOSException as e:
+                logger.info('Unable to list package repositories: %s', e)
+                return None
+
+        repos = json.dumps(repos, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(repos).hexdigest()
+
+    def _cached_post(self, request, params, ttl):
+        """Request to cosmos server, answered from the package cache if
+        possible.
+
+        :param request: type of request
+        :type request: str
+        :param params: body of request
+        :type params: dict
+        :param ttl: number of seconds to cache the response for, or None to
+                    cache it until the repositories change
+        :type ttl: int | None
+        :returns: the response body and its content type
+        :rtype: (dict, str)
+        """
+
+        fingerprint = self._repository_fingerprint()
+        if fingerprint is None:
+            response = self.cosmos_post(request, params)
+            return response.json(), response.headers['Content-Type']
+
+        _prune_package_cache(self.cosmos_url, fingerprint)
+        key = _package_cache_key(
+            self.cosmos_url, fingerprint, request, params)
+        cached = _get_cached_package(key)
+        if cached is not None:
+            return cached
+
+        response = self.cosmos_post(request, params)
+        result = (response.json(), response.headers['Content-Type'])
+        _set_cached_package(key, result, ttl)
+        return result
+
 
 class CosmosPackageVersion():
     """Interface to a specific package version from cosmos"""
 
-    def __init__(self, name, package_version, url):
+    def __init__(self, name, package_version, url, package_manager=None):
         self._cosmos_url = url
+        self._package_manager = package_manager or PackageManager(url)
 
-        params = {"packageName": name}
-        if package_version is not None:
-            params["packageVersion"] = package_version
-        response = PackageManager(url).cosmos_post("describe", params)
-
-        self._package_json = response.json()
-        self._content_type = response.headers['Content-Type']
+        self._package_json, self._content_type = \
+            self._package_manager.describe(name, package_version)
 
     def __repr__(self):
         return "<CosmosPackageVersion name='{}' version='{}'>".format(
@@ -425,24 +725,33 @@ class CosmosPackageVersion():
 
         return base64.b64decode(template) if template else None
 
-    def marathon_json(self, options):
+    def marathon_json(self, options, local=False):
         """Returns the JSON content of the marathon.json template, after
         rendering it with options.
 
         :param options: the template options to use in rendering
         :type options: dict
+        :param local: whether to render the template in-process, see
+                      `render_marathon_json`. Cosmos still renders it if
+                      that can't reproduce its output.
+        :type local: bool
         :rtype: dict
         """
 
+        if local:
+            try:
+                return self.render_marathon_json(options)
+            except DCOSException as e:
+                logger.info('Unable to render %r locally, asking Cosmos: %s',
+                            self, e)
+
         params = {
             "packageName": self.name(),
             "packageVersion": self.version()
         }
         if options:
             params["options"] = options
-        response = PackageManager(
-            self._cosmos_url
-        ).cosmos_post("render", params)
+        response = self._package_manager.cosmos_post("render", params)
         return response.json().get("marathonJson")
 
     def options(self, user_options):
@@ -453,9 +762,102 @@ class CosmosPackageVersion():
         :rtype: None
         """
 
-        self.marathon_json(user_options)
+        # rendering in-process spares a round trip for valid options. If
+        # that fails, Cosmos has the final say and gives the error message
+        try:
+            self._render_template(user_options)
+        except DCOSException as e:
+            logger.info('Unable to render %r locally, asking Cosmos: %s',
+                        self, e)
+            self.marathon_json(user_options)
         return None
 
+    def render_marathon_json(self, options):
+        """Renders the marathon.json template in-process, like Cosmos'
+        package/render: the options are merged into the defaults of the
+        config schema and validated against it, the template is rendered
+        with them and the package's resources, then the DCOS_PACKAGE_*
+        labels are added.
+
+        The repository in DCOS_PACKAGE_SOURCE comes from the local package
+        index, see `PackageManager.sync_index`. The labels holding base64
+        encoded JSON have the same content as Cosmos', with their keys
+        sorted, which may not be the order Cosmos writes them in.
+
+        :param options: the template options to use in rendering
+        :type options: dict | None
+        :returns: the rendered Marathon app definition
+        :rtype: dict
+        """
+
+        app = self._render_template(options)
+        if not isinstance(app, dict):
+            raise DCOSException(
+                'Rendered Marathon template is not a JSON object')
+
+        source = packageindex.load().source(self.name(), self.version())
+        if source is None:
+            raise DCOSException(
+                'Package [{}] version [{}] is not in the local package '
+                'index'.format(self.name(), self.version()))
+
+        package = self.package_json()
+        metadata = {field: package[field] for field in PACKAGE_METADATA_FIELDS
+                    if package.get(field) is not None}
+        images = (self.resource_json() or {}).get('images')
+        if images is not None:
+            metadata['images'] = images
+
+        labels = dict(app.get('labels') or {})
+        labels.update({
+            'DCOS_PACKAGE_METADATA': _label_json(metadata),
+            'DCOS_PACKAGE_DEFINITION': _label_json(package),
+            'DCOS_PACKAGE_OPTIONS': _label_json(options or {}),
+            'DCOS_PACKAGE_SOURCE': source,
+            'DCOS_PACKAGE_NAME': self.name(),
+            'DCOS_PACKAGE_VERSION': self.version(),
+        })
+        app['labels'] = labels
+        return app
+
+    def _render_template(self, options):
+        """Renders the marathon.json template in-process, without the
+        labels Cosmos adds.
+
+        :param options: the template options to use in rendering
+        :type options: dict | None
+        :returns: the rendered Marathon app definition
+        :rtype: dict
+        """
+
+        template = self.marathon_template()
+        if template is None:
+            raise DCOSException(
+                'Package [{}] has no Marathon template'.format(self.name()))
+
+        schema = self.config_json()
+        if schema is None:
+            if options:
+                raise DCOSException(
+                    'Package [{}] does not accept options'.format(
+                        self.name()))
+            options = {}
+        else:
+            options = _merge_options(_schema_defaults(schema), options or {})
+            errors = sorted(error.message for error in
+                            _options_validator(schema).iter_errors(options))
+            if errors:
+                raise DCOSException(
+                    'Invalid options: {}'.format('; '.join(errors)))
+
+        context = dict(options, resource=self.resource_json() or {})
+        rendered = mustache.render(template.decode('utf-8'), context)
+        try:
+            return json.loads(rendered)
+        except ValueError as e:
+            raise DCOSException(
+                'Rendered Marathon template is not valid JSON: {}'.format(e))
+
     def cli_definition(self):
         """Returns the JSON content that defines a cli subcommand. Looks for
         "cli" property in resource.json first and if that is None, checks for
@@ -485,20 +887,298 @@ class CosmosPackageVersion():
         :rtype: []
         """
 
-        params = {"packageName": self.name(), "includePackageVersions": True}
-        response = PackageManager(self._cosmos_url).cosmos_post(
-            "list-versions", params)
+        response = self._package_manager.list_versions(self.name())
 
         return list(
             version for (version, releaseVersion) in
             sorted(
-                response.json().get("results").items(),
+                response.get("results").items(),
                 key=lambda item: int(item[1]),  # release version
                 reverse=True
             )
         )
 
 
+def _label_json(value):
+    """
+    :param value: the value of a label
+    :type value: dict
+    :returns: the value as Cosmos stores it in a label: base64 encoded,
+              compact JSON
+    :rtype: str
+    """
+
+    text = json.dumps(value, separators=(',', ':'), sort_keys=True,
+                      ensure_ascii=False)
+    return base64.b64encode(text.encode('utf-8')).decode('ascii')
+
+
+def _check_package_specs(specs):
+    """Makes sure each spec of `install_many` or `uninstall_many` names a
+    different package.
+
+    :param specs: the package specs
+    :type specs: [dict]
+    :rtype: None
+    """
+
+    names = set()
+    for spec in specs:
+        name = spec.get('name')
+        if not name:
+            raise DCOSException('Package spec {!r} has no name'.format(spec))
+        if name in names:
+            raise DCOSException(
+                'Package [{}] is listed more than once'.format(name))
+        names.add(name)
+
+
+def _schema_defaults(schema):
+    """Collects the default values of a config schema, like Cosmos does:
+    properties that don't have a default but have properties themselves get
+    their defaults.
+
+    :param schema: a config schema
+    :type schema: dict
+    :returns: the defaults
+    :rtype: dict
+    """
+
+    defaults = {}
+    for name, prop in schema.get('properties', {}).items():
+        if not isinstance(prop, dict):
+            continue
+        elif 'default' in prop:
+            defaults[name] = prop['default']
+        elif 'properties' in prop:
+            defaults[name] = _schema_defaults(prop)
+    return defaults
+
+
+def _merge_options(defaults, options):
+    """
+    :param defaults: the default options
+    :type defaults: dict
+    :param options: the user options, overriding the defaults
+    :type options: dict
+    :returns: the options merged recursively into the defaults
+    :rtype: dict
+    """
+
+    merged = dict(defaults)
+    for name, value in options.items():
+        if isinstance(value, dict) and isinstance(merged.get(name), dict):
+            merged[name] = _merge_options(merged[name], value)
+        else:
+            merged[name] = value
+    return merged
+
+
+def _options_validator(schema):
+    """
+    :param schema: a config schema
+    :type schema: dict
+    :returns: the shared validator of the schema
+    :rtype: jsonschema.Draft4Validator
+    """
+
+    key = json.dumps(schema, sort_keys=True)
+    with _options_validators_lock:
+        validator = _options_validators.get(key)
+        if validator is None:
+            validator = jsonschema.Draft4Validator(schema)
+            _options_validators[key] = validator
+    return validator
+
+
+def invalidate_cache():
+    """Forgets the cached package metadata, in memory and in the attached
+    cluster's cache directory.
+
+    :rtype: None
+    """
+
+    with _package_cache_lock:
+        _package_cache.clear()
+        _package_cache_fingerprints.clear()
+
+        path = _package_cache_path()
+        if path is not None and os.path.isdir(path):
+            for name in os.listdir(path):
+                os.remove(os.path.join(path, name))
+
+
+def _package_cache_key(cosmos_url, fingerprint, request, params):
+    """
+    :param cosmos_url: the url of cosmos
+    :type cosmos_url: str
+    :param fingerprint: identifies the configured package repositories
+    :type fingerprint: str
+    :param request: type of request
+    :type request: str
+    :param params: body of request
+    :type params: dict
+    :returns: the key of the response in the package cache
+    :rtype: str
+    """
+
+    return json.dumps([cosmos_url, fingerprint, request, params],
+                      sort_keys=True)
+
+
+def _prune_package_cache(cosmos_url, fingerprint):
+    """Forgets the cached responses of a cosmos for other repository
+    fingerprints, which can't be used anymore, in memory and in the
+    attached cluster's cache directory.
+
+    :param cosmos_url: the url of cosmos
+    :type cosmos_url: str
+    :param fingerprint: identifies the current package repositories
+    :type fingerprint: str
+    :rtype: None
+    """
+
+    with _package_cache_lock:
+        if _package_cache_fingerprints.get(cosmos_url) == fingerprint:
+            return
+        _package_cache_fingerprints[cosmos_url] = fingerprint
+
+        for key in list(_package_cache):
+            key_url, key_fingerprint = json.loads(key)[:2]
+            if key_url == cosmos_url and key_fingerprint != fingerprint:
+                del _package_cache[key]
+
+    # the directory belongs to the attached cluster, so it only holds the
+    # responses of its cosmos
+    path = _package_cache_path()
+    if path is None or not os.path.isdir(path):
+        return
+    prefix = _package_cache_prefix(fingerprint)
+    for name in os.listdir(path):
+        if name.endswith('.json') and not name.startswith(prefix):
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError as e:
+                logger.info('Unable to remove package metadata: %s', e)
+
+
+def _package_cache_path():
+    """
+    :returns: the directory of the attached cluster's package cache, or
+              None if no cluster is attached
+    :rtype: str | None
+    """
+
+    cache_path = config.get_cluster_cache_path()
+    if cache_path is None:
+        return None
+    return os.path.join(cache_path, PACKAGES_CACHE_SUBDIR)
+
+
+def _get_cached_package(key):
+    """
+    :param key: the key of the response
+    :type key: str
+    :returns: the unexpired cached response body and content type, if any
+    :rtype: (dict, str) | None
+    """
+
+    with _package_cache_lock:
+        cached = _package_cache.get(key)
+        if cached is None:
+            cached = _read_cached_package(key)
+            if cached is not None:
+                _package_cache[key] = cached
+
+    if cached is None:
+        return None
+
+    expires, result = cached
+    if expires is not None and expires <= time.time():
+        return None
+    return result
+
+
+def _set_cached_package(key, result, ttl):
+    """
+    :param key: the key of the response
+    :type key: str
+    :param result: the response body and content type
+    :type result: (dict, str)
+    :param ttl: number of seconds to cache the response for, or None
+    :type ttl: int | None
+    :rtype: None
+    """
+
+    expires = None if ttl is None else time.time() + ttl
+    with _package_cache_lock:
+        _package_cache[key] = (expires, result)
+
+    path = _package_cache_path()
+    if path is None:
+        return
+    entry = {'key': key, 'expires': expires, 'body': result[0],
+             'content_type': result[1]}
+    try:
+        util.ensure_dir_exists(path)
+        util.write_file_atomically(
+            _package_cache_file(path, key),
+            json.dumps(entry).encode('utf-8'))
+    except (DCOSException, IOError, OSError) as e:
+        logger.warning('Unable to store package metadata: %s', e)
+
+
+def _read_cached_package(key):
+    """
+    :param key: the key of the response
+    :type key: str
+    :returns: the expiration time and response stored on disk, if any
+    :rtype: (float | None, (dict, str)) | None
+    """
+
+    path = _package_cache_path()
+    if path is None:
+        return None
+
+    try:
+        with open(_package_cache_file(path, key)) as entry_file:
+            entry = json.load(entry_file)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if not isinstance(entry, dict) or entry.get('key') != key:
+        return None
+    return entry['expires'], (entry['body'], entry['content_type'])
+
+
+def _package_cache_file(path, key):
+    """
+    :param path: the directory of the package cache
+    :type path: str
+    :param key: the key of a response
+    :type key: str
+    :returns: the path of the file holding the response
+    :rtype: str
+    """
+
+    fingerprint = json.loads(key)[1]
+    name = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return os.path.join(
+        path, '{}{}.json'.format(_package_cache_prefix(fingerprint), name))
+
+
+def _package_cache_prefix(fingerprint):
+    """
+    :param fingerprint: identifies the package repositories
+    :type fingerprint: str
+    :returns: the start of the names of the files holding the responses
+              for these repositories
+    :rtype: str
+    """
+
+    return fingerprint[:16] + '-'
+
+
 def _format_error_message(error):
     """Returns formatted error message based on error type
 
@@ -18,8 +18,6 @@ header of 4 bytes to directly encode an unsigned 32 bit
 length.
 """
 
-from six import BytesIO
-
 from dcos.errors import DCOSException
 
 
@@ -82,7 +80,14 @@ class Decoder(object):
        The 'decode(data)' message takes a 'UTF-8' encoded byte array
        as input and buffers it across subsequent calls to
        construct a set of fully constructed 'RecordIO' messages that
-       are decoded and returned in a list.
+       are decoded and returned in a list. 'decode_iter(data)' does
+       the same but yields the messages as they are decoded.
+
+       Incoming data is appended to a single buffer. Headers are
+       located with a search for the newline delimiter and each
+       record is copied out of the buffer exactly once, so the cost
+       of decoding is proportional to the number of records rather
+       than the number of bytes.
 
        :param deserialize: a function to deserialize from 'RecordIO'
                            messages built up by subsequent calls
@@ -97,8 +102,8 @@ class Decoder(object):
     def __init__(self, deserialize):
         self.deserialize = deserialize
         self.state = self.HEADER
-        self.buffer = BytesIO()
-        self.buffer_length = 0
+        self.buffer = bytearray()
+        self.position = 0
         self.length = 0
 
     def decode(self, data):
@@ -113,58 +118,90 @@ class Decoder(object):
         :rtype: list
         """
 
-        if not isinstance(data, bytes):
+        return list(self.decode_iter(data))
+
+    def decode_iter(self, data):
+        """Decode a 'RecordIO' formatted message to its original type,
+        yielding each message as soon as it is complete.
+
+        `data` is buffered immediately; the records it completes are
+        decoded as the returned generator is consumed.
+
+        :param data: an array of 'UTF-8' encoded bytes that make up a
+                      partial 'RecordIO' message. Subsequent calls to this
+                      function maintain state to build up a full 'RecordIO'
+                      message and decode it
+        :type data: bytes | bytearray | memoryview
+        :returns: a generator of deserialized messages
+        :rtype: generator
+        """
+
+        if not isinstance(data, (bytes, bytearray, memoryview)):
             raise DCOSException("Parameter 'data' must of of type 'bytes'")
 
         if self.state == self.FAILED:
             raise DCOSException("Decoder is in a FAILED state")
 
-        records = []
-
-        in_buffer = BytesIO(data)
-
-        for i in range(len(data)):
-            c = in_buffer.read(1)
-            if self.state == self.HEADER:
-                if c != b'\n':
-                    self.buffer.write(c)
-                    continue
-
-                self.buffer.seek(0)
-                num = self.buffer.read()
-                try:
-                    self.length = int(num)
-                except Exception as exception:
-                    self.state = self.FAILED
-                    raise DCOSException("Failed to decode length"
-                                        "'{buffer}': {error}"
-                                        .format(buffer=num,
-                                                error=exception))
-
-                self._reset_buffer()
-                self.state = self.RECORD
-
-                # Note that for 0 length records, we immediately decode.
-                if self.length <= 0:
-                    self.buffer.seek(0)
-                    records.append(self.deserialize(self.buffer.read()))
-                    self.state = self.HEADER
-
-            elif self.state == self.RECORD:
-                assert self.length
-                assert self.buffer_length < self.length
-
-                self.buffer.write(c)
-                self.buffer_length += 1
-
-                if self.buffer_length == self.length:
-                    self.buffer.seek(0)
-                    records.append(self.deserialize(self.buffer.read()))
-                    self._reset_buffer()
-                    self.state = self.HEADER
-
-        return records
-
-    def _reset_buffer(self):
-        self.buffer = BytesIO()
-        self.buffer_length = 0
+        self.buffer.extend(data)
+        return self._records()
+
+    def _records(self):
+        """Yields the deserialized messages that are complete in the buffer.
+
+        :returns: a generator of deserialized messages
+        :rtype: generator
+        """
+
+        while True:
+            record = self._next_record()
+            if record is None:
+                return
+            yield self.deserialize(record)
+
+    def _next_record(self):
+        """Extracts the next complete record from the buffer. If there is
+        none, the consumed part of the buffer is discarded.
+
+        :returns: the next record or None if more data is needed
+        :rtype: bytes | None
+        """
+
+        if self.state == self.HEADER:
+            end = self.buffer.find(b'\n', self.position)
+            if end < 0:
+                self._compact()
+                return None
+
+            num = bytes(self.buffer[self.position:end])
+            try:
+                self.length = max(int(num), 0)
+            except Exception as exception:
+                self.state = self.FAILED
+                raise DCOSException("Failed to decode length"
+                                    "'{buffer}': {error}"
+                                    .format(buffer=num,
+                                            error=exception))
+
+            self.position = end + 1
+            self.state = self.RECORD
+
+        if len(self.buffer) - self.position < self.length:
+            self._compact()
+            return None
+
+        # Note that for 0 length records, we immediately decode.
+        end = self.position + self.length
+        view = memoryview(self.buffer)
+        record = view[self.position:end].tobytes()
+        del view
+
+        self.position = end
+        self.state = self.HEADER
+        return record
+
+    def _compact(self):
+        """Discards the consumed part of the buffer."""
+
+        if self.position:
+            del self.buffer[:self.position]
+            self.position = 0
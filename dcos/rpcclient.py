@@ -5,7 +5,7 @@ import pkg_resources
 
 from six.moves import urllib
 
-from dcos import http, util
+from dcos import asynchttp, http, util
 from dcos.errors import DCOSException, DCOSHTTPException
 
 logger = util.get_logger(__name__)
@@ -15,6 +15,10 @@ def create_client(url, timeout):
     return RpcClient(url, timeout)
 
 
+def create_async_client(url, timeout):
+    return AsyncRpcClient(url, timeout)
+
+
 def load_error_json_schema():
     """Reads and parses Marathon error response JSON schema from file
 
@@ -126,26 +130,77 @@ class RpcClient(object):
         try:
             return method_fn(url, *args, **kwargs)
         except DCOSHTTPException as e:
-            text = _get_response_text(e.response)
-            logger.error('DCOS Error: %s\n%s',
-                         e.response.reason, text)
-
-            try:
-                json_body = e.response.json()
-            except Exception:
-                logger.exception(
-                    'Unable to decode response body as a JSON value: %r',
-                    e.response)
-
-                json_body = None
-
-            message = RpcClient.response_error_message(
-                status_code=e.response.status_code,
-                reason=e.response.reason,
-                request_method=e.response.request.method,
-                request_url=e.response.request.url,
-                json_body=json_body)
-            raise DCOSException(message)
+            raise _http_error(e)
+
+
+class AsyncRpcClient(RpcClient):
+    """`RpcClient` for asyncio event loops, whose `http_req` takes the
+    method functions of `dcos.asynchttp` and returns a future.
+
+    :param base_url: the URL prefix to use for all requests
+    :type base_url: str
+    :param timeout: number of seconds to wait for a response
+    :type timeout: float
+    """
+
+    def http_req(self, method_fn, path, *args, **kwargs):
+        """Make an HTTP request, and raise a DCOS-specific exception for
+        HTTP error codes.
+
+        :param method_fn: function to call that invokes a specific HTTP method
+        :type method_fn: function
+        :param path: the endpoint path to append to this object's base URL
+        :type path: str
+        :param args: additional args to pass to `method_fn`
+        :type args: [object]
+        :param kwargs: kwargs to pass to `method_fn`
+        :type kwargs: dict
+        :returns: future of the `method_fn` response
+        :rtype: asyncio.Future
+        """
+
+        url = self._base_url + path.lstrip('/')
+
+        if 'timeout' not in kwargs:
+            kwargs['timeout'] = self._timeout
+
+        def on_error(e):
+            if isinstance(e, DCOSHTTPException):
+                raise _http_error(e)
+            raise e
+
+        return asynchttp.then(
+            method_fn(url, *args, **kwargs), on_error=on_error)
+
+
+def _http_error(e):
+    """
+    :param e: the exception for an unsuccessful response
+    :type e: DCOSHTTPException
+    :returns: the exception with a human-readable error message
+    :rtype: DCOSException
+    """
+
+    text = _get_response_text(e.response)
+    logger.error('DCOS Error: %s\n%s',
+                 e.response.reason, text)
+
+    try:
+        json_body = e.response.json()
+    except Exception:
+        logger.exception(
+            'Unable to decode response body as a JSON value: %r',
+            e.response)
+
+        json_body = None
+
+    message = RpcClient.response_error_message(
+        status_code=e.response.status_code,
+        reason=e.response.reason,
+        request_method=e.response.request.method,
+        request_url=e.response.request.url,
+        json_body=json_body)
+    return DCOSException(message)
 
 
 def _get_response_text(response):
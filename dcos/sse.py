@@ -7,7 +7,7 @@ def get(url, **kwargs):
     """ Make a get request to streaming endpoint which
     implements SSE (Server sent events). The parameter session=http
     will ensure we are using `dcos.http` module with all required auth
-    headers.
+    headers and its pooled connections.
 
     :param url: server sent events streaming URL
     :type url: str
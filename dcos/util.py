@@ -241,6 +241,32 @@ def read_file(path):
         return file_.read()
 
 
+def write_file_atomically(path, data):
+    """Replaces the content of a file, so that readers see either the old or
+    the new content.
+
+    :param path: path to file
+    :type path: str
+    :param data: the new content
+    :type data: bytes
+    :rtype: None
+    """
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as file_:
+            file_.write(data)
+        if hasattr(os, 'replace'):
+            os.replace(temp_path, path)
+        else:
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
 def enforce_file_permissions(path):
     """Enforce 400 or 600 permissions on file
 
@@ -677,7 +703,7 @@ def io_exception(path, errno):
 STREAM_CONCURRENCY = 20
 
 
-def stream(fn, objs):
+def stream(fn, objs, concurrency=STREAM_CONCURRENCY):
     """Apply `fn` to `objs` in parallel, yielding the (Future, obj) for
     each as it completes.
 
@@ -685,12 +711,14 @@ def stream(fn, objs):
     :type fn: function
     :param objs: objs
     :type objs: objs
+    :param concurrency: maximum number of objs processed at once
+    :type concurrency: int
     :returns: iterator over (Future, typeof(obj))
     :rtype: iterator over (Future, typeof(obj))
 
     """
 
-    with concurrent.futures.ThreadPoolExecutor(STREAM_CONCURRENCY) as pool:
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
         jobs = {pool.submit(fn, obj): obj for obj in objs}
         for job in concurrent.futures.as_completed(jobs):
             yield job, jobs[job]
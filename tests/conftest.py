@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+from six.moves import BaseHTTPServer, socketserver
+
+
+class FakeHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """HTTP server on a free local port, serving `handler` from a
+    background thread.
+
+    :param handler: the request handler class
+    :type handler: BaseHTTPServer.BaseHTTPRequestHandler
+    """
+
+    daemon_threads = True
+
+    def __init__(self, handler):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), handler)
+        thread = threading.Thread(target=self.serve_forever, args=(0.05,))
+        thread.daemon = True
+        thread.start()
+
+    def url(self, path=''):
+        return 'http://127.0.0.1:{}/{}'.format(self.server_address[1], path)
+
+
+@pytest.fixture
+def http_server():
+    """Starts fake HTTP servers, which are shut down after the test.
+
+    Call it with a request handler class, and attributes to set on the
+    server for the handler to use as `self.server.<name>`.
+    """
+
+    servers = []
+
+    def start(handler, **attributes):
+        server = FakeHTTPServer(handler)
+        servers.append(server)
+        for name, value in attributes.items():
+            setattr(server, name, value)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
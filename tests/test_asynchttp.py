@@ -0,0 +1,254 @@
+import gzip
+import io
+import json
+import time
+
+import mock
+import pytest
+
+from six.moves import BaseHTTPServer, urllib
+
+from dcos import asynchttp, config, marathon, mesos, rpcclient
+from dcos.errors import (DCOSAuthenticationException, DCOSException,
+                         DCOSHTTPException, DCOSUnprocessableException)
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+pytestmark = pytest.mark.skipif(
+    asyncio is None, reason='dcos.asynchttp requires Python 3')
+
+
+def test_get_json_with_params_and_auth(server, loop):
+    response = _run(loop, asynchttp.get(
+        server.url('echo'), params={'a': '1'}, toml_config=server.config,
+        loop=loop))
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'path': '/echo',
+        'query': {'a': ['1']},
+        'authorization': 'token=secret',
+        'body': ''}
+
+
+def test_post_json(server, loop):
+    response = _run(loop, asynchttp.post(
+        server.url('echo'), json={'x': 1}, toml_config=server.config,
+        loop=loop))
+
+    assert json.loads(response.json()['body']) == {'x': 1}
+
+
+def test_concurrent_requests_share_the_pool(server, loop):
+    futures = [asynchttp.get(server.url('echo'), params={'i': str(i)},
+                             toml_config=server.config, loop=loop)
+               for i in range(200)]
+
+    responses = _run(loop, asyncio.gather(*futures))
+
+    assert [r.json()['query']['i'] for r in responses] == \
+        [[str(i)] for i in range(200)]
+    assert len(server.clients) <= 4
+
+
+def test_chunked_response(server, loop):
+    response = _run(loop, asynchttp.get(
+        server.url('chunked'), toml_config=server.config, loop=loop))
+
+    assert response.text == 'hello chunked world'
+
+
+def test_gzip_response(server, loop):
+    response = _run(loop, asynchttp.get(
+        server.url('gzip'), toml_config=server.config, loop=loop))
+
+    assert response.json() == {'compressed': True}
+
+
+def test_redirect(server, loop):
+    response = _run(loop, asynchttp.get(
+        server.url('redirect'), toml_config=server.config, loop=loop))
+
+    assert response.json()['path'] == '/echo'
+    assert [r.status_code for r in response.history] == [302]
+
+
+@pytest.mark.parametrize('status, exception', [
+    (404, DCOSHTTPException),
+    (401, DCOSAuthenticationException),
+    (422, DCOSUnprocessableException),
+])
+def test_error_status(server, loop, status, exception):
+    future = asynchttp.get(
+        server.url('status/{}'.format(status)), toml_config=server.config,
+        loop=loop)
+
+    with pytest.raises(exception) as e:
+        _run(loop, future)
+    assert e.value.response.status_code == status
+
+
+def test_is_success(server, loop):
+    response = _run(loop, asynchttp.get(
+        server.url('status/404'), is_success=lambda status: True,
+        toml_config=server.config, loop=loop))
+
+    assert response.status_code == 404
+
+
+def test_read_timeout(server, loop):
+    future = asynchttp.get(
+        server.url('slow'), timeout=(1, 0.1), toml_config=server.config,
+        loop=loop)
+
+    with pytest.raises(DCOSException) as e:
+        _run(loop, future)
+    assert 'timed out' in str(e.value)
+
+
+def test_unsupported_argument(server, loop):
+    with pytest.raises(DCOSException):
+        asynchttp.get(server.url('echo'), stream=True,
+                      toml_config=server.config, loop=loop)
+
+
+def test_proxy_is_rejected(server, loop, monkeypatch):
+    for name in ('no_proxy', 'NO_PROXY'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('HTTP_PROXY', 'http://proxy.example.com:3128')
+
+    with pytest.raises(DCOSException) as e:
+        asynchttp.get(server.url('echo'), toml_config=server.config,
+                      loop=loop)
+    assert 'proxy.example.com' in str(e.value)
+
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1')
+    response = _run(loop, asynchttp.get(
+        server.url('echo'), toml_config=server.config, loop=loop))
+    assert response.status_code == 200
+
+
+def test_rpc_client_translates_errors(server, loop):
+    client = rpcclient.create_async_client(server.url(), 5)
+
+    with pytest.raises(DCOSException) as e:
+        _run(loop, client.http_req(asynchttp.get, 'status/404'))
+    assert not isinstance(e.value, DCOSHTTPException)
+    assert str(e.value) == 'Error: no'
+
+
+def test_marathon_async_client(server, loop):
+    client = marathon.AsyncClient(
+        rpcclient.create_async_client(server.url(), 5))
+
+    apps, tasks, missing = _run(loop, asyncio.gather(
+        client.get_apps(), client.get_tasks('/app-1'),
+        client.get_tasks('/nope')))
+
+    assert [app['id'] for app in apps] == ['/app-1']
+    assert tasks == [{'id': 'app-1.1', 'appId': '/app-1'}]
+    assert missing == []
+
+
+def test_mesos_async_client(server, loop):
+    with mock.patch('dcos.config.get_config', return_value=server.config):
+        client = mesos.AsyncDCOSClient()
+
+    state = _run(loop, client.get_master_state())
+
+    assert state == {'path': '/mesos/master/state.json', 'query': {},
+                     'authorization': 'token=secret', 'body': ''}
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # noqa: N802
+        self.server.clients.add(self.client_address)
+        path = urllib.parse.urlparse(self.path).path
+
+        if path == '/chunked':
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in [b'hello ', b'chunked ', b'world']:
+                self.wfile.write('{:x}\r\n'.format(len(chunk)).encode())
+                self.wfile.write(chunk + b'\r\n')
+            self.wfile.write(b'0\r\n\r\n')
+        elif path == '/gzip':
+            data = io.BytesIO()
+            with gzip.GzipFile(fileobj=data, mode='wb') as f:
+                f.write(b'{"compressed": true}')
+            self._send(200, data.getvalue(), {'Content-Encoding': 'gzip'})
+        elif path == '/redirect':
+            self._send(302, b'', {'Location': '/echo'})
+        elif path.startswith('/status/'):
+            self._send(int(path.rpartition('/')[2]), b'{"message": "no"}')
+        elif path == '/slow':
+            time.sleep(1)
+            self._send(200, b'{}')
+        elif path == '/v2/apps':
+            self._json({'apps': [{'id': '/app-1'}]})
+        elif path == '/v2/apps/app-1/tasks':
+            self._json({'tasks': [{'id': 'app-1.1', 'appId': '/app-1'}]})
+        elif path.startswith('/v2/'):
+            self._send(404, b'{"message": "not found"}')
+        else:
+            self._echo(b'')
+
+    def do_POST(self):  # noqa: N802
+        length = int(self.headers.get('Content-Length', 0))
+        self._echo(self.rfile.read(length))
+
+    def _echo(self, body):
+        url = urllib.parse.urlparse(self.path)
+        self._json({
+            'path': url.path,
+            'query': urllib.parse.parse_qs(url.query),
+            'authorization': self.headers.get('Authorization'),
+            'body': body.decode('utf-8')})
+
+    def _json(self, body):
+        self._send(200, json.dumps(body).encode('utf-8'))
+
+    def _send(self, status, data, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(http_server):
+    server = http_server(_Handler, clients=set())
+    server.config = config.Toml({'core': {
+        'dcos_url': server.url(),
+        'dcos_acs_token': 'secret',
+        'http_pool_size': 4,
+        'timeout': 5}})
+    with mock.patch('dcos.config.get_config', return_value=server.config):
+        yield server
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asynchttp.close_connections(loop)
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+def _run(loop, future):
+    return loop.run_until_complete(future)
@@ -1,6 +1,7 @@
 import os
 
 import pytest
+import toml
 
 from mock import patch
 
@@ -202,6 +203,77 @@ def test_get_cluster_name_ignore_env():
         assert cluster_name == 'real-name'
 
 
+def test_load_from_path_is_cached_until_file_changes():
+    with util.tempdir() as tempdir:
+        path = os.path.join(tempdir, "dcos.toml")
+        util.ensure_file_exists(path)
+        with open(path, 'w') as f:
+            f.write('[core]\ndcos_url = "http://one"\n')
+
+        assert config.load_from_path(path)['core.dcos_url'] == 'http://one'
+
+        with patch('toml.loads') as loads_mock:
+            assert config.load_from_path(path)['core.dcos_url'] == \
+                'http://one'
+            assert loads_mock.call_count == 0
+
+        with open(path, 'w') as f:
+            f.write('[core]\ndcos_url = "http://other"\n')
+
+        assert config.load_from_path(path)['core.dcos_url'] == 'http://other'
+
+
+def test_set_val_invalidates_cached_config():
+    with env(), util.tempdir() as tempdir:
+        os.environ.pop('DCOS_CONFIG', None)
+        os.environ[constants.DCOS_DIR_ENV] = tempdir
+        add_cluster_dir("fake-cluster", tempdir)
+
+        assert config.get_config_val("core.dcos_url") is None
+
+        config.set_val("core.dcos_url", "http://example.com")
+        assert config.get_config_val("core.dcos_url") == "http://example.com"
+
+        config.unset("core.dcos_url")
+        assert config.get_config_val("core.dcos_url") is None
+
+
+def test_get_config_stat_count_with_many_clusters():
+    with env(), util.tempdir() as tempdir:
+        os.environ.pop('DCOS_CONFIG', None)
+        os.environ.pop(constants.DCOS_CLUSTER, None)
+        os.environ[constants.DCOS_DIR_ENV] = tempdir
+
+        for i in range(30):
+            cluster_path = add_cluster_dir("cluster-{}".format(i), tempdir)
+            config.set_val(
+                "cluster.name", "name-{}".format(i),
+                config_path=os.path.join(cluster_path, "dcos.toml"))
+        util.ensure_file_exists(os.path.join(
+            cluster_path, constants.DCOS_CLUSTER_ATTACHED_FILE))
+
+        def _count_stats(cached):
+            config.get_config()
+            if not cached:
+                config.invalidate_cache()
+            with patch('os.stat', wraps=os.stat) as stat_mock, \
+                    patch('os.listdir', wraps=os.listdir) as listdir_mock, \
+                    patch('toml.loads', wraps=toml.loads) as loads_mock:
+                config.get_config()
+            return (stat_mock.call_count,
+                    listdir_mock.call_count,
+                    loads_mock.call_count)
+
+        uncached_stats, _, uncached_loads = _count_stats(False)
+        cached_stats, cached_listdirs, cached_loads = _count_stats(True)
+
+        assert uncached_loads == 1
+        assert uncached_stats > 30
+        assert cached_loads == 0
+        assert cached_listdirs == 0
+        assert cached_stats <= 5
+
+
 def _create_clusters_dir(dcos_dir):
     clusters_dir = os.path.join(dcos_dir, constants.DCOS_CLUSTERS_SUBDIR)
     util.ensure_dir_exists(clusters_dir)
@@ -1,11 +1,19 @@
+import os
+import threading
+import time
+
+import pytest
+
 from mock import patch
 
 from requests import Response
+from requests.structures import CaseInsensitiveDict
 
 from dcos import config, http
+from dcos.errors import DCOSHTTPException
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_request_default_timeout_without_config(requests_mock):
     timeout = True
     toml_config = config.Toml({})
@@ -18,7 +26,7 @@ def test_request_default_timeout_without_config(requests_mock):
         expected_timeout)
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_request_default_timeout_with_config(requests_mock):
     timeout = 5
 
@@ -35,7 +43,7 @@ def test_request_default_timeout_with_config(requests_mock):
         expected_timeout)
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_request_timeout_with_numeric_argument(requests_mock):
     timeout = 30
     toml_config = config.Toml({})
@@ -48,7 +56,7 @@ def test_request_timeout_with_numeric_argument(requests_mock):
         expected_timeout)
 
 
-@patch('requests.request')
+@patch('requests.Session.request')
 def test_request_timeout_with_tuple_argument(requests_mock):
     timeout = (5, 30)
     toml_config = config.Toml({})
@@ -79,3 +87,213 @@ def _assert_request_timeout(
         timeout=expected_timeout,
         headers={},
         verify=None)
+
+
+def test_get_session_reuses_session_per_host_and_verify():
+    http.close_sessions()
+    toml_config = config.Toml({})
+
+    session = http.get_session(
+        'https://www.example.com/a', True, toml_config)
+
+    assert http.get_session(
+        'https://www.example.com/b', True, toml_config) is session
+    assert http.get_session(
+        'https://www.example.com/a', False, toml_config) is not session
+    assert http.get_session(
+        'https://www.example.org/a', True, toml_config) is not session
+
+
+def test_get_session_uses_configured_pool_size():
+    http.close_sessions()
+    toml_config = config.Toml({
+        'core': {'http_pool_size': 3}
+    })
+
+    session = http.get_session('https://www.example.com', None, toml_config)
+
+    adapter = session.get_adapter('https://www.example.com')
+    assert adapter._pool_maxsize == 3
+
+
+def test_close_sessions_discards_pooled_sessions():
+    toml_config = config.Toml({})
+    session = http.get_session('https://www.example.com', None, toml_config)
+
+    http.close_sessions()
+
+    assert http.get_session(
+        'https://www.example.com', None, toml_config) is not session
+
+
+def test_get_session_discards_sessions_after_fork():
+    toml_config = config.Toml({})
+    session = http.get_session('https://www.example.com', None, toml_config)
+
+    with patch('os.getpid', return_value=os.getpid() + 1):
+        assert http.get_session(
+            'https://www.example.com', None, toml_config) is not session
+
+    http.reset_sessions()
+
+
+@patch('requests.Session.request')
+@patch('requests.request')
+def test_request_without_keep_alive(requests_mock, session_mock):
+    resp = Response()
+    resp.status_code = 200
+    requests_mock.return_value = resp
+
+    toml_config = config.Toml({
+        'core': {'http_keep_alive': 'false'}
+    })
+
+    http.request('GET', 'https://www.example.com', toml_config=toml_config)
+
+    assert requests_mock.call_count == 1
+    assert session_mock.call_count == 0
+
+
+@patch('dcos.http._request')
+def test_request_coalesces_concurrent_gets(request_mock):
+    calls = []
+
+    def slow_request(*args, **kwargs):
+        calls.append(args)
+        time.sleep(0.2)
+        resp = Response()
+        resp.status_code = 200
+        return resp
+
+    request_mock.side_effect = slow_request
+    toml_config = config.Toml({})
+    url = 'https://www.example.com/state.json'
+    responses = []
+
+    def get():
+        responses.append(http.get(
+            url, params={'a': 1}, coalesce=True, toml_config=toml_config))
+
+    threads = [threading.Thread(target=get) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(responses) == 10
+    assert all(response is responses[0] for response in responses)
+
+    http.get(url, params={'a': 1}, coalesce=True, toml_config=toml_config)
+    http.get(url, params={'a': 2}, coalesce=True, toml_config=toml_config)
+    http.get(url, params={'a': 2}, toml_config=toml_config)
+    assert len(calls) == 4
+
+
+@patch('dcos.http._request')
+def test_request_coalesce_ttl_reuses_response(request_mock):
+    resp = Response()
+    resp.status_code = 200
+    request_mock.return_value = resp
+    toml_config = config.Toml({})
+    url = 'https://www.example.com/v2/apps/web'
+
+    for _ in range(3):
+        assert http.get(url, coalesce=60, toml_config=toml_config) is resp
+
+    http.post(url, coalesce=60, toml_config=toml_config)
+    assert request_mock.call_count == 2
+
+
+@patch('dcos.http._request')
+def test_request_coalesce_shares_errors(request_mock):
+    resp = Response()
+    resp.status_code = 404
+    request_mock.return_value = resp
+    toml_config = config.Toml({})
+    url = 'https://www.example.com/missing'
+
+    for _ in range(2):
+        with pytest.raises(DCOSHTTPException):
+            http.get(url, coalesce=60, toml_config=toml_config)
+
+    assert request_mock.call_count == 2
+
+
+@patch('dcos.http._request')
+def test_request_cache_revalidates_with_etag(request_mock):
+    def response(status_code, content, headers):
+        resp = Response()
+        resp.status_code = status_code
+        resp.url = 'https://www.example.com/v2/groups'
+        resp.headers = CaseInsensitiveDict(headers)
+        resp._content = content
+        return resp
+
+    request_mock.side_effect = [
+        response(200, b'{"v": 1}', {'ETag': '"v1"'}),
+        response(304, b'', {'ETag': '"v1"'}),
+        response(200, b'{"v": 2}', {'ETag': '"v2"'}),
+    ]
+    toml_config = config.Toml({})
+    http.get_cache(toml_config).clear()
+    url = 'https://www.example.com/v2/groups'
+
+    assert http.get(url, cache=True, toml_config=toml_config).json() == \
+        {'v': 1}
+    assert http.get(url, cache=True, toml_config=toml_config).json() == \
+        {'v': 1}
+    assert http.get(url, cache=True, toml_config=toml_config).json() == \
+        {'v': 2}
+
+    sent_headers = [call[1]['headers'] for call in request_mock.call_args_list]
+    assert 'If-None-Match' not in sent_headers[0]
+    assert sent_headers[1]['If-None-Match'] == '"v1"'
+    assert sent_headers[1]['Accept'] == 'application/json'
+
+
+@patch('dcos.http._request')
+def test_request_cache_is_per_token(request_mock):
+    def response(content):
+        resp = Response()
+        resp.status_code = 200
+        resp.headers = CaseInsensitiveDict({'Cache-Control': 'max-age=60'})
+        resp._content = content
+        return resp
+
+    request_mock.side_effect = [response(b'{"user": "alice"}'),
+                                response(b'{"user": "bob"}')]
+    url = 'https://www.example.com/service/marathon/v2/groups'
+
+    def get(token):
+        toml_config = config.Toml({'core': {
+            'dcos_url': 'https://www.example.com',
+            'dcos_acs_token': token}})
+        return http.get(url, cache=True, toml_config=toml_config).json()
+
+    http.get_cache(config.Toml({})).clear()
+    assert get('alice-token') == {'user': 'alice'}
+    assert get('bob-token') == {'user': 'bob'}
+    assert get('alice-token') == {'user': 'alice'}
+    assert request_mock.call_count == 2
+
+
+@patch('dcos.http._request')
+def test_request_cache_uses_fresh_response(request_mock):
+    resp = Response()
+    resp.status_code = 200
+    resp.headers = CaseInsensitiveDict({'Cache-Control': 'max-age=60'})
+    resp._content = b'{"version": "1.10"}'
+    request_mock.return_value = resp
+    toml_config = config.Toml({})
+    http.get_cache(toml_config).clear()
+    url = 'https://www.example.com/dcos-metadata/dcos-version.json'
+
+    for _ in range(3):
+        assert http.get(url, cache=True, toml_config=toml_config).json() == \
+            {'version': '1.10'}
+    http.get(url, cache=True, toml_config=toml_config,
+             headers={'Accept': 'application/json',
+                      'Cache-Control': 'no-cache'})
+
+    assert request_mock.call_count == 2
@@ -0,0 +1,96 @@
+import time
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from dcos import httpcache, util
+
+
+def _response(content=b'{}', **headers):
+    response = Response()
+    response.status_code = 200
+    response.url = 'https://www.example.com/v2/groups'
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    return response
+
+
+def test_entry_from_response_with_validators():
+    entry = httpcache.Entry.from_response(_response(
+        ETag='"v1"', **{'Last-Modified': 'Mon, 01 Jan 2018 00:00:00 GMT',
+                        'Content-Encoding': 'gzip'}))
+
+    assert not entry.is_fresh()
+    assert entry.validators() == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Mon, 01 Jan 2018 00:00:00 GMT'}
+    assert 'Content-Encoding' not in entry.headers
+
+
+def test_entry_from_response_honours_cache_control():
+    assert httpcache.Entry.from_response(_response()) is None
+    assert httpcache.Entry.from_response(_response(
+        ETag='"v1"', **{'Cache-Control': 'no-store'})) is None
+
+    fresh = httpcache.Entry.from_response(_response(
+        Age='10', **{'Cache-Control': 'public, max-age=60'}))
+    assert fresh.is_fresh()
+    assert not fresh.is_fresh(time.time() + 51)
+
+    no_cache = httpcache.Entry.from_response(_response(
+        ETag='"v1"', **{'Cache-Control': 'max-age=60, no-cache'}))
+    assert not no_cache.is_fresh()
+
+
+def test_entry_revalidated():
+    entry = httpcache.Entry.from_response(_response(b'[1]', ETag='"v1"'))
+    not_modified = _response(
+        b'', ETag='"v2"', **{'Cache-Control': 'max-age=60'})
+    not_modified.status_code = 304
+
+    entry = entry.revalidated(not_modified)
+
+    assert entry.is_fresh()
+    assert entry.validators() == {'If-None-Match': '"v2"'}
+    assert entry.response().json() == [1]
+
+
+def test_cache_evicts_least_recently_used():
+    cache = httpcache.HTTPCache(max_size=10)
+    for key in 'abc':
+        cache.put(key, httpcache.Entry('url', {}, b'1234', None))
+        if key == 'b':
+            cache.get('a')
+
+    assert cache.get('a') is not None
+    assert cache.get('b') is None
+    assert cache.get('c') is not None
+
+    cache.put('d', httpcache.Entry('url', {}, b'12345678901', None))
+    assert cache.get('d') is None
+
+
+def test_cache_persists_entries():
+    with util.tempdir() as path:
+        cache = httpcache.HTTPCache(path=path)
+        cache.put(('GET', 'url', None),
+                  httpcache.Entry('url', {'ETag': '"v1"'}, b'body', None))
+
+        entry = httpcache.HTTPCache(path=path).get(('GET', 'url', None))
+        assert entry.content == b'body'
+        assert entry.validators() == {'If-None-Match': '"v1"'}
+
+        cache.remove(('GET', 'url', None))
+        assert httpcache.HTTPCache(path=path).get(('GET', 'url', None)) \
+            is None
+
+
+def test_cache_prunes_disk_entries():
+    with util.tempdir() as path:
+        cache = httpcache.HTTPCache(max_size=10, path=path)
+        cache.put('a', httpcache.Entry('url', {}, b'123456', None))
+        cache.put('b', httpcache.Entry('url', {}, b'123456', None))
+
+        reloaded = httpcache.HTTPCache(path=path)
+        assert reloaded.get('b') is not None
+        assert reloaded.get('a') is None
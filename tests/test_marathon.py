@@ -1,12 +1,18 @@
+import json
 import re
+import threading
+import time
 
 import jsonschema
 import mock
 import pytest
 import requests
+import sseclient
 from requests.structures import CaseInsensitiveDict
+from six.moves import BaseHTTPServer, urllib
+from six.moves.queue import Queue
 
-from dcos import http, marathon, rpcclient
+from dcos import http, marathon, rpcclient, sse
 from dcos.errors import DCOSException, DCOSHTTPException
 
 
@@ -266,6 +272,278 @@ def test_pod_feature_supported_propagates_other_exceptions():
         exception=Exception("Uh oh"))
 
 
+def test_watch_deployments_follows_event_stream():
+    events = _event_stream_fixture([
+        ('deployment_info', {'id': 'd1'}),
+        ('deployment_success', {'id': 'd1'}),
+        ('deployment_failed', {'id': 'other'}),
+        ('deployment_failed', {'id': 'd2'}),
+    ])
+    marathon_client, rpc_client = _watch_fixtures(
+        events, [[{'id': 'd1'}, {'id': 'd2'}]])
+
+    results = marathon_client.watch_deployments(['d1', 'd2'], timeout=5)
+
+    assert results == {'d1': True, 'd2': False}
+    rpc_client.http_req.assert_any_call(
+        sse.get, 'v2/events',
+        params={'event_type': ['deployment_success', 'deployment_failed']},
+        timeout=(http.DEFAULT_CONNECT_TIMEOUT, None))
+    # a single poll, to catch deployments that finished before subscribing
+    assert rpc_client.http_req.call_count == 2
+    assert events.resp.close.called
+
+
+def test_watch_deployments_finished_before_subscribing_is_unknown():
+    events = _event_stream_fixture([
+        ('deployment_failed', {'id': 'd2'}),
+    ])
+    marathon_client, _ = _watch_fixtures(events, [[{'id': 'd2'}]])
+
+    results = marathon_client.watch_deployments(['d1', 'd2'], timeout=5)
+
+    assert results == {'d1': None, 'd2': False}
+
+
+def test_watch_deployments_polls_without_event_stream():
+    marathon_client, rpc_client = _watch_fixtures(
+        DCOSException('not found'),
+        [[{'id': 'd1'}, {'id': 'd2'}], [{'id': 'd2'}], [{'id': 'd2'}], []])
+
+    results = marathon_client.watch_deployments(
+        ['d1', 'd2'], timeout=5, min_interval=0.01)
+
+    # polling can't tell whether they succeeded
+    assert results == {'d1': None, 'd2': None}
+    assert rpc_client.http_req.call_count == 5
+
+
+def test_watch_deployments_times_out():
+    marathon_client, _ = _watch_fixtures(
+        DCOSException('not found'), [[{'id': 'd1'}]] * 100)
+
+    with pytest.raises(DCOSException) as exception_info:
+        marathon_client.watch_deployments(
+            ['d1'], timeout=0.05, min_interval=0.01, max_interval=0.01)
+
+    assert str(exception_info.value) == \
+        'Timed out waiting for deployments: d1'
+
+
+def test_apply_many_batches_apps_by_group():
+    marathon_client, rpc_client = _apply_fixtures()
+    definitions = [{'id': '/a/x'}, {'id': '/b/z'}, {'id': 'a/y'}]
+
+    results = marathon_client.apply_many(definitions, concurrency=2)
+
+    assert results == [
+        marathon.ApplyResult('/a/x', 'bulk-2', None, None),
+        marathon.ApplyResult('/b/z', '/b/z', None, None),
+        marathon.ApplyResult('a/y', 'bulk-2', None, None),
+    ]
+    rpc_client.http_req.assert_any_call(
+        http.put, 'v2/apps', params=None,
+        json=[{'id': '/a/x'}, {'id': 'a/y'}])
+    assert rpc_client.http_req.call_count == 2
+
+
+def test_apply_many_reports_errors_per_app():
+    marathon_client, rpc_client = _apply_fixtures(bulk_error=True)
+    definitions = [{'id': '/a/x'}, {'id': '/a/bad'}]
+
+    results = marathon_client.apply_many(definitions, force=True)
+
+    assert results[0] == marathon.ApplyResult('/a/x', '/a/x', None, None)
+    assert results[1].deployment_id is None
+    assert str(results[1].error) == 'invalid /a/bad'
+    # the bulk request, then one request per app
+    assert rpc_client.http_req.call_count == 3
+    for call in rpc_client.http_req.call_args_list:
+        assert call[1]['params'] == {'force': 'true'}
+
+
+def test_apply_many_waits_for_deployments():
+    marathon_client, _ = _apply_fixtures()
+    definitions = [{'id': '/a'}, {'id': '/b'}, {'id': '/c/bad'}]
+
+    with mock.patch.object(marathon_client, 'watch_deployments',
+                           return_value={'bulk-2': False}) as watch:
+        results = marathon_client.apply_many(
+            definitions, wait=True, timeout=10)
+
+    watch.assert_called_once_with({'bulk-2'}, 10)
+    assert [result.succeeded for result in results] == [False, False, None]
+    assert str(results[2].error) == 'invalid /c/bad'
+
+
+def test_get_tasks_fetches_only_the_apps_tasks(http_server):
+    fake = _fake_marathon(http_server)
+    marathon_client = marathon.Client(rpcclient.RpcClient(fake.url()))
+
+    all_tasks = marathon_client.get_tasks(None)
+    all_tasks_bytes = fake.sent.pop('/v2/tasks')
+    tasks = marathon_client.get_tasks('/app-7')
+    tasks_bytes = fake.sent.pop('/v2/apps/app-7/tasks')
+
+    assert tasks == [task for task in all_tasks if task['appId'] == '/app-7']
+    assert len(tasks) == 10
+    assert tasks_bytes * 50 < all_tasks_bytes
+    assert marathon_client.get_tasks('/missing') == []
+
+
+def test_get_apps_for_framework_selects_apps_by_label(http_server):
+    fake = _fake_marathon(http_server)
+    marathon_client = marathon.Client(rpcclient.RpcClient(fake.url()))
+
+    apps = marathon_client.get_apps_for_framework('hello world')
+
+    assert [app['id'] for app in apps] == ['/app-3']
+    assert fake.queries == [{
+        'label': ['DCOS_PACKAGE_FRAMEWORK_NAME==hello\\ world']}]
+    assert fake.sent['/v2/apps'] * 50 < len(
+        json.dumps({'apps': fake.apps}))
+
+
+def test_get_app_embed():
+    marathon_client, rpc_client = _create_fixtures()
+    rpc_client.http_req.return_value.json.return_value = {'app': {}}
+
+    marathon_client.get_app('/a', embed=['app.tasks', 'app.counts'])
+
+    rpc_client.http_req.assert_called_with(
+        http.get, 'v2/apps/a',
+        params={'embed': ['app.tasks', 'app.counts']})
+
+
+def test_get_queued_app_embed():
+    marathon_client, rpc_client = _create_fixtures()
+    rpc_client.http_req.return_value.json.return_value = {'queue': [
+        {'app': {'id': '/a'}}, {'app': {'id': '/b'}}]}
+
+    assert marathon_client.get_queued_app('/b') == {'app': {'id': '/b'}}
+    rpc_client.http_req.assert_called_with(
+        http.get, 'v2/queue', params={'embed': ['lastUnusedOffers']})
+
+    marathon_client.get_queued_app('/b', embed=None)
+    rpc_client.http_req.assert_called_with(http.get, 'v2/queue', params=None)
+
+
+def test_group_index_hierarchy():
+    index = marathon.GroupIndex(_group_tree_fixture())
+
+    assert len(index) == 7
+    assert '/prod/web/' in index and '/prod/we' not in index
+    assert index.kind('/prod/db') == 'group'
+    assert index.kind('prod/db/pg') == 'app'
+    assert index.kind('/prod/db/cache') == 'pod'
+    assert index.get('/prod/web')['instances'] == 3
+    assert index.get('/missing') is None
+    assert index.parent('/prod/db/pg') == '/prod/db'
+    assert index.parent('/') is None
+    assert index.children('/prod') == ['/prod/web', '/prod/db']
+    assert index.children('/prod/web') == []
+
+
+def test_group_index_prefix_queries():
+    index = marathon.GroupIndex(_group_tree_fixture())
+
+    assert index.ids('/prod-') == ['/prod-worker']
+    assert index.ids('/prod/d') == [
+        '/prod/db', '/prod/db/cache', '/prod/db/pg']
+    assert index.descendants('/prod') == [
+        '/prod/db', '/prod/db/cache', '/prod/db/pg', '/prod/web']
+    assert index.descendants('/prod', kind='group') == ['/prod/db']
+    assert index.descendants('/') == [
+        '/prod', '/prod-worker', '/prod/db', '/prod/db/cache', '/prod/db/pg',
+        '/prod/web']
+    assert index.descendants('/', kind='group') == ['/prod', '/prod/db']
+    assert [app['id'] for app in index.apps('/prod')] == [
+        '/prod/db/pg', '/prod/web']
+    assert [app['id'] for app in index.apps()] == [
+        '/prod-worker', '/prod/db/pg', '/prod/web']
+    assert [pod['id'] for pod in index.pods()] == ['/prod/db/cache']
+
+
+def test_group_index_totals():
+    index = marathon.GroupIndex(_group_tree_fixture())
+
+    assert index.totals('/prod/web') == {
+        'instances': 3, 'cpus': 1.5, 'mem': 384}
+    assert index.totals('/prod/db/cache') == {
+        'instances': 2, 'cpus': 1.0, 'mem': 192}
+    assert index.totals('/prod/db') == {
+        'instances': 3, 'cpus': 3.0, 'mem': 1216}
+    assert index.totals('/prod') == {
+        'instances': 6, 'cpus': 4.5, 'mem': 1600}
+    assert index.totals('/') == {
+        'instances': 7, 'cpus': 5.5, 'mem': 1728}
+
+    with pytest.raises(DCOSException):
+        index.totals('/missing')
+
+
+def test_cached_client_serves_reads_from_index():
+    event_stream, _ = _live_event_stream_fixture()
+    marathon_client, rpc_client = _cached_fixtures(event_stream)
+
+    assert marathon_client.get_app('app-a')['instances'] == 1
+    assert [a['id'] for a in marathon_client.get_apps()] == ['/app-a', '/b']
+    assert [t['id'] for t in marathon_client.get_tasks('/app-a')] == \
+        ['app-a.1']
+    assert len(marathon_client.get_tasks(None)) == 2
+    assert marathon_client.get_task('b.1')['host'] == 'h2'
+    assert marathon_client.get_task('missing') is None
+
+    # reads are copies
+    marathon_client.get_app('/app-a')['instances'] = 5
+    assert marathon_client.get_app('/app-a')['instances'] == 1
+
+    # the event stream and one fetch of apps and tasks
+    assert rpc_client.http_req.call_count == 3
+    marathon_client.close()
+
+
+def test_cached_client_applies_events():
+    event_stream, events = _live_event_stream_fixture()
+    marathon_client, rpc_client = _cached_fixtures(event_stream)
+    marathon_client.get_apps()
+
+    events.put(('status_update_event', {
+        'taskId': 'app-a.2', 'appId': '/app-a', 'taskStatus': 'TASK_RUNNING',
+        'host': 'h3', 'ports': [1]}))
+    events.put(('status_update_event', {
+        'taskId': 'app-a.1', 'appId': '/app-a',
+        'taskStatus': 'TASK_KILLED'}))
+    events.put(('api_post_event', {'appDefinition': {
+        'id': '/app-a', 'instances': 2}}))
+    events.put(('deployment_success', {'plan': {
+        'original': {'apps': [{'id': '/b'}]},
+        'target': {'groups': [{'apps': [{'id': '/g/c', 'instances': 1}]}]},
+    }}))
+    _wait_for(lambda: len(marathon_client.get_apps()) == 2 and
+              marathon_client.get_apps()[1]['id'] == '/g/c')
+
+    assert marathon_client.get_app('/app-a')['instances'] == 2
+    assert [a['id'] for a in marathon_client.get_apps()] == \
+        ['/app-a', '/g/c']
+    assert marathon_client.get_tasks(None) == [{
+        'id': 'app-a.2', 'appId': '/app-a', 'state': 'TASK_RUNNING',
+        'host': 'h3', 'ports': [1]}]
+    assert rpc_client.http_req.call_count == 3
+    marathon_client.close()
+
+
+def test_cached_client_refetches_when_too_old():
+    marathon_client, rpc_client = _cached_fixtures(
+        DCOSException('not found'), max_age=0)
+
+    marathon_client.get_apps()
+    marathon_client.get_task('b.1')
+
+    # no event stream: one attempt to subscribe per refresh
+    assert rpc_client.http_req.call_count == 6
+
+
 def test_rpc_client_http_req_calls_method_fn():
     def test_case(base_url, path, full_url):
         method_fn = mock.Mock()
@@ -798,6 +1076,189 @@ def _create_fixtures():
     return marathon_client, rpc_client
 
 
+def _event_stream_fixture(events):
+    closed = threading.Event()
+
+    def stream():
+        for event_type, data in events:
+            data = dict(data, eventType=event_type)
+            yield sseclient.Event(json.dumps(data), event_type)
+        # like Marathon, keep the stream open
+        closed.wait()
+
+    event_stream = mock.MagicMock()
+    event_stream.__iter__.return_value = stream()
+    event_stream.resp.close.side_effect = closed.set
+    return event_stream
+
+
+def _live_event_stream_fixture():
+    events = Queue()
+
+    def stream():
+        for event_type, data in iter(events.get, None):
+            data = dict(data, eventType=event_type)
+            yield sseclient.Event(json.dumps(data), event_type)
+
+    event_stream = mock.MagicMock()
+    event_stream.__iter__.return_value = stream()
+    event_stream.resp.close.side_effect = lambda: events.put(None)
+    return event_stream, events
+
+
+def _cached_fixtures(event_stream, max_age=60):
+    rpc_client = mock.create_autospec(rpcclient.RpcClient)
+    marathon_client = marathon.CachedMarathonClient(rpc_client, max_age)
+    collections = {
+        'v2/apps': {'apps': [{'id': '/app-a', 'instances': 1},
+                             {'id': '/b', 'instances': 1}]},
+        'v2/tasks': {'tasks': [{'id': 'app-a.1', 'appId': '/app-a'},
+                               {'id': 'b.1', 'appId': '/b', 'host': 'h2'}]},
+    }
+
+    def http_req(method_fn, path, **kwargs):
+        if method_fn is sse.get:
+            if isinstance(event_stream, Exception):
+                raise event_stream
+            return event_stream
+
+        response = mock.create_autospec(requests.Response)
+        response.json.return_value = json.loads(json.dumps(collections[path]))
+        return response
+
+    rpc_client.http_req.side_effect = http_req
+    return marathon_client, rpc_client
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def _watch_fixtures(event_stream, deployment_lists):
+    marathon_client, rpc_client = _create_fixtures()
+    deployment_lists = iter(deployment_lists)
+
+    def http_req(method_fn, path, **kwargs):
+        if method_fn is sse.get:
+            if isinstance(event_stream, Exception):
+                raise event_stream
+            return event_stream
+
+        response = mock.create_autospec(requests.Response)
+        response.json.return_value = next(deployment_lists)
+        return response
+
+    rpc_client.http_req.side_effect = http_req
+    return marathon_client, rpc_client
+
+
+def _apply_fixtures(bulk_error=False):
+    """Marathon returns 'bulk-<n>' for updating n apps together, the app's
+    ID for updating a single app, and rejects apps whose ID ends in 'bad'.
+    """
+
+    marathon_client, rpc_client = _create_fixtures()
+
+    def http_req(method_fn, path, params=None, json=None):
+        apps = json if isinstance(json, list) else [json]
+        bad = [app['id'] for app in apps if app['id'].endswith('bad')]
+        if bad or (bulk_error and len(apps) > 1):
+            raise DCOSException('invalid {}'.format(', '.join(bad)))
+
+        response = mock.create_autospec(requests.Response)
+        if isinstance(json, list):
+            deployment_id = 'bulk-{}'.format(len(json))
+        else:
+            deployment_id = json['id']
+        response.json.return_value = {'deploymentId': deployment_id}
+        return response
+
+    rpc_client.http_req.side_effect = http_req
+    return marathon_client, rpc_client
+
+
+class _FakeMarathonHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):  # noqa: N802
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        apps, tasks = self.server.apps, self.server.tasks
+
+        if url.path == '/v2/apps':
+            self.server.queries.append(query)
+            for selector in query.get('label', []):
+                key, _, value = selector.partition('==')
+                value = re.sub(r'\\(.)', r'\1', value)
+                apps = [app for app in apps
+                        if app['labels'].get(key) == value]
+            body = {'apps': apps}
+        elif url.path == '/v2/tasks':
+            body = {'tasks': tasks}
+        elif url.path.startswith('/v2/apps/') and url.path.endswith('/tasks'):
+            app_id = url.path[len('/v2/apps'):-len('/tasks')]
+            if app_id not in {app['id'] for app in apps}:
+                return self._send(404, {'message': 'not found'})
+            body = {'tasks': [task for task in tasks
+                              if task['appId'] == app_id]}
+        else:
+            return self._send(404, {'message': 'not found'})
+        self._send(200, body)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.server.sent[urllib.parse.urlparse(self.path).path] = len(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _fake_marathon(http_server):
+    """Serves 100 apps with 10 tasks each; app-3 runs 'hello world'."""
+
+    apps = [
+        {'id': '/app-{}'.format(i), 'cmd': 'sleep 1000', 'labels': {
+            'DCOS_PACKAGE_FRAMEWORK_NAME':
+                'hello world' if i == 3 else 'other-{}'.format(i)}}
+        for i in range(100)]
+    tasks = [
+        {'id': 'app-{}.{}'.format(i, j), 'appId': '/app-{}'.format(i),
+         'host': '10.0.0.{}'.format(j), 'ports': [10000 + j]}
+        for i in range(100) for j in range(10)]
+    return http_server(_FakeMarathonHandler, apps=apps, tasks=tasks,
+                       sent={}, queries=[])
+
+
+def _group_tree_fixture():
+    return {
+        'id': '/',
+        'apps': [{'id': '/prod-worker', 'instances': 1, 'cpus': 1,
+                  'mem': 128}],
+        'groups': [{
+            'id': '/prod',
+            'apps': [{'id': '/prod/web', 'instances': 3, 'cpus': 0.5,
+                      'mem': 128}],
+            'groups': [{
+                'id': '/prod/db',
+                'apps': [{'id': '/prod/db/pg', 'instances': 1, 'cpus': 2,
+                          'mem': 1024}],
+                'pods': [{'id': '/prod/db/cache',
+                          'scaling': {'kind': 'fixed', 'instances': 2},
+                          'containers': [
+                              {'resources': {'cpus': 0.25, 'mem': 32}},
+                              {'resources': {'cpus': 0.25, 'mem': 64}}]}],
+            }],
+        }],
+    }
+
+
 def _pod_response_fixture(headers=None):
     mock_response = mock.create_autospec(requests.Response)
 
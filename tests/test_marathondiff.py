@@ -0,0 +1,354 @@
+import copy
+
+import mock
+import pytest
+
+from dcos import marathondiff
+from dcos.errors import DCOSException
+
+
+def _app(app_id='/web', **fields):
+    app = {'id': app_id, 'cmd': 'sleep 1000', 'instances': 2, 'mem': 64}
+    app.update(fields)
+    return app
+
+
+def _live_app(app):
+    live = copy.deepcopy(app)
+    live.update({
+        'version': '2017-01-01T00:00:00.000Z',
+        'versionInfo': {'lastScalingAt': '2017-01-01T00:00:00.000Z'},
+        'tasksRunning': app.get('instances', 1),
+        'tasksStaged': 0,
+        'deployments': [],
+        'tasks': [],
+        'cpus': 1,
+        'disk': 0,
+        'backoffFactor': 1.15,
+        'upgradeStrategy': {'minimumHealthCapacity': 1,
+                            'maximumOverCapacity': 1},
+        'args': None,
+        'role': '*',
+    })
+    live.setdefault('labels', {})
+    live.setdefault('env', {})
+    live.setdefault('portDefinitions', [{'port': 10101, 'protocol': 'tcp'}])
+    live.setdefault('ports', [10101])
+    return live
+
+
+DOCKER_APP = {
+    'id': '/nginx',
+    'instances': 2,
+    'cpus': 0.5,
+    'mem': 256,
+    'container': {
+        'type': 'DOCKER',
+        'docker': {'image': 'nginx:1.13'},
+        'portMappings': [{'containerPort': 80, 'name': 'http'}],
+    },
+    'networks': [{'mode': 'container/bridge'}],
+    'healthChecks': [{'protocol': 'MESOS_HTTP', 'path': '/health'}],
+    'fetch': [{'uri': 'https://example.com/nginx.conf'}],
+    'labels': {'team': 'web'},
+}
+
+# GET /v2/apps/nginx?embed=app.taskStats as returned by Marathon 1.5 for
+# DOCKER_APP, trimmed of the task statistics.
+DOCKER_APP_RESPONSE = {
+    'id': '/nginx',
+    'acceptedResourceRoles': None,
+    'backoffFactor': 1.15,
+    'backoffSeconds': 1,
+    'cmd': None,
+    'constraints': [],
+    'container': {
+        'type': 'DOCKER',
+        'docker': {'forcePullImage': False,
+                   'image': 'nginx:1.13',
+                   'parameters': [],
+                   'privileged': False},
+        'volumes': [],
+        'portMappings': [{'containerPort': 80,
+                          'hostPort': 0,
+                          'labels': {},
+                          'name': 'http',
+                          'protocol': 'tcp',
+                          'servicePort': 10003}],
+    },
+    'cpus': 0.5,
+    'disk': 0,
+    'env': {},
+    'executor': '',
+    'fetch': [{'uri': 'https://example.com/nginx.conf',
+               'extract': True,
+               'executable': False,
+               'cache': False}],
+    'healthChecks': [{'gracePeriodSeconds': 300,
+                      'intervalSeconds': 60,
+                      'maxConsecutiveFailures': 3,
+                      'portIndex': 0,
+                      'timeoutSeconds': 20,
+                      'delaySeconds': 15,
+                      'protocol': 'MESOS_HTTP',
+                      'path': '/health',
+                      'ipProtocol': 'IPv4'}],
+    'instances': 2,
+    'labels': {'team': 'web'},
+    'maxLaunchDelaySeconds': 3600,
+    'mem': 256,
+    'gpus': 0,
+    'networks': [{'mode': 'container/bridge'}],
+    'requirePorts': False,
+    'upgradeStrategy': {'maximumOverCapacity': 1,
+                        'minimumHealthCapacity': 1},
+    'version': '2017-11-02T10:12:01.346Z',
+    'versionInfo': {'lastScalingAt': '2017-11-02T10:12:01.346Z',
+                    'lastConfigChangeAt': '2017-11-02T10:12:01.346Z'},
+    'killSelection': 'YOUNGEST_FIRST',
+    'unreachableStrategy': {'inactiveAfterSeconds': 0,
+                            'expungeAfterSeconds': 0},
+    'role': 'slave_public',
+    'secrets': {},
+    'tasksStaged': 0,
+    'tasksRunning': 2,
+    'tasksHealthy': 2,
+    'tasksUnhealthy': 0,
+    'deployments': [],
+}
+
+POD = {
+    'id': '/simple-pod',
+    'containers': [{'name': 'sleep',
+                    'exec': {'command': {'shell': 'sleep 1000'}},
+                    'resources': {'cpus': 0.1, 'mem': 32}}],
+}
+
+# GET /v2/pods/simple-pod as returned by Marathon 1.5 for POD.
+POD_RESPONSE = {
+    'id': '/simple-pod',
+    'labels': {},
+    'version': '2017-11-02T10:15:42.113Z',
+    'environment': {},
+    'containers': [{'name': 'sleep',
+                    'exec': {'command': {'shell': 'sleep 1000'}},
+                    'resources': {'cpus': 0.1, 'mem': 32, 'disk': 0,
+                                  'gpus': 0},
+                    'endpoints': [],
+                    'volumeMounts': [],
+                    'artifacts': [],
+                    'labels': {}}],
+    'secrets': {},
+    'volumes': [],
+    'networks': [{'mode': 'host'}],
+    'scaling': {'kind': 'fixed', 'instances': 1},
+    'scheduling': {
+        'backoff': {'backoff': 1, 'backoffFactor': 1.15,
+                    'maxLaunchDelay': 3600},
+        'upgrade': {'minimumHealthCapacity': 1, 'maximumOverCapacity': 1},
+        'killSelection': 'YOUNGEST_FIRST',
+        'unreachableStrategy': {'inactiveAfterSeconds': 0,
+                                'expungeAfterSeconds': 0},
+        'placement': {'constraints': [], 'acceptedResourceRoles': []}},
+    'executorResources': {'cpus': 0.1, 'mem': 32, 'disk': 10},
+}
+
+
+def _group():
+    return {
+        'id': '/prod',
+        'apps': [_app('web'), _app('/prod/worker', cmd='work')],
+        'groups': [{'id': 'db', 'apps': [_app('pg', cmd='postgres')]}],
+    }
+
+
+def _live_group(group):
+    def live(group, parent_id):
+        group_id = marathondiff._absolute_id(group['id'], parent_id)
+        return {
+            'id': group_id,
+            'version': '2017-01-01T00:00:00.000Z',
+            'apps': [_live_app(dict(
+                app, id=marathondiff._absolute_id(app['id'], group_id)))
+                for app in group.get('apps', [])],
+            'groups': [live(subgroup, group_id)
+                       for subgroup in group.get('groups', [])],
+            'pods': [],
+            'dependencies': [],
+        }
+    return live(group, '/')
+
+
+def _client(live=None, error=None):
+    client = mock.Mock()
+    client.get_app.return_value = live
+    client.get_group.return_value = live
+    if error is not None:
+        client.get_app.side_effect = error
+        client.get_group.side_effect = error
+    client.update_app.return_value = 'update-deployment'
+    client.update_group.return_value = 'group-deployment'
+    client.scale_app.side_effect = lambda app_id, *args: app_id
+    return client
+
+
+def test_canonicalize_strips_generated_and_defaulted_fields():
+    app = _app()
+    assert marathondiff.canonicalize(_live_app(app)) == dict(
+        app,
+        portDefinitions=[{'port': 10101}],
+        ports=[10101],
+        role='*')
+
+
+def test_canonicalize_keys_group_children_by_absolute_id():
+    canonical = marathondiff.canonicalize(_group(), 'group')
+
+    assert sorted(canonical['apps']) == ['/prod/web', '/prod/worker']
+    assert canonical['groups']['/prod/db']['apps']['/prod/db/pg']['cmd'] == \
+        'postgres'
+
+
+def test_canonicalize_unknown_kind():
+    with pytest.raises(DCOSException):
+        marathondiff.canonicalize({}, 'job')
+
+
+def test_diff_equivalent_app():
+    app = _app()
+    assert marathondiff.diff(app, _live_app(app)) == []
+
+
+def test_diff_reports_changed_paths():
+    app = _app(env={'A': '1'}, instances=1)
+    live = _live_app(_app(env={'A': '2'}, mem=256))
+
+    assert marathondiff.diff(app, live) == [
+        marathondiff.Change(('env', 'A'), '1', '2'),
+        marathondiff.Change(('instances',), None, 2),
+        marathondiff.Change(('mem',), 64, 256),
+    ]
+
+
+def test_diff_keeps_given_server_assigned_fields():
+    app = _app(portDefinitions=[{'port': 80, 'protocol': 'tcp'}])
+
+    changes = marathondiff.diff(app, _live_app(_app()))
+
+    assert changes == [
+        marathondiff.Change(('portDefinitions', 0, 'port'), 80, 10101)]
+
+
+def test_diff_equivalent_docker_app_response():
+    assert marathondiff.diff(DOCKER_APP, DOCKER_APP_RESPONSE) == []
+
+
+def test_diff_docker_app_response_nested_changes():
+    app = copy.deepcopy(DOCKER_APP)
+    app['container']['docker']['forcePullImage'] = True
+    app['container']['portMappings'][0]['servicePort'] = 10000
+    app['healthChecks'][0]['intervalSeconds'] = 60
+    app['fetch'][0]['extract'] = False
+
+    assert marathondiff.diff(app, DOCKER_APP_RESPONSE) == [
+        marathondiff.Change(
+            ('container', 'docker', 'forcePullImage'), True, None),
+        marathondiff.Change(
+            ('container', 'portMappings', 0, 'servicePort'), 10000, 10003),
+        marathondiff.Change(('fetch', 0, 'extract'), False, None),
+    ]
+    # the desired definition is left untouched
+    assert app['container']['portMappings'][0]['servicePort'] == 10000
+
+
+def test_diff_equivalent_pod_response():
+    assert marathondiff.diff(POD, POD_RESPONSE, 'pod') == []
+
+
+def test_apply_app_docker_app_up_to_date():
+    client = _client(DOCKER_APP_RESPONSE)
+
+    assert marathondiff.apply_app(client, DOCKER_APP) is None
+    assert not client.update_app.called
+
+
+def test_diff_equivalent_group():
+    group = _group()
+    assert marathondiff.diff(group, _live_group(group), 'group') == []
+
+
+def test_apply_app_up_to_date():
+    app = _app()
+    client = _client(_live_app(app))
+
+    assert marathondiff.apply_app(client, app) is None
+    assert not client.update_app.called
+    assert not client.scale_app.called
+
+
+def test_apply_app_scale_only():
+    client = _client(_live_app(_app()))
+
+    assert marathondiff.apply_app(client, _app(instances=5), True) == '/web'
+    client.scale_app.assert_called_once_with('/web', 5, True)
+    assert not client.update_app.called
+
+
+def test_apply_app_scale_to_default():
+    client = _client(_live_app(_app()))
+
+    marathondiff.apply_app(client, _app(instances=1))
+
+    client.scale_app.assert_called_once_with('/web', 1, False)
+
+
+def test_apply_app_update():
+    app = _app(instances=5, cmd='sleep 1')
+    client = _client(_live_app(_app()))
+
+    assert marathondiff.apply_app(client, app) == 'update-deployment'
+    client.update_app.assert_called_once_with('/web', app, False)
+    assert not client.scale_app.called
+
+
+def test_apply_app_missing():
+    app = _app()
+    client = _client(error=DCOSException('App /web does not exist'))
+
+    assert marathondiff.apply_app(client, app) == 'update-deployment'
+    client.update_app.assert_called_once_with('/web', app, False)
+
+
+def test_apply_group_up_to_date():
+    group = _group()
+    client = _client(_live_group(group))
+
+    assert marathondiff.apply_group(client, group) == []
+    assert not client.update_group.called
+
+
+def test_apply_group_scale_only():
+    live = _live_group(_group())
+    group = _group()
+    group['apps'][0]['instances'] = 3
+    group['groups'][0]['apps'][0]['instances'] = 4
+    client = _client(live)
+
+    assert marathondiff.apply_group(client, group) == [
+        '/prod/web', '/prod/db/pg']
+    client.scale_app.assert_has_calls([
+        mock.call('/prod/web', 3, False),
+        mock.call('/prod/db/pg', 4, False)])
+    assert not client.update_group.called
+
+
+def test_apply_group_update():
+    live = _live_group(_group())
+    group = _group()
+    group['apps'][0]['instances'] = 3
+    group['apps'].append(_app('cache', cmd='redis'))
+    client = _client(live)
+
+    assert marathondiff.apply_group(client, group) == ['group-deployment']
+    client.update_group.assert_called_once_with('/prod', group, False)
+    assert not client.scale_app.called
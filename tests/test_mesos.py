@@ -0,0 +1,844 @@
+import base64
+import io
+import json
+import os
+import threading
+import time
+
+import mock
+import pytest
+import requests
+
+from six.moves import BaseHTTPServer
+from six.moves.queue import Queue
+
+from dcos import mesos, recordio
+from dcos.errors import DCOSException
+
+
+def _state():
+    return {
+        'slaves': [
+            {'id': 'agent-1', 'pid': 'slave(1)@10.0.0.1:5051',
+             'domain': {'fault_domain': {'region': {'name': 'r1'},
+                                         'zone': {'name': 'z1'}}}},
+            {'id': 'agent-10', 'pid': 'slave(1)@10.0.0.10:5051'},
+        ],
+        'frameworks': [
+            {'id': 'marathon', 'name': 'marathon', 'active': True,
+             'user': 'root',
+             'tasks': [
+                 {'id': 'app.1', 'framework_id': 'marathon',
+                  'slave_id': 'agent-1', 'state': 'TASK_RUNNING'},
+                 {'id': 'app.2', 'framework_id': 'marathon',
+                  'slave_id': 'agent-10', 'state': 'TASK_RUNNING'},
+             ],
+             'completed_tasks': [
+                 {'id': 'app.0', 'framework_id': 'marathon',
+                  'slave_id': 'agent-1', 'state': 'TASK_FINISHED'},
+             ]},
+            {'id': 'inactive', 'name': 'inactive', 'active': False,
+             'tasks': [], 'completed_tasks': []},
+        ],
+        'completed_frameworks': [
+            {'id': 'done', 'name': 'done', 'active': False,
+             'tasks': [],
+             'completed_tasks': [
+                 {'id': 'job.1', 'framework_id': 'done',
+                  'slave_id': 'agent-1', 'state': 'TASK_FAILED'},
+             ]},
+        ],
+    }
+
+
+def test_master_slave_exact_and_substring_match():
+    master = mesos.Master(_state())
+
+    assert master.slave('agent-1')['id'] == 'agent-1'
+    assert master.slave('agent-10')['id'] == 'agent-10'
+    assert master.slave('t-10')['id'] == 'agent-10'
+    assert master.slave('missing') is None
+
+    with pytest.raises(DCOSException):
+        master.slave('agent')
+
+
+def test_master_framework_by_id():
+    master = mesos.Master(_state())
+
+    assert master.framework('marathon')['name'] == 'marathon'
+    assert master.framework('inactive')['name'] == 'inactive'
+    assert master.framework('done')['name'] == 'done'
+    assert master.framework('missing') is None
+
+
+def test_master_tasks_filters():
+    master = mesos.Master(_state())
+
+    assert [t['id'] for t in master.tasks()] == ['app.1', 'app.2']
+    assert [t['id'] for t in master.tasks('app.*')] == ['app.1', 'app.2']
+    assert [t['id'] for t in master.tasks('2')] == ['app.2']
+    assert sorted(t['id'] for t in master.tasks(completed=True)) == \
+        ['app.0', 'job.1']
+    assert len(master.tasks(all_=True)) == 4
+
+
+def test_master_task_objects_are_shared():
+    master = mesos.Master(_state())
+
+    task = master.task('app.1')
+
+    assert master.framework('marathon').task('app.1') is task
+    assert master.framework('marathon').task('job.1') is None
+    assert task.framework()['id'] == 'marathon'
+    assert task.slave()['id'] == 'agent-1'
+    assert task['domain']['fault_domain']['zone']['name'] == 'z1'
+
+
+def _v1_task(task_id, agent_id, state='TASK_RUNNING'):
+    return {
+        'task_id': {'value': task_id},
+        'framework_id': {'value': 'marathon'},
+        'agent_id': {'value': agent_id},
+        'name': task_id,
+        'state': state,
+        'resources': [
+            {'name': 'cpus', 'type': 'SCALAR', 'scalar': {'value': 0.5}}],
+        'statuses': [],
+    }
+
+
+def _v1_agent(agent_id):
+    return {
+        'agent_info': {'id': {'value': agent_id}, 'hostname': agent_id},
+        'pid': 'slave(1)@10.0.0.1:5051',
+        'active': True,
+    }
+
+
+def _recorded_event_stream():
+    encoder = recordio.Encoder(lambda s: json.dumps(s).encode('UTF-8'))
+    events = [
+        {'type': 'SUBSCRIBED', 'subscribed': {'get_state': {
+            'get_agents': {'agents': [_v1_agent('agent-1')]},
+            'get_frameworks': {'frameworks': [{
+                'framework_info': {'id': {'value': 'marathon'},
+                                   'name': 'marathon', 'user': 'root'},
+                'active': True}]},
+            'get_tasks': {'tasks': [_v1_task('app.1', 'agent-1')]},
+        }}},
+        {'type': 'HEARTBEAT'},
+        {'type': 'AGENT_ADDED', 'agent_added': {
+            'agent': _v1_agent('agent-2')}},
+        {'type': 'TASK_ADDED', 'task_added': {
+            'task': _v1_task('app.2', 'agent-2', 'TASK_STAGING')}},
+        {'type': 'TASK_UPDATED', 'task_updated': {
+            'framework_id': {'value': 'marathon'},
+            'state': 'TASK_RUNNING',
+            'status': {'task_id': {'value': 'app.2'},
+                       'state': 'TASK_RUNNING',
+                       'container_status': {
+                           'container_id': {'value': 'container-2'}}}}},
+        {'type': 'TASK_UPDATED', 'task_updated': {
+            'framework_id': {'value': 'marathon'},
+            'state': 'TASK_FINISHED',
+            'status': {'task_id': {'value': 'app.1'},
+                       'state': 'TASK_FINISHED'}}},
+        {'type': 'AGENT_REMOVED', 'agent_removed': {
+            'agent_id': {'value': 'agent-1'}}},
+    ]
+    stream = b''.join(encoder.encode(event) for event in events)
+    # replay in chunks that don't line up with the records
+    return [stream[i:i + 10] for i in range(0, len(stream), 10)]
+
+
+def test_state_mirror_applies_recorded_events():
+    mirror = mesos.MesosStateMirror()
+    mirror.consume(_recorded_event_stream())
+
+    master = mirror.snapshot()
+
+    assert [s['id'] for s in master.slaves()] == ['agent-2']
+    assert [t['id'] for t in master.tasks()] == ['app.2']
+    assert [t['id'] for t in master.tasks(completed=True)] == ['app.1']
+
+    task = master.task('app.2')
+    assert task['state'] == 'TASK_RUNNING'
+    assert task['resources'] == {'cpus': 0.5}
+    assert task.user() == 'root'
+    assert task.slave()['hostname'] == 'agent-2'
+    assert master.get_container_id(task) == {'value': 'container-2'}
+
+
+def _subscribed_mirror(chunks, closed):
+    """Mirror subscribed to a stream of `chunks` that stays open until
+    `closed` is set."""
+
+    def stream():
+        for chunk in chunks:
+            yield chunk
+        closed.wait()
+
+    response = mock.Mock()
+    response.iter_content.return_value = stream()
+    response.close.side_effect = closed.set
+    client = mock.create_autospec(mesos.DCOSClient)
+    client.master_subscribe.return_value = response
+
+    mirror = mesos.MesosStateMirror(client)
+    mirror.start()
+    return mirror, client
+
+
+def test_state_mirror_subscribes_through_client():
+    closed = threading.Event()
+    mirror, client = _subscribed_mirror(_recorded_event_stream(), closed)
+
+    assert mirror.wait(5)
+    client.master_subscribe.assert_called_once_with()
+    # the remaining events may or may not have been applied yet
+    assert 'app.1' in [t['id'] for t in mirror.snapshot().tasks(all_=True)]
+
+    mirror.stop()
+    mirror._thread.join(5)
+    assert mirror.exception is None
+
+
+def test_state_mirror_stream_closed_before_subscribed():
+    closed = threading.Event()
+    closed.set()
+    mirror, _ = _subscribed_mirror([], closed)
+
+    with pytest.raises(DCOSException) as e:
+        mirror.wait(5)
+    assert 'closed' in str(e.value)
+    with pytest.raises(DCOSException):
+        mirror.snapshot()
+
+
+def test_state_mirror_stream_closed_after_subscribed():
+    closed = threading.Event()
+    mirror, _ = _subscribed_mirror(_recorded_event_stream(), closed)
+    assert mirror.wait(5)
+
+    closed.set()
+    mirror._thread.join(5)
+
+    with pytest.raises(DCOSException) as e:
+        mirror.snapshot()
+    assert 'closed' in str(e.value)
+
+
+def test_state_mirror_snapshot_requires_state():
+    with pytest.raises(DCOSException):
+        mesos.MesosStateMirror().snapshot()
+
+
+def _file_client(content):
+    """Client whose files/read.json serves `content`, at most 4 bytes at a
+    time, like a host with a small read limit. Like requests, it replaces
+    the bytes that aren't UTF-8, such as a split multibyte character."""
+
+    def file_read(path, offset, length):
+        if offset < 0:
+            return {'data': '', 'offset': len(content)}
+        if length < 0 or length > 4:
+            length = 4
+        data = content[offset:offset + length]
+        return {'data': data.decode('utf-8', 'replace'), 'offset': offset}
+
+    client = mock.create_autospec(mesos.DCOSClient)
+    client.master_file_read.side_effect = file_read
+    return client
+
+
+def test_mesos_file_reads_split_multibyte_characters():
+    content = u'a\xe9b\u20acc\U0001f600d\xe9\n'.encode('utf-8')
+    mesos_file = mesos.MesosFile('stdout', dcos_client=_file_client(content))
+
+    chunks = list(mesos_file.iter_chunks())
+
+    assert b''.join(chunks) == content
+    assert all(chunk.decode('utf-8') for chunk in chunks)
+    assert mesos_file.tell() == len(content)
+
+
+def test_mesos_file_rejects_binary_data():
+    content = b'\x00\xff\xfe\x80binary'
+    mesos_file = mesos.MesosFile('blob', dcos_client=_file_client(content))
+
+    with pytest.raises(DCOSException) as excinfo:
+        list(mesos_file.iter_chunks())
+    assert 'not UTF-8' in str(excinfo.value)
+
+
+def test_mesos_file_reads_in_chunks():
+    content = b'line 1\nline 2\n\xc3\xa9\n'
+    mesos_file = mesos.MesosFile('stdout', dcos_client=_file_client(content))
+
+    assert b''.join(mesos_file.iter_chunks()) == content
+    assert mesos_file.tell() == len(content)
+
+    mesos_file.seek(0)
+    assert mesos_file.read() == content.decode('utf-8')
+
+    mesos_file.seek(5)
+    assert list(mesos_file.iter_chunks(chunk_size=2, length=5)) == \
+        [b'1\n', b'li', b'n']
+    assert mesos_file.read(3) == 'e 2'
+
+    sink = io.BytesIO()
+    mesos_file.seek(0)
+    assert mesos_file.copy_to(sink) == len(content)
+    assert sink.getvalue() == content
+
+
+def test_mesos_file_resolves_task_path_once():
+    client = _file_client(b'0123456789')
+    slave = mesos.Slave({'id': 'agent-1', 'pid': 'slave(1)@10.0.0.1:5051'},
+                        None, None)
+    client.slave_file_read.side_effect = \
+        lambda slave_id, url, **params: client.master_file_read(**params)
+    task = mock.Mock()
+    task.slave.return_value = slave
+    task.directory.return_value = '/sandbox/'
+    task.executor.return_value = {}
+
+    mesos_file = mesos.MesosFile('stdout', task=task, dcos_client=client)
+
+    assert mesos_file.read() == '0123456789'
+    assert client.slave_file_read.call_count == 4
+    assert task.directory.call_count == 1
+    assert task.executor.call_count == 1
+    assert client.slave_file_read.call_args[1]['path'] == '/sandbox/stdout'
+
+
+def test_mesos_file_follow_backs_off_while_idle():
+    content = bytearray(b'abcdef')
+    client = _file_client(content)
+    mesos_file = mesos.MesosFile('stdout', dcos_client=client)
+    stop = mock.Mock()
+    stop.is_set.return_value = False
+    waits = []
+
+    def wait(interval):
+        waits.append(interval)
+        if len(waits) == 4:
+            content.extend(b'gh')
+        elif len(waits) == 5:
+            stop.is_set.return_value = True
+
+    stop.wait.side_effect = wait
+
+    followed = mesos_file.follow(min_interval=1, max_interval=4, stop=stop)
+    assert [next(followed) for _ in range(3)] == [b'abcd', b'ef', b'gh']
+    assert waits == [1, 2, 4, 4]
+
+    # the interval starts over once data has flowed again
+    content.extend(b'ij')
+    assert next(followed) == b'ij'
+    assert list(followed) == []
+    assert waits == [1, 2, 4, 4, 1]
+
+
+def test_mesos_file_download(tmpdir):
+    content = bytes(bytearray(range(256))[:128]) * 3
+    client = _file_client(content)
+    mesos_file = mesos.MesosFile('artifact', dcos_client=client)
+    dest = str(tmpdir.join('artifact'))
+
+    stats = mesos_file.download(dest, workers=4, chunk_size=10)
+
+    assert stats['bytes'] == len(content)
+    assert tmpdir.join('artifact').read_binary() == content
+    assert not tmpdir.join('artifact.progress').exists()
+    assert mesos_file.tell() == 0
+
+
+def test_mesos_file_download_resumes(tmpdir):
+    content = b'0123456789' * 5
+    client = _file_client(content)
+    file_read = client.master_file_read.side_effect
+    failed = set()
+
+    def flaky_file_read(path, offset, length):
+        # the range at offset 20 is read from 3 bytes before it
+        if offset == 17 and not failed:
+            failed.add(offset)
+            raise DCOSException('connection reset')
+        return file_read(path, offset, length)
+
+    client.master_file_read.side_effect = flaky_file_read
+    mesos_file = mesos.MesosFile('artifact', dcos_client=client)
+    dest = str(tmpdir.join('artifact'))
+
+    with pytest.raises(DCOSException) as excinfo:
+        mesos_file.download(dest, workers=2, chunk_size=10)
+    assert 'Failed to download 1 of 5 ranges' in str(excinfo.value)
+
+    progress = json.loads(tmpdir.join('artifact.progress').read())
+    assert progress['done'] == [0, 10, 30, 40]
+
+    client.master_file_read.reset_mock()
+    stats = mesos_file.download(dest, workers=2, chunk_size=10)
+
+    assert stats['bytes'] == 10
+    assert tmpdir.join('artifact').read_binary() == content
+    assert not tmpdir.join('artifact.progress').exists()
+    # one size request, then four requests for the 10 missing bytes and
+    # the 3 bytes on each side of them
+    assert client.master_file_read.call_count == 5
+
+
+def test_mesos_file_download_splits_multibyte_characters(tmpdir):
+    content = u'\xe9t\xe9 \u20ac \U0001f600\n'.encode('utf-8') * 30
+    client = _file_client(content)
+    mesos_file = mesos.MesosFile('artifact', dcos_client=client)
+    dest = str(tmpdir.join('artifact'))
+
+    stats = mesos_file.download(dest, workers=4, chunk_size=7)
+
+    assert stats['bytes'] == len(content)
+    assert tmpdir.join('artifact').read_binary() == content
+
+
+def test_mesos_file_download_rejects_binary_data(tmpdir):
+    content = bytes(bytearray(range(256)))
+    client = _file_client(content)
+    mesos_file = mesos.MesosFile('artifact', dcos_client=client)
+    dest = str(tmpdir.join('artifact'))
+
+    with pytest.raises(DCOSException) as excinfo:
+        mesos_file.download(dest, workers=4, chunk_size=64)
+    assert 'not UTF-8' in str(excinfo.value)
+
+
+def test_mesos_file_download_saves_progress_on_write_error(tmpdir):
+    content = b'0123456789' * 5
+    client = _file_client(content)
+    mesos_file = mesos.MesosFile('artifact', dcos_client=client)
+    dest = str(tmpdir.join('artifact'))
+    pwrite = mesos._pwrite
+
+    def failing_pwrite(fd, data, offset, lock):
+        if offset == 20:
+            raise OSError(28, 'No space left on device')
+        pwrite(fd, data, offset, lock)
+
+    with mock.patch('dcos.mesos._pwrite', side_effect=failing_pwrite):
+        with pytest.raises(DCOSException) as excinfo:
+            mesos_file.download(dest, workers=2, chunk_size=10)
+    assert 'No space left on device' in str(excinfo.value)
+
+    progress = json.loads(tmpdir.join('artifact.progress').read())
+    assert progress['done'] == [0, 10, 30, 40]
+
+
+def test_mesos_file_download_saves_progress_when_interrupted(tmpdir):
+    content = b'0123456789' * 5
+    client = _file_client(content)
+    file_read = client.master_file_read.side_effect
+
+    def interrupted_file_read(path, offset, length):
+        # the range at offset 30 is read from 3 bytes before it
+        if offset == 27:
+            raise KeyboardInterrupt()
+        return file_read(path, offset, length)
+
+    client.master_file_read.side_effect = interrupted_file_read
+    mesos_file = mesos.MesosFile('artifact', dcos_client=client)
+    dest = str(tmpdir.join('artifact'))
+
+    with pytest.raises(KeyboardInterrupt):
+        mesos_file.download(dest, workers=1, chunk_size=10)
+
+    progress = json.loads(tmpdir.join('artifact.progress').read())
+    assert progress['done'] == [0, 10, 20]
+
+
+def _agent_state(*task_ids):
+    return {
+        'frameworks': [{
+            'executors': [
+                {'id': 'executor-' + task_id,
+                 'directory': '/sandbox/' + task_id,
+                 'tasks': [{'id': task_id}],
+                 'completed_tasks': [],
+                 'queued_tasks': []}
+                for task_id in task_ids],
+            'completed_executors': []}],
+        'completed_frameworks': []}
+
+
+def test_tail_tasks_merges_lines_from_matching_tasks():
+    sandboxes = {'app.1': b'a1\na2\npart', 'app.2': b'b1\n'}
+    state = _state()
+    state['frameworks'][0]['tasks'].append(
+        {'id': 'other.1', 'framework_id': 'marathon',
+         'slave_id': 'agent-1', 'state': 'TASK_RUNNING'})
+
+    def file_read(slave_id, url, path, offset, length):
+        content = sandboxes[path.split('/')[2]]
+        if offset < 0:
+            return {'data': '', 'offset': len(content)}
+        data = content[offset:offset + 4]
+        if content == b'b1\n' and offset == 3:
+            # more output shows up after the first poll of the new data
+            sandboxes['app.2'] += b'b2\n'
+        return {'data': data.decode('utf-8'), 'offset': offset}
+
+    client = mock.create_autospec(mesos.DCOSClient)
+    client.get_master_state.return_value = state
+    client.get_slave_state.return_value = \
+        _agent_state('app.1', 'app.2', 'other.1')
+    client.slave_file_read.side_effect = file_read
+
+    tail = mesos.tail_tasks('app', from_start=True, workers=2,
+                            min_interval=0.01, max_interval=0.02,
+                            dcos_client=client)
+    records = [next(tail) for _ in range(4)]
+    sandboxes['app.1'] += b'ial\n'
+    records.append(next(tail))
+    tail.close()
+
+    assert sorted(records) == [('app.1', 'a1'), ('app.1', 'a2'),
+                               ('app.1', 'partial'),
+                               ('app.2', 'b1'), ('app.2', 'b2')]
+    assert records.index(('app.1', 'a1')) < records.index(('app.1', 'a2'))
+    paths = {c[1]['path'] for c in client.slave_file_read.call_args_list}
+    assert paths == {'/sandbox/app.1/stdout', '/sandbox/app.2/stdout'}
+
+
+def test_tail_tasks_reads_a_bounded_number_of_chunks_per_poll():
+    content = b'0123\n' * 10
+
+    def file_read(slave_id, url, path, offset, length):
+        return {'data': content[offset:offset + 5].decode('utf-8'),
+                'offset': offset}
+
+    client = mock.create_autospec(mesos.DCOSClient)
+    client.get_master_state.return_value = _state()
+    client.get_slave_state.return_value = _agent_state('app.1', 'app.2')
+    client.slave_file_read.side_effect = file_read
+    task = mesos.get_master(client).task('app.1')
+    tail = mesos._TaskLogTail(task, 'stdout', True, client)
+
+    with mock.patch('dcos.mesos.TAIL_POLL_CHUNKS', 4):
+        assert tail.poll() == ['0123'] * 4
+        assert tail.got_data
+        assert tail.poll() == ['0123'] * 4
+        assert tail.poll() == ['0123'] * 2
+        assert tail.poll() == []
+        assert not tail.got_data
+
+
+def test_tail_tasks_stops_while_idle():
+    client = mock.create_autospec(mesos.DCOSClient)
+    client.get_master_state.return_value = _state()
+    client.get_slave_state.return_value = _agent_state('app.1', 'app.2')
+    client.slave_file_read.return_value = {'data': '', 'offset': 0}
+    stop = threading.Event()
+
+    tail = mesos.tail_tasks('app', min_interval=60, max_interval=60,
+                            stop=stop, dcos_client=client)
+    threading.Timer(0.1, stop.set).start()
+    start = time.time()
+
+    assert list(tail) == []
+    assert time.time() - start < 10
+
+
+def test_tail_tasks_without_matches():
+    client = mock.create_autospec(mesos.DCOSClient)
+    client.get_master_state.return_value = _state()
+
+    assert list(mesos.tail_tasks('missing', dcos_client=client)) == []
+
+
+def test_master_prefetch_agent_states():
+    client = mock.create_autospec(mesos.DCOSClient)
+    agent_states = {'agent-1': _agent_state('app.0', 'app.1'),
+                    'agent-10': _agent_state('app.2')}
+
+    def get_slave_state(slave_id, private_url):
+        if slave_id == 'agent-10':
+            raise DCOSException('agent unreachable')
+        return agent_states[slave_id]
+
+    client.get_slave_state.side_effect = get_slave_state
+    master = mesos.Master(_state(), client)
+
+    master.prefetch_agent_states(workers=2)
+    master.prefetch_agent_states(['agent-1', 'missing'])
+
+    assert client.get_slave_state.call_count == 2
+    assert master.slave('agent-1')._state is agent_states['agent-1']
+    assert master.slave('agent-10')._state is None
+
+    client.get_slave_state.side_effect = None
+    client.get_slave_state.return_value = agent_states['agent-10']
+    assert master.task('app.1').directory() == '/sandbox/app.1'
+    assert master.task('app.2').executor()['id'] == 'executor-app.2'
+    assert master.slave('agent-1').executor('app.2') is None
+    assert client.get_slave_state.call_count == 3
+
+
+def test_master_prefetch_agent_states_shares_one_client():
+    client = mock.create_autospec(mesos.DCOSClient)
+    client.get_slave_state.return_value = _agent_state('app.0')
+    master = mesos.Master(_state())
+
+    with mock.patch('dcos.mesos.DCOSClient',
+                    return_value=client) as client_class:
+        master.prefetch_agent_states(workers=2)
+
+    assert client_class.call_count == 1
+    assert client.get_slave_state.call_count == 2
+
+
+class _StandInAgentHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serves the v1 agent API calls made by `TaskIO`: runs `cat`, which
+    echoes STDIN, `echo`, which writes its arguments and the parent
+    container's ID and exits with status 256 for the parent `fail`, or
+    `yes`, which writes `server.records` records of `server.record_size`
+    bytes."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):  # noqa: N802
+        if self.headers['Content-Type'] == 'application/recordio':
+            self._attach_container_input()
+        else:
+            length = int(self.headers['Content-Length'])
+            message = json.loads(self.rfile.read(length).decode('utf-8'))
+            if message['type'] == 'WAIT_NESTED_CONTAINER':
+                self._wait_nested_container(message)
+            else:
+                self._launch_nested_container_session(message)
+
+    def _attach_container_input(self):
+        decoder = recordio.Decoder(lambda s: json.loads(s.decode('utf-8')))
+        for chunk in self._request_chunks():
+            for message in decoder.decode_iter(chunk):
+                process_io = message['attach_container_input'].get(
+                    'process_io', {})
+                if process_io.get('type') == 'DATA':
+                    data = base64.b64decode(process_io['data']['data'])
+                    self.server.stdin.put(data or None)
+                elif process_io.get('type') == 'CONTROL':
+                    self.server.heartbeats += 1
+
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _wait_nested_container(self, message):
+        container_id = message['wait_nested_container']['container_id']
+        exit_status = 256 if container_id['parent']['value'] == 'fail' else 0
+        body = json.dumps({
+            'type': 'WAIT_NESTED_CONTAINER',
+            'wait_nested_container': {'exit_status': exit_status}})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def _launch_nested_container_session(self, message):
+        launch = message['launch_nested_container_session']
+        cmd = launch['command']['value']
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/recordio')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        self._send('STDERR', b'ready\n')
+        if cmd == 'cat':
+            for data in iter(self.server.stdin.get, None):
+                self._send('STDOUT', data)
+        elif cmd == 'echo':
+            output = launch['command']['arguments'][1:] + [
+                launch['container_id']['parent']['value']]
+            self._send('STDOUT', ' '.join(output).encode('utf-8'))
+        else:
+            data = b'y' * self.server.record_size
+            for _ in range(self.server.records):
+                self._send('STDOUT', data)
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _send(self, stream, data):
+        encoder = recordio.Encoder(lambda s: json.dumps(s).encode('utf-8'))
+        record = encoder.encode({
+            'type': 'DATA',
+            'data': {'type': stream,
+                     'data': base64.b64encode(data).decode('utf-8')}})
+        self.wfile.write(
+            '{:x}\r\n'.format(len(record)).encode('utf-8') + record + b'\r\n')
+
+    def _request_chunks(self):
+        while True:
+            size = int(self.rfile.readline().strip(), 16)
+            if size == 0:
+                self.rfile.readline()
+                return
+            yield self.rfile.read(size)
+            self.rfile.readline()
+
+
+def _stand_in_agent(http_server, records=0, record_size=0):
+    return http_server(_StandInAgentHandler, stdin=Queue(), heartbeats=0,
+                       records=records, record_size=record_size)
+
+
+def _agent_post(url, data=None, timeout=None, stream=False, headers=None):
+    response = requests.post(url, data=data, timeout=timeout, stream=stream,
+                             headers=headers)
+    response.raise_for_status()
+    return response
+
+
+def _task_io(cls, agent, cmd, interactive=False):
+    state = _state()
+    state['frameworks'][0]['tasks'][0]['statuses'] = [
+        {'container_status': {'container_id': {'value': 'parent'}}}]
+    client = mock.create_autospec(mesos.DCOSClient)
+    client._mesos_master_url = None
+    client.get_master_state.return_value = state
+    client.slave_url.return_value = agent.url('api/v1')
+
+    with mock.patch('dcos.mesos.DCOSClient', return_value=client):
+        return cls('app.1', cmd=cmd, args=[], interactive=interactive)
+
+
+@pytest.mark.parametrize('cls', [mesos.TaskIO, mesos.AsyncTaskIO])
+def test_task_io_streams_stdin_and_output(cls, http_server):
+    agent = _stand_in_agent(http_server)
+    task_io = _task_io(cls, agent, 'cat', interactive=True)
+    stdin_r, stdin_w = os.pipe()
+    os.write(stdin_w, b'hello\n')
+    os.write(stdin_w, b'world\n')
+    os.close(stdin_w)
+    stdout = io.TextIOWrapper(io.BytesIO())
+    stderr = io.TextIOWrapper(io.BytesIO())
+
+    with io.open(stdin_r, 'rb') as stdin, \
+            mock.patch('sys.stdin', stdin), \
+            mock.patch('sys.stdout', stdout), \
+            mock.patch('sys.stderr', stderr), \
+            mock.patch('dcos.mesos.http.post', _agent_post):
+        task_io.run()
+
+    assert stdout.buffer.getvalue() == b'hello\nworld\n'
+    assert stderr.buffer.getvalue() == b'ready\n'
+    if cls is mesos.AsyncTaskIO:
+        assert agent.heartbeats == 1
+
+
+def test_async_task_io_coalesces_output(http_server):
+    agent = _stand_in_agent(http_server, records=2000, record_size=100)
+    task_io = _task_io(mesos.AsyncTaskIO, agent, 'yes')
+    stdout = mock.Mock(wraps=io.TextIOWrapper(io.BytesIO()))
+    stdout.buffer = mock.Mock(wraps=io.BytesIO())
+
+    with mock.patch('sys.stdout', stdout), \
+            mock.patch('sys.stderr', io.TextIOWrapper(io.BytesIO())), \
+            mock.patch('dcos.mesos.http.post', _agent_post):
+        task_io.run()
+
+    written = b''.join(c[0][0] for c in stdout.buffer.write.call_args_list)
+    assert written == b'y' * 200000
+    assert stdout.flush.call_count == stdout.buffer.write.call_count
+    assert stdout.buffer.write.call_count < 2000
+
+
+def _exec_client(agent):
+    state = _state()
+    tasks = state['frameworks'][0]['tasks']
+    tasks[0]['statuses'] = [
+        {'container_status': {'container_id': {'value': 'parent-1'}}}]
+    tasks[1]['statuses'] = [
+        {'container_status': {'container_id': {'value': 'fail'}}}]
+    # no container status: can't exec in it
+    tasks.append({'id': 'app.3', 'framework_id': 'marathon',
+                  'slave_id': 'agent-1', 'state': 'TASK_RUNNING'})
+    client = mock.create_autospec(mesos.DCOSClient)
+    client._mesos_master_url = None
+    client.get_master_state.return_value = state
+    client.slave_url.return_value = agent.url('api/v1')
+    return client
+
+
+def test_exec_tasks(http_server):
+    agent = _stand_in_agent(http_server)
+    client = _exec_client(agent)
+
+    with mock.patch('dcos.mesos.http.post', _agent_post):
+        results = mesos.exec_tasks('app', 'echo', ['dump'], concurrency=2,
+                                   dcos_client=client)
+
+    assert [r.task_id for r in results] == ['app.1', 'app.2', 'app.3']
+    assert results[0] == mesos.ExecResult(
+        'app.1', 0, b'dump parent-1', b'ready\n', None)
+    assert results[1][:4] == ('app.2', 256, b'dump fail', b'ready\n')
+    assert results[2].exit_status is None
+    assert 'Unable to obtain container status' in str(results[2].error)
+    assert client.get_master_state.call_count == 1
+
+
+def test_exec_tasks_unexpected_response(http_server):
+    agent = _stand_in_agent(http_server)
+    client = _exec_client(agent)
+
+    def post(url, data=None, **kwargs):
+        if 'WAIT_NESTED_CONTAINER' in data and '"fail"' in data:
+            response = mock.create_autospec(requests.Response)
+            response.json.side_effect = ValueError('No JSON object')
+            return response
+        return _agent_post(url, data=data, **kwargs)
+
+    with mock.patch('dcos.mesos.http.post', post):
+        results = mesos.exec_tasks('app', 'echo', ['dump'], concurrency=2,
+                                   dcos_client=client)
+
+    assert [r.task_id for r in results] == ['app.1', 'app.2', 'app.3']
+    assert results[0].exit_status == 0
+    assert results[1][:4] == ('app.2', None, b'dump fail', b'ready\n')
+    assert 'No JSON object' in str(results[1].error)
+    assert isinstance(results[1].error, DCOSException)
+
+
+def test_exec_tasks_to_files(tmpdir, http_server):
+    agent = _stand_in_agent(http_server)
+    client = _exec_client(agent)
+
+    with mock.patch('dcos.mesos.http.post', _agent_post):
+        result, = mesos.exec_tasks('app.1', 'echo', output_dir=str(tmpdir),
+                                   dcos_client=client)
+
+    assert result.stdout == str(tmpdir.join('app.1.stdout'))
+    assert tmpdir.join('app.1.stdout').read_binary() == b'parent-1'
+    assert tmpdir.join('app.1.stderr').read_binary() == b'ready\n'
+
+
+def test_exec_tasks_sink_error(tmpdir, http_server):
+    agent = _stand_in_agent(http_server)
+    client = _exec_client(agent)
+    # a directory in the way of app.2's STDERR file
+    tmpdir.mkdir('app.2.stderr')
+
+    with mock.patch('dcos.mesos.http.post', _agent_post):
+        results = mesos.exec_tasks('app', 'echo', ['dump'], concurrency=2,
+                                   output_dir=str(tmpdir), dcos_client=client)
+
+    assert [r.task_id for r in results] == ['app.1', 'app.2', 'app.3']
+    assert results[0].exit_status == 0
+    assert results[0].error is None
+    assert tmpdir.join('app.1.stdout').read_binary() == b'dump parent-1'
+    assert results[1].exit_status is None
+    assert 'app.2' in str(results[1].error)
+    assert tmpdir.join('app.2.stdout').read_binary() == b''
+    assert 'Unable to obtain container status' in str(results[2].error)
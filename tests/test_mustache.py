@@ -0,0 +1,46 @@
+import pytest
+
+from dcos import mustache
+from dcos.errors import DCOSException
+
+
+def test_variables():
+    context = {'name': 'a<b> & "c"', 'n': 1.5, 'flag': False, 'none': None}
+
+    assert mustache.render('{{name}}|{{{name}}}|{{& name}}', context) == \
+        'a&lt;b&gt; &amp; &quot;c&quot;|a<b> & "c"|a<b> & "c"'
+    assert mustache.render('{{n}} {{flag}} [{{none}}] [{{missing}}]',
+                           context) == '1.5 false [] []'
+
+
+def test_dotted_names_and_scopes():
+    context = {'a': {'b': {'c': 'deep'}}, 'x': 'outer'}
+
+    assert mustache.render('{{a.b.c}} {{a.nope.c}}', context) == 'deep '
+    assert mustache.render('{{#a}}{{#b}}{{c}} {{x}}{{/b}}{{/a}}',
+                           context) == 'deep outer'
+
+
+@pytest.mark.parametrize('value, rendered', [
+    (True, 'yes'), (0, 'yes'), ({}, 'yes'), ('', 'no'), (False, 'no'),
+    (None, 'no'), ([], 'no'), ([1, 2], '1;2;'),
+])
+def test_sections(value, rendered):
+    template = '{{#v}}{{#.}}{{.}};{{/.}}{{/v}}{{^v}}no{{/v}}{{! comment }}'
+    if not isinstance(value, list):
+        template = template.replace('{{#.}}{{.}};{{/.}}', 'yes')
+
+    assert mustache.render(template, {'v': value}) == rendered
+
+
+@pytest.mark.parametrize('template, context', [
+    ('{{> partial}}', {}),
+    ('{{=<% %>=}}', {}),
+    ('{{#a}}', {}),
+    ('{{#a}}{{/b}}', {}),
+    ('{{a', {}),
+    ('{{a}}', {'a': [1]}),
+])
+def test_unsupported(template, context):
+    with pytest.raises(DCOSException):
+        mustache.render(template, context)
@@ -0,0 +1,153 @@
+import os
+
+import mock
+import pytest
+import requests
+
+from dcos import packageindex, util
+from dcos.errors import DCOSException
+
+REPOS = {'repositories': [
+    {'name': 'Universe', 'uri': 'https://universe.example.com/repo'},
+    {'name': 'Local', 'uri': 'https://local.example.com/repo'},
+]}
+
+UNIVERSE = {'packages': [
+    {'name': 'kafka', 'version': '1.0', 'releaseVersion': 0,
+     'description': 'Apache Kafka', 'tags': ['message', 'broker'],
+     'framework': True, 'selected': True},
+    {'name': 'kafka', 'version': '2.0', 'releaseVersion': 1,
+     'description': 'Apache Kafka running on DC/OS',
+     'tags': ['message', 'broker'], 'framework': True, 'selected': True},
+    {'name': 'cassandra', 'version': '1.0', 'releaseVersion': 3,
+     'description': 'Apache Cassandra', 'tags': ['database', 'nosql']},
+    {'name': 'hello-world', 'version': '1.0', 'releaseVersion': 0,
+     'description': 'An example service', 'tags': []},
+]}
+
+LOCAL = {'packages': [
+    {'name': 'kafka', 'version': '0.1-local', 'releaseVersion': 0,
+     'description': 'Local fork', 'tags': []},
+    {'name': 'redis', 'version': '3.0', 'releaseVersion': 2,
+     'description': 'Key value store', 'tags': ['cache']},
+]}
+
+
+def test_search(index):
+    def names(query):
+        return [package['name']
+                for package in index.search(query)['packages']]
+
+    assert names(None) == ['cassandra', 'hello-world', 'kafka', 'redis']
+    assert names('kafka') == ['kafka']
+    assert names('apache') == ['cassandra', 'kafka']
+    assert names('Apache cass') == ['cassandra']
+    assert names('broker') == ['kafka']
+    assert names('hello-world') == ['hello-world']
+    assert names('*sql') == ['cassandra']
+    assert names('mongo') == []
+    # words match from their start, not anywhere like in Cosmos
+    assert names('afka') == []
+
+
+def test_search_result(index):
+    [kafka] = index.search('kafka')['packages']
+
+    assert kafka == {'name': 'kafka',
+                     'currentVersion': '2.0',
+                     'versions': {'1.0': '0', '2.0': '1'},
+                     'description': 'Apache Kafka running on DC/OS',
+                     'tags': ['message', 'broker'],
+                     'framework': True,
+                     'selected': True}
+
+
+def test_list_versions(index):
+    assert index.list_versions('redis') == {'results': {'3.0': '2'}}
+    with pytest.raises(DCOSException):
+        index.list_versions('mongo')
+
+
+def test_source(index):
+    assert index.source('kafka', '2.0') == 'https://universe.example.com/repo'
+    assert index.source('kafka', '0.1-local') == \
+        'https://local.example.com/repo'
+    assert index.source('kafka', '3.0') is None
+    assert index.source('mongo', '1.0') is None
+
+
+def test_load_saved_index(index, index_path):
+    loaded = packageindex.load(index_path)
+
+    assert len(loaded) == len(index) == 4
+    assert loaded.search('nosql') == index.search('nosql')
+
+
+def test_sync_revalidates_with_etag(index, index_path):
+    responses = {REPOS['repositories'][0]['uri']: _response(304),
+                 REPOS['repositories'][1]['uri']: _response(
+                     200, {'packages': LOCAL['packages'][1:]}, 'v2')}
+
+    with mock.patch('dcos.http.get',
+                    side_effect=lambda uri, **kwargs: responses[uri]) as get:
+        index = packageindex.sync(_package_manager(), index_path)
+
+    etags = {call[0][0]: call[1]['headers']['If-None-Match']
+             for call in get.call_args_list}
+    assert etags == {'https://universe.example.com/repo': 'universe-v1',
+                     'https://local.example.com/repo': 'local-v1'}
+    assert index.list_versions('kafka') == {
+        'results': {'1.0': '0', '2.0': '1'}}
+    assert index.repositories[1]['etag'] == 'v2'
+
+
+def test_sync_keeps_unreachable_repository(index, index_path):
+    with mock.patch('dcos.http.get', side_effect=DCOSException('offline')):
+        index = packageindex.sync(_package_manager(), index_path)
+
+    assert len(index) == 4
+
+
+def test_sync_keeps_repository_with_invalid_package(index, index_path):
+    responses = {REPOS['repositories'][0]['uri']: _response(
+                     200, {'packages': [{'name': 'kafka'}]}, 'universe-v2'),
+                 REPOS['repositories'][1]['uri']: _response(304)}
+
+    with mock.patch('dcos.http.get',
+                    side_effect=lambda uri, **kwargs: responses[uri]):
+        index = packageindex.sync(_package_manager(), index_path)
+
+    assert len(index) == 4
+    assert index.repositories[0]['etag'] == 'universe-v1'
+
+
+@pytest.fixture
+def index_path():
+    with util.tempdir() as tempdir:
+        yield os.path.join(tempdir, 'cache', packageindex.INDEX_FILE)
+
+
+@pytest.fixture
+def index(index_path):
+    responses = {REPOS['repositories'][0]['uri']: _response(
+                     200, UNIVERSE, 'universe-v1'),
+                 REPOS['repositories'][1]['uri']: _response(
+                     200, LOCAL, 'local-v1')}
+
+    with mock.patch('dcos.http.get',
+                    side_effect=lambda uri, **kwargs: responses[uri]):
+        return packageindex.sync(_package_manager(), index_path)
+
+
+def _package_manager():
+    package_manager = mock.Mock()
+    package_manager.get_repos.return_value = REPOS
+    return package_manager
+
+
+def _response(status_code, body=None, etag=None):
+    response = mock.create_autospec(requests.Response)
+    response.status_code = status_code
+    response.headers = {'ETag': etag} if etag else {}
+    response.json.return_value = body
+    return response
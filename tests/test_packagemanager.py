@@ -1,8 +1,15 @@
+import base64
+import collections
+import json
+import os
+
 import mock
 import pytest
 import requests
 
-from dcos import packagemanager
+from dcos import cosmos, packageindex, packagemanager, util
+from dcos.errors import (DCOSBadRequest, DCOSConnectionError, DCOSException,
+                         DCOSHTTPException)
 
 
 def describe_response_headers(pkg_mgr):
@@ -102,3 +109,397 @@ def test_install(post_fn, pkg_mgr, fake_pkg):
         json={'packageName': fake_pkg.name(),
               'packageVersion': fake_pkg.version()},
     )
+
+
+@pytest.fixture
+def probes_dir():
+    with util.tempdir() as path:
+        with mock.patch('dcos.config.get_cluster_cache_path',
+                        return_value=path):
+            cosmos.invalidate_cache()
+            packagemanager.invalidate_cache()
+            yield path
+            cosmos.invalidate_cache()
+            packagemanager.invalidate_cache()
+
+
+def capabilities_response(pkg_mgr, names):
+    content_type = pkg_mgr.cosmos._get_accept('capabilities', 'v1')
+    res = mock_response(200, {'Content-Type': content_type})
+    res.json.return_value = {'capabilities': [{'name': n} for n in names]}
+    return res
+
+
+@mock.patch('dcos.http.get')
+def test_has_capability_probes_cosmos_once(get_fn, pkg_mgr, probes_dir):
+    get_fn.return_value = capabilities_response(pkg_mgr, ['METRONOME'])
+
+    assert pkg_mgr.has_capability('METRONOME')
+    assert pkg_mgr.enabled()
+    other_mgr = packagemanager.PackageManager('http://testserver/cosmos')
+    assert not other_mgr.has_capability('LOGGING')
+    assert get_fn.call_count == 1
+
+    # later commands reuse the probe stored in the cluster's directory
+    with mock.patch.object(cosmos, '_probes', {}), \
+            mock.patch.object(cosmos, '_probes_loaded', False):
+        assert other_mgr.has_capability('METRONOME')
+    assert get_fn.call_count == 1
+
+
+@mock.patch('dcos.http.get')
+def test_has_capability_cosmos_disabled(get_fn, pkg_mgr, probes_dir):
+    response = mock_response(404, {})
+    get_fn.side_effect = DCOSHTTPException(response)
+
+    assert not pkg_mgr.enabled()
+    assert not pkg_mgr.has_capability('METRONOME')
+    assert get_fn.call_count == 1
+
+
+@mock.patch('dcos.http.get')
+def test_has_capability_errors_are_not_cached(get_fn, pkg_mgr, probes_dir):
+    get_fn.side_effect = DCOSConnectionError('http://testserver/cosmos')
+
+    with pytest.raises(DCOSConnectionError):
+        pkg_mgr.has_capability('METRONOME')
+
+    get_fn.side_effect = None
+    get_fn.return_value = capabilities_response(pkg_mgr, ['METRONOME'])
+    assert pkg_mgr.has_capability('METRONOME')
+
+
+def cosmos_post_fn(pkg_mgr, responses):
+    """Answers cosmos requests with the next response for their endpoint,
+    and repository/list with a single repository."""
+
+    def post(url, **kwargs):
+        endpoint = url[len('http://testserver/'):]
+        if endpoint == 'package/repository/list':
+            content_type = pkg_mgr.cosmos._get_accept(endpoint, 'v1')
+            res = mock_response(200, {'Content-Type': content_type})
+            res.json.return_value = {'repositories': [
+                {'name': 'Universe', 'uri': 'https://universe'}]}
+            return res
+
+        response = responses[endpoint].pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+    return post
+
+
+def describe_response(pkg_mgr, version='v3'):
+    content_type = pkg_mgr.cosmos._get_accept('package/describe', version)
+    res = mock_response(200, {'Content-Type': content_type})
+    res.json.return_value = {'package': {'name': 'fake_pkg',
+                                         'version': '0.0.1'}}
+    return res
+
+
+@mock.patch('dcos.http.post')
+def test_describe_reuses_negotiated_version(post_fn, pkg_mgr, probes_dir):
+    post_fn.side_effect = cosmos_post_fn(pkg_mgr, {'package/describe': [
+        DCOSBadRequest(mock_response(400, {})),
+        describe_response(pkg_mgr, 'v2'),
+        describe_response(pkg_mgr, 'v2'),
+    ]})
+
+    pkg_mgr.get_package_version('fake_pkg', None)
+    pkg_mgr.get_package_version('fake_pkg', None)
+
+    accepts = [call[1]['headers']['Accept']
+               for call in post_fn.call_args_list
+               if call[0][0].endswith('package/describe')]
+    assert accepts == [
+        pkg_mgr.cosmos._get_accept('package/describe', 'v3'),
+        pkg_mgr.cosmos._get_accept('package/describe', 'v2'),
+        pkg_mgr.cosmos._get_accept('package/describe', 'v2'),
+    ]
+
+
+@mock.patch('dcos.http.post')
+def test_describe_caches_pinned_versions(post_fn, pkg_mgr, probes_dir):
+    post_fn.side_effect = cosmos_post_fn(pkg_mgr, {'package/describe': [
+        describe_response(pkg_mgr), describe_response(pkg_mgr)]})
+
+    pkg = pkg_mgr.get_package_version('fake_pkg', '0.0.1')
+    assert pkg_mgr.get_package_version('fake_pkg', '0.0.1').package_json() \
+        == pkg.package_json() == {'name': 'fake_pkg', 'version': '0.0.1'}
+
+    # later commands reuse the description stored in the cluster's directory
+    with mock.patch.object(packagemanager, '_package_cache', {}):
+        other_mgr = packagemanager.PackageManager('http://testserver/cosmos')
+        other_mgr.get_package_version('fake_pkg', '0.0.1')
+
+    describes = [call for call in post_fn.call_args_list
+                 if call[0][0].endswith('package/describe')]
+    assert len(describes) == 1
+
+    # a change of repositories invalidates it
+    cosmos.set_probe(pkg_mgr.cosmos_url, 'repositories', {'repositories': []})
+    pkg_mgr.get_package_version('fake_pkg', '0.0.1')
+
+    describes = [call for call in post_fn.call_args_list
+                 if call[0][0].endswith('package/describe')]
+    assert len(describes) == 2
+
+    # and the description for the previous repositories is dropped
+    assert len(packagemanager._package_cache) == 1
+    cache_dir = os.path.join(probes_dir, packagemanager.PACKAGES_CACHE_SUBDIR)
+    assert len(os.listdir(cache_dir)) == 1
+
+
+MARATHON_TEMPLATE = b'''{
+  "id": "{{service.name}}",
+  "cpus": {{service.cpus}},
+  "cmd": "{{service.cmd}}",
+  "container": {
+    "docker": {"image": "{{resource.assets.container.docker.image}}"}},
+  "env": {
+    {{#service.debug}}"DEBUG": "true",{{/service.debug}}
+    "PEERS": "{{#service.peers}}{{.}},{{/service.peers}}"
+  },
+  "labels": {"DCOS_PACKAGE_FRAMEWORK_NAME": "{{service.name}}"}
+}'''
+
+CONFIG_SCHEMA = {
+    'type': 'object',
+    'properties': {'service': {
+        'type': 'object',
+        'properties': {
+            'name': {'type': 'string', 'default': 'fake'},
+            'cpus': {'type': 'number', 'default': 1, 'minimum': 0.1},
+            'cmd': {'type': 'string', 'default': 'run'},
+            'debug': {'type': 'boolean', 'default': False},
+            'peers': {'type': 'array', 'default': []},
+        },
+        'additionalProperties': False,
+    }},
+}
+
+
+FAKE_PACKAGE = {
+    'packagingVersion': '3.0',
+    'maintainer': 'fake@example.com',
+    'description': 'A fake package',
+    'tags': ['fake'],
+    'selected': False,
+    'framework': True,
+    'postInstallNotes': 'Installed',
+    'config': CONFIG_SCHEMA,
+    'resource': {'assets': {'container': {'docker': {'image': 'fake:1'}}},
+                 'images': {'icon-small': 'https://example.com/small.png'}},
+    'marathon': {'v2AppMustacheTemplate':
+                 base64.b64encode(MARATHON_TEMPLATE).decode('ascii')},
+}
+
+
+def _cosmos_label(value):
+    """Encodes a label value the way Cosmos does, keeping the key order."""
+    return base64.b64encode(json.dumps(
+        value, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+COSMOS_RENDER_OPTIONS = {'service': {
+    'cpus': 2, 'debug': True, 'peers': ['a', 'b'], 'cmd': 'echo "hi" && run'}}
+
+COSMOS_RENDER = {'marathonJson': {
+    'id': 'fake',
+    'cpus': 2,
+    'cmd': 'echo &quot;hi&quot; &amp;&amp; run',
+    'container': {'docker': {'image': 'fake:1'}},
+    'env': {'DEBUG': 'true', 'PEERS': 'a,b,'},
+    'labels': {
+        'DCOS_PACKAGE_FRAMEWORK_NAME': 'fake',
+        'DCOS_PACKAGE_METADATA': _cosmos_label(collections.OrderedDict([
+            ('packagingVersion', '3.0'),
+            ('name', 'fake_pkg'),
+            ('version', '0.0.1'),
+            ('maintainer', 'fake@example.com'),
+            ('description', 'A fake package'),
+            ('tags', ['fake']),
+            ('selected', False),
+            ('framework', True),
+            ('postInstallNotes', 'Installed'),
+            ('images', {'icon-small': 'https://example.com/small.png'}),
+        ])),
+        'DCOS_PACKAGE_DEFINITION': _cosmos_label(
+            dict(FAKE_PACKAGE, name='fake_pkg', version='0.0.1')),
+        'DCOS_PACKAGE_OPTIONS': _cosmos_label(COSMOS_RENDER_OPTIONS),
+        'DCOS_PACKAGE_SOURCE': 'https://universe',
+        'DCOS_PACKAGE_NAME': 'fake_pkg',
+        'DCOS_PACKAGE_VERSION': '0.0.1',
+    }}}
+"""package/render response of Cosmos for the fake package."""
+
+
+def _decode_labels(app):
+    """Decodes the labels holding JSON, whose key order may differ."""
+    labels = dict(app['labels'])
+    for name in ['DCOS_PACKAGE_METADATA', 'DCOS_PACKAGE_DEFINITION',
+                 'DCOS_PACKAGE_OPTIONS']:
+        labels[name] = json.loads(
+            base64.b64decode(labels[name]).decode('utf-8'))
+    return dict(app, labels=labels)
+
+
+def _index_summary(version):
+    return {'versions': {version: '0'}, 'description': '', 'tags': []}
+
+
+@pytest.fixture
+def templated_pkg(pkg_mgr, probes_dir):
+    describe = describe_response(pkg_mgr)
+    describe.json.return_value['package'].update(FAKE_PACKAGE)
+    packageindex.PackageIndex([
+        {'name': 'Local', 'uri': 'https://local', 'etag': None,
+         'packages': {'fake_pkg': _index_summary('0.0.2')}},
+        {'name': 'Universe', 'uri': 'https://universe', 'etag': None,
+         'packages': {'fake_pkg': _index_summary('0.0.1')}},
+    ]).save(os.path.join(probes_dir, packageindex.INDEX_FILE))
+    with mock.patch('dcos.http.post') as post_fn:
+        post_fn.side_effect = cosmos_post_fn(
+            pkg_mgr, {'package/describe': [describe], 'package/render': []})
+        yield pkg_mgr.get_package_version('fake_pkg', '0.0.1'), post_fn
+
+
+def test_render_marathon_json_locally(templated_pkg):
+    pkg, post_fn = templated_pkg
+
+    app = pkg.marathon_json(COSMOS_RENDER_OPTIONS, local=True)
+
+    assert _decode_labels(app) == _decode_labels(COSMOS_RENDER['marathonJson'])
+    assert pkg.options({}) is None
+    assert not any(call[0][0].endswith('package/render')
+                   for call in post_fn.call_args_list)
+
+
+def test_render_marathon_json_falls_back_without_source(templated_pkg,
+                                                        probes_dir):
+    pkg, post_fn = templated_pkg
+    os.remove(os.path.join(probes_dir, packageindex.INDEX_FILE))
+    response = mock_response(200, {
+        'Content-Type': pkg._package_manager.cosmos._get_accept(
+            'package/render', 'v1')})
+    response.json.return_value = COSMOS_RENDER
+    post_fn.side_effect = [response]
+
+    app = pkg.marathon_json(COSMOS_RENDER_OPTIONS, local=True)
+
+    assert app == COSMOS_RENDER['marathonJson']
+    assert post_fn.call_args[0][0].endswith('package/render')
+
+
+def test_options_fall_back_to_cosmos_on_local_failure(templated_pkg):
+    pkg, post_fn = templated_pkg
+    error = mock_response(400, {
+        'Content-Type': 'application/vnd.dcos.package.error+json;'
+                        'charset=utf-8;version=v1'})
+    error.json.return_value = {'type': 'JsonSchemaMismatch',
+                               'message': 'Options JSON failed validation',
+                               'data': {'errors': []}}
+    post_fn.side_effect = [error]
+
+    with pytest.raises(DCOSException):
+        pkg.options({'service': {'cpus': 0}})
+
+    assert post_fn.call_args[0][0].endswith('package/render')
+
+
+def fake_package_version(name, version):
+    if name == 'missing':
+        raise DCOSException('Package [missing] not found')
+    pkg = mock.Mock()
+    pkg.name.return_value = name
+    pkg.version.return_value = version or '1.0'
+    if name == 'invalid':
+        pkg.options.side_effect = DCOSException('Invalid options')
+    return pkg
+
+
+@mock.patch('dcos.subcommand.install')
+def test_install_many(install_cli, pkg_mgr):
+    def install_app(pkg, options):
+        if pkg.name() == 'broken':
+            raise DCOSException('Marathon error')
+        if pkg.name() == 'crashing':
+            raise ValueError('unexpected response')
+
+    with mock.patch.object(pkg_mgr, 'get_package_version',
+                           side_effect=fake_package_version), \
+            mock.patch.object(pkg_mgr, 'install_app',
+                              side_effect=install_app) as install_app_fn:
+        results = pkg_mgr.install_many([
+            {'name': 'kafka', 'version': '2.0', 'options': {'a': 1},
+             'cli': True},
+            {'name': 'missing'},
+            {'name': 'invalid'},
+            {'name': 'broken', 'cli': True},
+            {'name': 'cassandra', 'app': False, 'cli': True,
+             'global': True},
+            {'name': 'crashing'},
+        ], concurrency=3)
+
+    assert [(r.name, r.version, str(r.error) if r.error else None,
+             r.app, r.cli) for r in results] == [
+        ('kafka', '2.0', None, True, True),
+        ('missing', None, 'Package [missing] not found', False, False),
+        ('invalid', None, 'Invalid options', False, False),
+        ('broken', '1.0', 'Marathon error', False, False),
+        ('cassandra', '1.0', None, False, True),
+        ('crashing', '1.0',
+         'Error installing package [crashing]: unexpected response',
+         False, False),
+    ]
+    assert sorted(call[0][0].name() for call in
+                  install_app_fn.call_args_list) == [
+        'broken', 'crashing', 'kafka']
+    assert sorted((call[0][0].name(), call[0][1]) for call in
+                  install_cli.call_args_list) == [
+        ('cassandra', True), ('kafka', False)]
+
+
+@mock.patch('dcos.subcommand.uninstall')
+def test_uninstall_many(uninstall_cli, pkg_mgr):
+    uninstall_cli.return_value = True
+
+    def uninstall_app(name, remove_all, app_id):
+        if name == 'broken':
+            raise DCOSException('Cosmos error')
+        if name == 'crashing':
+            raise KeyError('appId')
+        return True
+
+    with mock.patch.object(pkg_mgr, 'uninstall_app',
+                           side_effect=uninstall_app) as uninstall_app_fn:
+        results = pkg_mgr.uninstall_many([
+            {'name': 'kafka', 'all': True, 'cli': True},
+            {'name': 'broken', 'app_id': '/broken'},
+            {'name': 'cassandra', 'app': False, 'cli': True},
+            {'name': 'crashing'},
+        ])
+
+    assert [(r.name, str(r.error) if r.error else None, r.app, r.cli)
+            for r in results] == [
+        ('kafka', None, True, True),
+        ('broken', 'Cosmos error', False, False),
+        ('cassandra', None, False, True),
+        ('crashing', "Error uninstalling package [crashing]: 'appId'",
+         False, False),
+    ]
+    assert sorted(call[0] for call in uninstall_app_fn.call_args_list) == [
+        ('broken', False, '/broken'), ('crashing', False, None),
+        ('kafka', True, None)]
+
+
+@mock.patch('dcos.subcommand.install')
+def test_install_many_rejects_duplicate_packages(install_cli, pkg_mgr):
+    with mock.patch.object(pkg_mgr, 'get_package_version') as get_version:
+        with pytest.raises(DCOSException) as excinfo:
+            pkg_mgr.install_many([{'name': 'kafka', 'cli': True},
+                                  {'name': 'kafka', 'version': '2.0'}])
+
+    assert str(excinfo.value) == 'Package [kafka] is listed more than once'
+    assert not get_version.called
+    assert not install_cli.called
@@ -1,6 +1,9 @@
 import json
 
+import pytest
+
 from dcos import recordio
+from dcos.errors import DCOSException
 
 
 def test_encode():
@@ -49,3 +52,39 @@ def test_encode_decode():
 
     for record in all_records:
         assert record == message
+
+
+def test_decode_arbitrary_chunk_boundaries():
+    encoder = recordio.Encoder(lambda s: s)
+    messages = [b"hello", b"", b"world!", b"x" * 1000, b"\n\n"]
+    encoded = b"".join(encoder.encode(m) for m in messages)
+
+    for chunk_size in [1, 2, 3, 7, 1024, len(encoded)]:
+        decoder = recordio.Decoder(lambda s: s)
+        records = []
+        for offset in range(0, len(encoded), chunk_size):
+            chunk = encoded[offset:offset + chunk_size]
+            records.extend(decoder.decode(chunk))
+
+        assert records == messages
+
+
+def test_decode_iter_is_a_generator():
+    decoder = recordio.Decoder(lambda s: s)
+
+    records = decoder.decode_iter(b"5\nhello6\nworld!3\nfo")
+
+    assert next(records) == b"hello"
+    assert next(records) == b"world!"
+    assert list(records) == []
+    assert list(decoder.decode_iter(bytearray(b"o"))) == [b"foo"]
+
+
+def test_decode_invalid_header():
+    decoder = recordio.Decoder(lambda s: s)
+
+    with pytest.raises(DCOSException):
+        decoder.decode(b"abc\nhello")
+
+    with pytest.raises(DCOSException):
+        decoder.decode(b"5\nhello")